@@ -0,0 +1,71 @@
+"""
+Startup benchmark: measures how long it takes to import the bot and build it
+through the application factory, in fresh interpreters, and checks the result
+against an import-time budget.
+
+Usage: python benchmarks/startup_bench.py [--runs 5] [--budget 1.0] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Modules that must not be imported just by building the bot
+HEAVY_MODULES = ("google.cloud.storage", "numpy")
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import bot
+imported = time.perf_counter()
+app = bot.create_bot()
+built = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "factory_s": built - imported,
+    "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+}))
+"""
+
+def run_probe() -> dict:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    output = subprocess.run(
+        [sys.executable, "-c", f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{PROBE}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bot import and startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to sample")
+    parser.add_argument("--budget", type=float, default=1.0, help="Import + factory budget in seconds (median)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.runs)]
+    totals = [s["import_s"] + s["factory_s"] for s in samples]
+    results = {
+        "runs": args.runs,
+        "import_median_s": statistics.median(s["import_s"] for s in samples),
+        "factory_median_s": statistics.median(s["factory_s"] for s in samples),
+        "total_median_s": statistics.median(totals),
+        "total_max_s": max(totals),
+        "budget_s": args.budget,
+        "heavy_modules_loaded": samples[0]["heavy_modules_loaded"],
+    }
+    results["within_budget"] = results["total_median_s"] <= args.budget and not results["heavy_modules_loaded"]
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    sys.exit(0 if results["within_budget"] else 1)
+
+if __name__ == "__main__":
+    main()
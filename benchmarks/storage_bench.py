@@ -0,0 +1,335 @@
+"""
+Storage load benchmark: drives StorageManager with V4CB and draft workloads
+against a filesystem-backed stand-in for GCS that injects latency and errors,
+and reports throughput, latency percentiles and event-loop blocking.
+
+Usage: python benchmarks/storage_bench.py [--workloads v4cb,draft] [--ops 2000]
+           [--concurrency 32] [--latency-ms 30] [--jitter-ms 10] [--error-rate 0.01]
+           [--backend emulator] [--output results.json]
+
+--backend picks what the emulator wraps (local by default) or, with gcs, runs
+against a real bucket without injected faults.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from storage_backends import (  # noqa: E402
+    GCSBackend, LocalBackend, MemoryBackend, SQLiteBackend, StorageBackend, StoredObject
+)
+from storage_manager import StorageManager  # noqa: E402
+from v4cb import STATE_FILE, upgrade_state  # noqa: E402
+
+class InjectedFault(Exception):
+    """A simulated transient storage error"""
+
+class EmulatedGCSBackend(StorageBackend):
+    """
+    Wraps another backend with GCS-like behaviour: every request blocks for a
+    round trip of `latency` +/- `jitter` seconds and fails with probability
+    `error_rate`. Native batches cost one round trip per call, like the JSON
+    batch API.
+    """
+    def __init__(self, inner: StorageBackend, latency: float = 0.03, jitter: float = 0.01,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        self.inner = inner
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.native_batch = inner.native_batch
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _round_trip(self) -> None:
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise InjectedFault("injected transient error")
+
+    def read_object(self, key: str, if_generation_not_match: Optional[int] = None):
+        self._round_trip()
+        return self.inner.read_object(key, if_generation_not_match)
+
+    def write_object(self, key: str, data: bytes, content_type: str = "application/json",
+                     if_generation_match: Optional[int] = None) -> int:
+        self._round_trip()
+        return self.inner.write_object(key, data, content_type, if_generation_match)
+
+    def delete(self, key: str) -> None:
+        self._round_trip()
+        self.inner.delete(key)
+
+    def list(self, prefix: str) -> List[str]:
+        self._round_trip()
+        return self.inner.list(prefix)
+
+    def read_many(self, keys: List[str]) -> Dict[str, Union[StoredObject, None, Exception]]:
+        self._round_trip()
+        return self.inner.read_many(keys)
+
+    def write_many(self, items: List[Tuple[str, bytes, str]]) -> Dict[str, Union[int, Exception]]:
+        self._round_trip()
+        return self.inner.write_many(items)
+
+    def delete_many(self, keys: List[str]) -> Dict[str, Optional[Exception]]:
+        self._round_trip()
+        return self.inner.delete_many(keys)
+
+    def close(self) -> None:
+        self.inner.close()
+
+def make_backend(args, workdir: str) -> StorageBackend:
+    if args.backend == "gcs":
+        return GCSBackend(os.getenv('STORAGE_BUCKET', 'mtg-discord-bot-data'))
+    inner = {
+        "local": lambda: LocalBackend(os.path.join(workdir, "local")),
+        "sqlite": lambda: SQLiteBackend(os.path.join(workdir, "storage.db")),
+        "memory": MemoryBackend,
+    }[args.inner]()
+    return EmulatedGCSBackend(inner, args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.seed)
+
+class LoopMonitor:
+    """Measures event-loop blocking by how late a short periodic sleep wakes up"""
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        lags = sorted(self.lags) or [0.0]
+        return {
+            "loop_lag_p99_ms": percentile(lags, 99) * 1000,
+            "loop_lag_max_ms": lags[-1] * 1000,
+            # Time the loop spent unable to run anything for more than a millisecond
+            "loop_blocked_ms": sum(lag for lag in lags if lag > 0.001) * 1000,
+        }
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+# Each workload is a list of (operation name, coroutine factory) drawn per request.
+# An operation returns a falsy value when the storage layer reported a failure.
+Operation = Tuple[str, Callable[[], "asyncio.Future"]]
+
+def v4cb_workload(storage: StorageManager, rng: random.Random, channels: int) -> Callable[[], Operation]:
+    """
+    V4CB traffic: channels hydrate their state document (mostly revalidating a
+    cached copy), rounds end with a score increment, banned lists grow, and
+    startup preloads every channel in batches.
+    """
+    keys = [("bench-server", f"channel-{i}") for i in range(channels)]
+
+    def add_ban(server_id: str, channel_id: str):
+        card = f"card {rng.randrange(20000)}"
+
+        def merge(current):
+            state = upgrade_state(current)
+            state["banned_cards"] = sorted(set(state["banned_cards"]) | {card})
+            return state
+        return storage.update_json(server_id, channel_id, STATE_FILE, merge)
+
+    def score(server_id: str, channel_id: str):
+        player = f"player {rng.randrange(8)}"
+
+        def merge(current):
+            state = upgrade_state(current)
+            state["scores"][player] = state["scores"].get(player, 0) + 1
+            return state
+        return storage.update_json(server_id, channel_id, STATE_FILE, merge)
+
+    async def preload():
+        sample = rng.sample(keys, min(50, len(keys)))
+        documents = await storage.read_many_json([(s, c, STATE_FILE) for s, c in sample])
+        return documents
+
+    mix = [
+        (0.55, "load_state", lambda s, c: storage.read_json(s, c, STATE_FILE)),
+        (0.25, "submit_winner", score),
+        (0.15, "update_banned", add_ban),
+        (0.05, "preload_batch", lambda s, c: preload()),
+    ]
+
+    def next_operation() -> Operation:
+        server_id, channel_id = rng.choice(keys)
+        roll = rng.random()
+        for weight, name, make in mix:
+            roll -= weight
+            if roll <= 0:
+                return name, lambda: make(server_id, channel_id)
+        return mix[0][1], lambda: mix[0][2](server_id, channel_id)
+
+    return next_operation
+
+def draft_workload(storage: StorageManager, rng: random.Random, drafts: int) -> Callable[[], Operation]:
+    """
+    Draft traffic: bursts of small pick records from eight seats, each draft's
+    picks read back when it ends, and finished drafts cleaned up in batches.
+    """
+    pick_counts = [0] * drafts
+
+    def record_pick(draft: int):
+        pick_counts[draft] += 1
+        path = f"drafts/bench-{draft}/picks-{pick_counts[draft]:04d}.json"
+        return storage.write_path_json(path, {
+            "seat": pick_counts[draft] % 8, "card": f"card {rng.randrange(540)}", "ts": time.time()
+        })
+
+    async def read_picks(draft: int):
+        paths = [f"drafts/bench-{draft}/picks-{n:04d}.json" for n in range(max(1, pick_counts[draft] - 15),
+                                                                         pick_counts[draft] + 1)]
+        results = await asyncio.gather(*(storage.read_path_json(path) for path in paths))
+        return all(result is not None for result in results) or not pick_counts[draft]
+
+    mix = [
+        (0.85, "record_pick", record_pick),
+        (0.15, "read_picks", read_picks),
+    ]
+
+    def next_operation() -> Operation:
+        draft = rng.randrange(drafts)
+        roll = rng.random()
+        for weight, name, make in mix:
+            roll -= weight
+            if roll <= 0:
+                return name, lambda: make(draft)
+        return mix[0][1], lambda: mix[0][2](draft)
+
+    return next_operation
+
+async def seed_v4cb(storage: StorageManager, channels: int) -> None:
+    """Give every benchmark channel a realistic state document (a few hundred banned cards)"""
+    documents = {
+        ("bench-server", f"channel-{i}", STATE_FILE): upgrade_state({
+            "banned_cards": sorted(f"card {n}" for n in range(i * 7, i * 7 + 300)),
+            "scores": {f"player {p}": p for p in range(8)},
+        })
+        for i in range(channels)
+    }
+    await storage.write_many_json(documents)
+
+async def run_workload(name: str, storage: StorageManager, args) -> dict:
+    rng = random.Random(args.seed)
+    if name == "v4cb":
+        await seed_v4cb(storage, args.channels)
+        next_operation = v4cb_workload(storage, rng, args.channels)
+    elif name == "draft":
+        next_operation = draft_workload(storage, rng, args.channels)
+    else:
+        raise ValueError(f"Unknown workload: {name}")
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    remaining = args.ops
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            op_name, make = next_operation()
+            start = time.perf_counter()
+            try:
+                ok = await make()
+            except Exception:
+                ok = False
+            latencies.setdefault(op_name, []).append(time.perf_counter() - start)
+            if not ok and ok != {}:
+                errors[op_name] = errors.get(op_name, 0) + 1
+
+    monitor = LoopMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    loop_stats = await monitor.stop()
+
+    all_latencies = sorted(lat for values in latencies.values() for lat in values)
+    return {
+        "ops": len(all_latencies),
+        "elapsed_s": elapsed,
+        "ops_per_s": len(all_latencies) / elapsed,
+        "p50_ms": statistics.median(all_latencies) * 1000,
+        "p99_ms": percentile(all_latencies, 99) * 1000,
+        "errors": sum(errors.values()),
+        **loop_stats,
+        "operations": {
+            op_name: {
+                "count": len(values),
+                "p50_ms": statistics.median(values) * 1000,
+                "p99_ms": percentile(sorted(values), 99) * 1000,
+                "errors": errors.get(op_name, 0),
+            }
+            for op_name, values in sorted(latencies.items())
+        },
+    }
+
+async def run(args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for workload in args.workloads.split(','):
+            storage = StorageManager(make_backend(args, workdir), max_workers=args.workers)
+            try:
+                results[workload.strip()] = await run_workload(workload.strip(), storage, args)
+            finally:
+                storage.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the storage layer under V4CB and draft workloads")
+    parser.add_argument("--workloads", default="v4cb,draft", help="Comma-separated workloads (v4cb, draft)")
+    parser.add_argument("--backend", default="emulator", choices=["emulator", "gcs"],
+                        help="Emulated GCS (default) or a real bucket")
+    parser.add_argument("--inner", default="local", choices=["local", "sqlite", "memory"],
+                        help="Backend the emulator stores objects in")
+    parser.add_argument("--ops", type=int, default=2000, help="Requests per workload")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent simulated users")
+    parser.add_argument("--workers", type=int, default=8, help="Storage worker threads")
+    parser.add_argument("--channels", type=int, default=200, help="Channels (v4cb) or drafts (draft) to spread load over")
+    parser.add_argument("--latency-ms", type=float, default=30, help="Emulated round-trip latency")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="Standard deviation of the emulated latency")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Probability that an emulated request fails")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable runs")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    # Injected errors are expected; don't flood the output with their log lines
+    logging.disable(logging.CRITICAL)
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "workloads": asyncio.run(run(args)),
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Storage backend conformance and performance checks. Runs the same read/write/
+delete/list contract against every backend, then times basic operations.
+
+Usage: python benchmarks/storage_conformance.py [--backends memory,local,sqlite] [--ops 500]
+GCS is only included when requested explicitly (it needs credentials and a bucket).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from storage_backends import (  # noqa: E402
+    BACKENDS, NOT_MODIFIED, GCSBackend, LocalBackend, MemoryBackend, PreconditionFailed, SQLiteBackend, StorageBackend
+)
+
+def make_backend(kind: str, workdir: str) -> StorageBackend:
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "local":
+        return LocalBackend(os.path.join(workdir, "local"))
+    if kind == "sqlite":
+        return SQLiteBackend(os.path.join(workdir, "storage.db"))
+    if kind == "gcs":
+        return GCSBackend(os.getenv('STORAGE_BUCKET', 'mtg-discord-bot-data'))
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+def check_conformance(backend: StorageBackend, prefix: str) -> list:
+    """Return a list of failed expectations (empty if the backend conforms)"""
+    failures = []
+
+    def expect(condition: bool, message: str):
+        if not condition:
+            failures.append(message)
+
+    key = f"{prefix}/1/2/scores.json"
+    expect(backend.read(key) is None, "reading a missing key returns None")
+
+    backend.write(key, b'{"scores": {}}')
+    expect(backend.read(key) == b'{"scores": {}}', "read returns what was written")
+
+    backend.write(key, b'{"scores": {"a": 1}}')
+    expect(backend.read(key) == b'{"scores": {"a": 1}}', "write overwrites existing objects")
+
+    backend.write(f"{prefix}/1/2/banned_list.json", b"{}")
+    backend.write(f"{prefix}/1/3/scores.json", b"{}")
+    backend.write(f"{prefix}x/1/2/scores.json", b"{}")
+    expect(
+        backend.list(f"{prefix}/1/2/") == [f"{prefix}/1/2/banned_list.json", key],
+        "list returns sorted keys under the prefix only"
+    )
+    expect(len(backend.list(f"{prefix}/")) == 3, "list includes nested keys")
+
+    backend.delete(key)
+    expect(backend.read(key) is None, "deleted objects can't be read")
+    backend.delete(key)  # Must not raise
+    expect(key not in backend.list(f"{prefix}/"), "deleted objects aren't listed")
+
+    binary = bytes(range(256))
+    backend.write(f"{prefix}/binary", binary, "application/octet-stream")
+    expect(backend.read(f"{prefix}/binary") == binary, "binary data round-trips")
+
+    # Generations: conditional reads and writes
+    conditional = f"{prefix}/conditional"
+    first = backend.write_object(conditional, b"1", if_generation_match=0)
+    expect(backend.read_object(conditional).generation == first, "read reports the written generation")
+    expect(backend.read_object(conditional, if_generation_not_match=first) is NOT_MODIFIED,
+           "reading an unchanged generation returns NOT_MODIFIED")
+    second = backend.write_object(conditional, b"2", if_generation_match=first)
+    expect(second != first, "each write produces a new generation")
+    try:
+        backend.write_object(conditional, b"3", if_generation_match=first)
+        expect(False, "writing with a stale generation raises PreconditionFailed")
+    except PreconditionFailed:
+        pass
+    try:
+        backend.write_object(conditional, b"3", if_generation_match=0)
+        expect(False, "creating an existing object with generation 0 raises PreconditionFailed")
+    except PreconditionFailed:
+        pass
+    expect(backend.read(conditional) == b"2", "failed conditional writes leave the object unchanged")
+    expect(backend.read_object(f"{prefix}/missing", if_generation_not_match=first) is None,
+           "conditional reads of missing keys return None")
+
+    # Batch operations return a result per key
+    batch = [f"{prefix}/batch/{i}" for i in range(5)]
+    written = backend.write_many([(key, key.encode(), "text/plain") for key in batch])
+    expect(all(isinstance(written[key], int) for key in batch), "write_many returns a generation per key")
+    read = backend.read_many(batch + [f"{prefix}/batch/missing"])
+    expect(all(read[key].data == key.encode() for key in batch), "read_many returns each object")
+    expect(read[f"{prefix}/batch/missing"] is None, "read_many maps missing keys to None")
+    deleted = backend.delete_many(batch + [f"{prefix}/batch/missing"])
+    expect(all(error is None for error in deleted.values()), "delete_many succeeds, including for missing keys")
+    expect(backend.list(f"{prefix}/batch/") == [], "delete_many removes every object")
+
+    for leftover in backend.list(f"{prefix}/") + backend.list(f"{prefix}x/"):
+        backend.delete(leftover)
+    return failures
+
+def measure(backend: StorageBackend, prefix: str, ops: int) -> dict:
+    payload = json.dumps({"cards": [f"card {i}" for i in range(200)]}).encode()
+    timings = {}
+
+    start = time.perf_counter()
+    for i in range(ops):
+        backend.write(f"{prefix}/{i % 50}/{i}/banned_list.json", payload)
+    timings["write_ops_per_s"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(ops):
+        backend.read(f"{prefix}/{i % 50}/{i}/banned_list.json")
+    timings["read_ops_per_s"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    listed = backend.list(f"{prefix}/")
+    timings["list_ms"] = (time.perf_counter() - start) * 1000
+    timings["listed"] = len(listed)
+
+    start = time.perf_counter()
+    for key in listed:
+        backend.delete(key)
+    timings["delete_ops_per_s"] = len(listed) / (time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark storage backends")
+    parser.add_argument("--backends", default="memory,local,sqlite",
+                        help=f"Comma-separated backends to check (available: {', '.join(BACKENDS)})")
+    parser.add_argument("--ops", type=int, default=500, help="Operations per timing run")
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in args.backends.split(','):
+            backend = make_backend(kind.strip(), workdir)
+            prefix = f"conformance-{int(time.time())}"
+            try:
+                failures = check_conformance(backend, prefix)
+                results[kind] = {"conformance_failures": failures, **measure(backend, prefix, args.ops)}
+                failed = failed or bool(failures)
+            finally:
+                backend.close()
+
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
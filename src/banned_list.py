@@ -0,0 +1,241 @@
+import codecs
+import csv
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableSet
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Set
+
+# Discord's limit for an embed field value, and the page size used for the banned list
+PAGE_LIMIT = 1024
+
+def _line(card: str) -> str:
+    return f"• {card}"
+
+class BannedList(MutableSet):
+    """
+    A set of banned card names kept in sorted order and split into display
+    pages of at most PAGE_LIMIT characters. Adding or removing a card only
+    touches the page it lands on, so the rendered text of every other page
+    stays cached and showing any page is constant work.
+    """
+    def __init__(self, cards: Iterable[str] = ()):
+        self._rebuild(set(cards))
+
+    def _rebuild(self, cards: Set[str]) -> None:
+        self._members = cards
+        self._pages: List[List[str]] = []
+        self._sizes: List[int] = []
+        page: List[str] = []
+        size = 0
+        for card in sorted(cards):
+            line_size = len(_line(card)) + (1 if page else 0)
+            if page and size + line_size > PAGE_LIMIT:
+                self._pages.append(page)
+                self._sizes.append(size)
+                page, size, line_size = [], 0, len(_line(card))
+            page.append(card)
+            size += line_size
+        if page:
+            self._pages.append(page)
+            self._sizes.append(size)
+        self._firsts = [page[0] for page in self._pages]
+        self._texts: List[Optional[str]] = [None] * len(self._pages)
+        # Bumped on every change, so callers can cache things derived from the whole list
+        self.revision = getattr(self, "revision", 0) + 1
+
+    def __contains__(self, card) -> bool:
+        return card in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __iter__(self) -> Iterator[str]:
+        """Cards in sorted order"""
+        for page in self._pages:
+            yield from page
+
+    def __repr__(self) -> str:
+        return f"BannedList({len(self)} cards, {len(self._pages)} pages)"
+
+    def _page_for(self, card: str) -> int:
+        return max(0, bisect_right(self._firsts, card) - 1)
+
+    def add(self, card: str) -> None:
+        if card in self._members:
+            return
+        self._members.add(card)
+        self.revision += 1
+        if not self._pages:
+            self._pages, self._sizes, self._firsts, self._texts = [[card]], [len(_line(card))], [card], [None]
+            return
+
+        index = self._page_for(card)
+        page = self._pages[index]
+        insort(page, card)
+        self._sizes[index] += len(_line(card)) + 1
+        self._firsts[index] = page[0]
+        self._texts[index] = None
+        if self._sizes[index] > PAGE_LIMIT and len(page) > 1:
+            self._split(index)
+
+    def _split(self, index: int) -> None:
+        """Split an overfull page in half"""
+        page = self._pages[index]
+        half = len(page) // 2
+        left, right = page[:half], page[half:]
+        self._pages[index:index + 1] = [left, right]
+        self._sizes[index:index + 1] = [self._size(left), self._size(right)]
+        self._firsts[index:index + 1] = [left[0], right[0]]
+        self._texts[index:index + 1] = [None, None]
+
+    @staticmethod
+    def _size(page: List[str]) -> int:
+        return sum(len(_line(card)) for card in page) + len(page) - 1
+
+    def discard(self, card: str) -> None:
+        if card not in self._members:
+            return
+        self._members.remove(card)
+        self.revision += 1
+        index = self._page_for(card)
+        page = self._pages[index]
+        del page[bisect_left(page, card)]
+        if not page:
+            del self._pages[index], self._sizes[index], self._firsts[index], self._texts[index]
+            return
+        self._sizes[index] -= len(_line(card)) + 1
+        self._firsts[index] = page[0]
+        self._texts[index] = None
+        # Fold a page into its neighbour once both fit on one page, so removals don't leave slivers
+        if index + 1 < len(self._pages) and self._sizes[index] + self._sizes[index + 1] + 1 <= PAGE_LIMIT // 2:
+            page.extend(self._pages[index + 1])
+            self._sizes[index] += self._sizes[index + 1] + 1
+            del self._pages[index + 1], self._sizes[index + 1], self._firsts[index + 1], self._texts[index + 1]
+
+    def update(self, cards: Iterable[str]) -> None:
+        """Add many cards; large batches rebuild the pages instead of inserting one by one"""
+        new_cards = set(cards) - self._members
+        if len(new_cards) > max(64, len(self._members) // 4):
+            self._rebuild(self._members | new_cards)
+        else:
+            for card in new_cards:
+                self.add(card)
+
+    def replace(self, cards: Iterable[str]) -> None:
+        """Make the list equal to `cards`, touching only the pages that differ when the change is small"""
+        cards = set(cards)
+        added, removed = cards - self._members, self._members - cards
+        if not added and not removed:
+            # Unchanged (e.g. a state write confirming what's already here): keep every cached page
+            return
+        if len(added) + len(removed) > max(64, len(self._members) // 4):
+            self._rebuild(cards)
+            return
+        for card in removed:
+            self.discard(card)
+        for card in added:
+            self.add(card)
+
+    def clear(self) -> None:
+        self._rebuild(set())
+
+    def copy(self) -> Set[str]:
+        """A plain set snapshot, e.g. for diffing before and after a change"""
+        return set(self._members)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def page_text(self, index: int) -> str:
+        """The rendered text of one page, cached until that page changes"""
+        text = self._texts[index]
+        if text is None:
+            text = "\n".join(_line(card) for card in self._pages[index])
+            self._texts[index] = text
+        return text
+
+    def pages(self) -> List[str]:
+        return [self.page_text(index) for index in range(len(self._pages))]
+
+def summarize_cards(cards: Iterable[str], limit: int = PAGE_LIMIT, more_hint: str = "") -> str:
+    """
+    Render cards one per line for an embed field, truncated to `limit`
+    characters with an "...and N more" line when they don't all fit
+    """
+    cards = sorted(cards)
+    lines: List[str] = []
+    size = 0
+    for shown, card in enumerate(cards):
+        remaining = len(cards) - shown
+        footer = f"...and {remaining} more{more_hint}"
+        if size + len(card) + 1 + (len(footer) + 1 if remaining > 1 else 0) > limit:
+            lines.append(footer)
+            break
+        lines.append(card)
+        size += len(card) + 1
+    return "\n".join(lines)
+
+# Columns that mark a file as a Cube Cobra CSV export (besides "name")
+CUBE_COBRA_COLUMNS = {"cmc", "type", "color", "set", "rarity", "status"}
+# Quantity prefixes in deck-style lists, e.g. "1 Lightning Bolt" or "2x Opt" (at most two
+# digits, so names like "1996 World Champion" survive)
+_COUNT_PREFIX = re.compile(r"^\d{1,2}x?\s+", re.IGNORECASE)
+
+class _CardLineParser:
+    """Turns lines of a card list (plain, deck-style or Cube Cobra CSV) into card names"""
+    def __init__(self):
+        self.name_column: Optional[int] = None
+        self.first_line = True
+        self.record = ""
+
+    def feed(self, line: str) -> List[str]:
+        line = line.rstrip("\r")
+        if self.first_line:
+            if not line.strip():
+                return []
+            self.first_line = False
+            header = [column.strip().lower() for column in next(csv.reader([line]))]
+            if "name" in header and CUBE_COBRA_COLUMNS & set(header):
+                self.name_column = header.index("name")
+                return []
+
+        if self.name_column is None:
+            line = line.strip()
+            if not line or line.startswith(("#", "//")):
+                return []
+            return [_COUNT_PREFIX.sub("", line)]
+
+        # CSV: quoted fields (e.g. notes) may span lines, so wait until the quotes balance
+        self.record = f"{self.record}\n{line}" if self.record else line
+        if self.record.count('"') % 2:
+            return []
+        record, self.record = self.record, ""
+        fields = next(csv.reader([record]), [])
+        if len(fields) > self.name_column and fields[self.name_column].strip():
+            return [fields[self.name_column].strip()]
+        return []
+
+async def parse_card_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Stream card names out of a card list file as its bytes arrive: one card
+    per line (optionally with a quantity, and # or // comments), or a Cube
+    Cobra CSV export, detected from its header row
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    parser = _CardLineParser()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            for card in parser.feed(line):
+                yield card
+    buffer += decoder.decode(b"", final=True)
+    for line in buffer.split("\n"):
+        for card in parser.feed(line):
+            yield card
+
+def export_text(cards: Iterable[str]) -> str:
+    """One card per line, in the list's (sorted) order; the import format"""
+    return "".join(f"{card}\n" for card in cards)
@@ -3,74 +3,156 @@ from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
 import os
-from typing import Dict, List
+from typing import Coroutine, Dict, List, Optional, Set
 from cube_parser import CubeCobraParser
 import argparse
-from draft_bots import DraftBot
+from draft_bots import BOT_TYPES, DraftBot, choose_pick
 from draft import RochesterDraft
 import asyncio
+import functools
+from collections import Counter
+import io
+import itertools
 import logging
 import signal
 from v4cb import V4CBGame, BannedListPaginator
-from storage_manager import StorageManager
+from banned_list import export_text, parse_card_lines, summarize_cards
+from leaderboard import Leaderboard
+from v4cb_registry import V4CBGameRegistry
+from storage_manager import shared_storage
+from card_db import CardDatabase
+from command_sync import SYNC_STATE_FILE, fingerprint_commands
 
-# Add argument parsing
-parser = argparse.ArgumentParser(description='Run the MTG Draft Discord Bot')
-parser.add_argument('--test', action='store_true', help='Run in test mode with specific guild')
-args = parser.parse_args()
-
-# Intents are required to manage certain events
-intents = discord.Intents.default()
-intents.messages = True
-intents.message_content = True
-intents.guilds = True
-
-# Load environment variables from .env file
-load_dotenv()
+def v4cb_mutation(handler):
+    """
+    Serialize a mutating V4CB command with the channel's other mutating commands.
+    Read-only commands don't use this, so they never wait on a busy channel.
+    """
+    @functools.wraps(handler)
+    async def wrapper(interaction: discord.Interaction, *args, **kwargs):
+        while True:
+            game = await interaction.client.get_v4cb_game(interaction)
+            async with game.lock:
+                # The game was reset while this command waited; start over with the channel's new game
+                if game.closed:
+                    continue
+                return await handler(interaction, *args, **kwargs)
+    return wrapper
 
 # Move this before any commands
 async def pick_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
     """Provide autocomplete suggestions for card names in the current pack"""
-    guild_id = interaction.guild_id
+    draft = interaction.client.draft_sessions.get(interaction.guild_id)
     
-    if guild_id not in bot.draft_sessions:
+    # Check if it's the player's turn using the new method
+    if draft is None or interaction.user != draft.get_current_player():
         return []
     
-    draft = bot.draft_sessions[guild_id]
-    current_pack = draft.get_current_pack()
+    # The index is rebuilt only after a pick, and caches recent queries
+    pack_index = draft.get_pack_index()
+    if pack_index is None:
+        return []
+    return pack_index.search(current)
+
+async def card_list_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Autocomplete the last card of a comma-separated card list from the card database"""
+    *previous, last = current.split(',')
+    prefix = ", ".join(card.strip() for card in previous)
+    
+    # No suggestions until the card database has loaded in the background
+    card_db = interaction.client.card_db
+    if card_db is None:
+        return []
     
-    # Check if it's the player's turn using the new method
-    if not current_pack or interaction.user != draft.get_current_player():
+    choices = []
+    for name in card_db.complete(last):
+        value = f"{prefix}, {name}" if prefix else name
+        # Discord caps choice names and values at 100 characters
+        if len(value) <= 100:
+            choices.append(app_commands.Choice(name=value, value=value))
+    return choices
+
+async def banned_card_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Autocomplete a card from this channel's banned list"""
+    game = interaction.client.v4cb_games.peek(interaction.channel_id)
+    if game is None:
         return []
     
-    # Filter cards that match the current input (case-insensitive)
-    matches = []
-    current_lower = current.lower()
-    for card in current_pack:
-        if current_lower in card.name.lower():
-            matches.append(app_commands.Choice(
-                name=f"{card.name} ({card.color_category.upper()})",
-                value=card.name
-            ))
-    
-    # Discord has a limit of 25 choices
-    return matches[:25]
+    current_lower = current.strip().lower()
+    # The banned list iterates in sorted order, so stop at the first 25 matches
+    matches = itertools.islice((card for card in game.banned_cards if current_lower in card), 25)
+    return [app_commands.Choice(name=card, value=card) for card in matches]
+
+def loaded_leaderboard(interaction: discord.Interaction, server_wide: bool) -> Optional[Leaderboard]:
+    """The channel's or server's leaderboard if it's already in memory, without loading anything"""
+    if server_wide:
+        board = interaction.client.v4cb_games.leaderboards.get(interaction.guild_id)
+        return board.board if board else None
+    game = interaction.client.v4cb_games.peek(interaction.channel_id)
+    return game.leaderboard if game else None
+
+async def leaderboard_player_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Autocomplete a player from the channel's (or server's) leaderboard, best ranked first"""
+    board = loaded_leaderboard(interaction, bool(getattr(interaction.namespace, "server_wide", False)))
+    if board is None:
+        return []
+    
+    current_lower = current.strip().lower()
+    matches = itertools.islice((player for player, _ in board if current_lower in player.lower()), 25)
+    return [app_commands.Choice(name=player[:100], value=player[:100]) for player in matches]
+
+async def fetch_leaderboard(interaction: discord.Interaction, server_wide: bool) -> Leaderboard:
+    """The channel's or server's leaderboard, loading it on first use"""
+    if server_wide:
+        board = await interaction.client.v4cb_games.server_leaderboard(interaction.guild_id)
+        # Pick up other bot instances' channels; revalidating the cached document is cheap
+        await board.load()
+        return board.board
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
+    return game.leaderboard if game else Leaderboard()
+
+async def bot_types_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Autocomplete the last strategy in a comma-separated list of bot strategies"""
+    prefix, _, last = current.rpartition(",")
+    prefix = prefix.strip()
+    last = last.strip().lower()
+    choices = []
+    for bot_type, cls in BOT_TYPES.items():
+        if bot_type.startswith(last):
+            value = f"{prefix}, {bot_type}" if prefix else bot_type
+            if len(value) <= 100:
+                choices.append(app_commands.Choice(name=f"{value} - {cls.description}"[:100], value=value))
+    return choices[:25]
+
+async def run_bot_turns(draft: RochesterDraft, channel: discord.abc.Messageable) -> None:
+    """Make bot picks until it's a human's turn or the draft is over"""
+    while draft.is_bot_turn() and not draft.is_draft_complete():
+        current_bot = draft.get_current_player()
+        current_pack = draft.get_current_pack()
+        if not current_pack:
+            break
+        # Slow bots think in a worker thread, so other servers' commands aren't held up
+        bot_pick = await choose_pick(current_bot, current_pack)
+        if not bot_pick or not await draft.handle_pick(current_bot, bot_pick.name):
+            break
+        await channel.send(f"Bot {current_bot.name} picked {bot_pick.name}")
+        await draft.update_pack_display()
 
 # Define all commands before bot initialization
 @app_commands.command(name="signup", description="Sign up for the current draft")
 async def signup(interaction: discord.Interaction):
     guild_id = interaction.guild_id
     
-    if guild_id not in bot.active_drafts:
-        bot.active_drafts[guild_id] = []
+    if guild_id not in interaction.client.active_drafts:
+        interaction.client.active_drafts[guild_id] = []
     
-    if interaction.user in bot.active_drafts[guild_id]:
+    if interaction.user in interaction.client.active_drafts[guild_id]:
         await interaction.response.send_message("You're already signed up for the draft!", ephemeral=True)
         return
     
-    bot.active_drafts[guild_id].append(interaction.user)
+    interaction.client.active_drafts[guild_id].append(interaction.user)
     participant_list = "\n".join([f"{idx + 1}. {player.display_name}" 
-                                for idx, player in enumerate(bot.active_drafts[guild_id])])
+                                for idx, player in enumerate(interaction.client.active_drafts[guild_id])])
     
     embed = discord.Embed(
         title="Draft Signup",
@@ -86,7 +168,7 @@ async def clear_signup(interaction: discord.Interaction):
         return
     
     guild_id = interaction.guild_id
-    bot.active_drafts[guild_id] = []
+    interaction.client.active_drafts[guild_id] = []
     await interaction.response.send_message("Draft signups have been cleared!", ephemeral=True)
 
 @app_commands.command(name="pick", description="Pick a card from your current pack")
@@ -95,11 +177,11 @@ async def clear_signup(interaction: discord.Interaction):
 async def pick(interaction: discord.Interaction, card_name: str):
     guild_id = interaction.guild_id
     
-    if guild_id not in bot.draft_sessions:
+    if guild_id not in interaction.client.draft_sessions:
         await interaction.response.send_message("There's no active draft in this server!", ephemeral=True)
         return
     
-    draft = bot.draft_sessions[guild_id]
+    draft = interaction.client.draft_sessions[guild_id]
     
     # Check if it's the player's turn
     if interaction.user != draft.get_current_player():
@@ -124,21 +206,12 @@ async def pick(interaction: discord.Interaction, card_name: str):
     # Check if draft is complete before handling bot turns
     if draft.is_draft_complete():
         # Clear draft session
-        bot.draft_sessions.pop(guild_id, None)
-        bot.active_drafts[guild_id] = []
+        interaction.client.draft_sessions.pop(guild_id, None)
+        interaction.client.active_drafts[guild_id] = []
         return
 
     # Handle bot turns
-    if draft.is_bot_turn():
-        while draft.is_bot_turn() and not draft.is_draft_complete():
-            current_bot = draft.get_current_player()
-            current_pack = draft.get_current_pack()
-            if current_pack:
-                bot_pick = current_bot.make_pick(current_pack)
-                if bot_pick:
-                    await draft.handle_pick(current_bot, bot_pick.name)
-                    await interaction.channel.send(f"Bot {current_bot.name} picked {bot_pick.name}")
-                    await draft.update_pack_display()
+    await run_bot_turns(draft, interaction.channel)
     
     # Only notify next player if draft isn't complete
     if not draft.is_draft_complete():
@@ -150,11 +223,11 @@ async def pick(interaction: discord.Interaction, card_name: str):
 async def show_pack(interaction: discord.Interaction):
     guild_id = interaction.guild_id
     
-    if guild_id not in bot.draft_sessions:
+    if guild_id not in interaction.client.draft_sessions:
         await interaction.response.send_message("There's no active draft in this server!", ephemeral=True)
         return
     
-    draft = bot.draft_sessions[guild_id]
+    draft = interaction.client.draft_sessions[guild_id]
     
     # Check if it's the player's turn using get_current_player()
     if interaction.user != draft.get_current_player():
@@ -185,14 +258,26 @@ async def show_pack(interaction: discord.Interaction):
     cube_url="Either a Cube Cobra URL or cube ID",
     cards_per_pack="Number of cards per pack (default: 15)",
     num_packs="Number of packs per player (default: 3)",
-    total_players="Total number of players in draft (default: 8)"
+    total_players="Total number of players in draft (default: 8)",
+    bots="Bot strategy per bot seat, comma-separated; the last one fills the rest (default: random)"
 )
+@app_commands.autocomplete(bots=bot_types_autocomplete)
 async def start_draft(interaction: discord.Interaction, cube_url: str = None, 
-                    cards_per_pack: int = 15, num_packs: int = 3, total_players: int = 8):
+                    cards_per_pack: int = 15, num_packs: int = 3, total_players: int = 8,
+                    bots: str = "random"):
     guild_id = interaction.guild_id
     
+    bot_types = [bot_type.strip().lower() for bot_type in bots.split(",") if bot_type.strip()] or ["random"]
+    unknown_types = [bot_type for bot_type in bot_types if bot_type not in BOT_TYPES]
+    if unknown_types:
+        await interaction.response.send_message(
+            f"Unknown bot strategy: {', '.join(unknown_types)}. Choose from: {', '.join(BOT_TYPES)}",
+            ephemeral=True
+        )
+        return
+    
     # Use default test cube ID if in test mode and no cube_url provided
-    if bot.test_mode and not cube_url:
+    if interaction.client.test_mode and not cube_url:
         cube_url = "321d4c19-8c8a-47a1-89a5-f276617c83f1"
     elif not cube_url:
         await interaction.response.send_message(
@@ -202,17 +287,17 @@ async def start_draft(interaction: discord.Interaction, cube_url: str = None,
         return
     
     # Check if there's an active draft
-    if guild_id in bot.draft_sessions:
+    if guild_id in interaction.client.draft_sessions:
         await interaction.response.send_message("There's already an active draft in this server!", ephemeral=True)
         return
     
     # Check if we have any signups
-    if guild_id not in bot.active_drafts or not bot.active_drafts[guild_id]:
+    if guild_id not in interaction.client.active_drafts or not interaction.client.active_drafts[guild_id]:
         await interaction.response.send_message("No players have signed up for the draft yet! Use /signup first.", ephemeral=True)
         return
     
     # Calculate number of bots needed
-    num_human_players = len(bot.active_drafts[guild_id])
+    num_human_players = len(interaction.client.active_drafts[guild_id])
     if num_human_players > total_players:
         await interaction.response.send_message(
             f"Too many players signed up! Maximum is {total_players}, but {num_human_players} are signed up.", 
@@ -226,7 +311,7 @@ async def start_draft(interaction: discord.Interaction, cube_url: str = None,
     
     try:
         # Validate and fetch cube data
-        if not await bot.cube_parser.validate_url(cube_url):
+        if not await interaction.client.cube_parser.validate_url(cube_url):
             await interaction.followup.send(
                 "Invalid cube URL or ID! Please provide either:\n"
                 "• A Cube Cobra URL (e.g., https://cubecobra.com/cube/list/example)\n"
@@ -235,7 +320,7 @@ async def start_draft(interaction: discord.Interaction, cube_url: str = None,
             )
             return
         
-        cards = await bot.cube_parser.fetch_cube_data(cube_url)
+        cards = await interaction.client.cube_parser.fetch_cube_data(cube_url)
         if not cards:
             await interaction.followup.send(
                 "Failed to fetch cube list. Please check that:\n"
@@ -248,16 +333,19 @@ async def start_draft(interaction: discord.Interaction, cube_url: str = None,
         
         # Create draft session
         draft = RochesterDraft(cards, num_human_players, cards_per_pack, num_packs, num_bots)
-        draft.add_bots(num_bots)
         
         try:
+            draft.add_bots(num_bots, bot_types)
             draft.prepare_packs()
-            draft.initialize_player_pools(bot.active_drafts[guild_id])
+            draft.initialize_player_pools(interaction.client.active_drafts[guild_id])
         except ValueError as e:
             await interaction.followup.send(str(e), ephemeral=True)
             return
         
-        bot.draft_sessions[guild_id] = draft
+        interaction.client.draft_sessions[guild_id] = draft
+        
+        strategies = Counter(bot.bot_type for bot in draft.bots)
+        bot_summary = f" ({', '.join(f'{count} {bot_type}' for bot_type, count in strategies.items())})" if strategies else ""
         
         # Update embed to show draft configuration
         embed = discord.Embed(
@@ -266,7 +354,7 @@ async def start_draft(interaction: discord.Interaction, cube_url: str = None,
                        f"• {len(cards)} cards in cube\n"
                        f"• {total_players} total seats\n"
                        f"• {num_human_players} human players\n"
-                       f"• {num_bots} bot players\n"
+                       f"• {num_bots} bot players{bot_summary}\n"
                        f"• {cards_per_pack} cards per pack\n"
                        f"• {num_packs} packs per player\n\n"
                        f"Color Distribution:\n"
@@ -285,19 +373,12 @@ async def start_draft(interaction: discord.Interaction, cube_url: str = None,
         
         # If first player is a bot, start bot picking
         if draft.is_bot_turn():
-            while draft.is_bot_turn():
-                current_bot = draft.get_current_player()
-                current_pack = draft.get_current_pack()
-                if current_pack:
-                    picked_card = current_bot.make_pick(current_pack)
-                    if picked_card:
-                        await draft.handle_pick(current_bot, picked_card.name)
-                        await interaction.channel.send(f"Bot {current_bot.name} picked {picked_card.name}")
-                        await draft.update_pack_display()
+            await run_bot_turns(draft, interaction.channel)
             
             # Notify first human player
-            next_player = draft.get_current_player()
-            await interaction.channel.send(f"{next_player.mention}, it's your turn to pick!")
+            if not draft.is_draft_complete():
+                next_player = draft.get_current_player()
+                await interaction.channel.send(f"{next_player.mention}, it's your turn to pick!")
         
         await draft.set_draft_channel(interaction.channel)
         await draft.update_pack_display()
@@ -314,11 +395,11 @@ async def start_draft(interaction: discord.Interaction, cube_url: str = None,
 async def view_pool(interaction: discord.Interaction, player: discord.Member = None):
     guild_id = interaction.guild_id
     
-    if guild_id not in bot.draft_sessions:
+    if guild_id not in interaction.client.draft_sessions:
         await interaction.response.send_message("There's no active draft in this server!", ephemeral=True)
         return
     
-    draft = bot.draft_sessions[guild_id]
+    draft = interaction.client.draft_sessions[guild_id]
     
     # If no player specified, show the requester's pool
     target_player = player or interaction.user
@@ -384,7 +465,7 @@ async def quit_draft(interaction: discord.Interaction):
     guild_id = interaction.guild_id
     
     # Check if there's an active draft
-    if guild_id not in bot.draft_sessions:
+    if guild_id not in interaction.client.draft_sessions:
         await interaction.response.send_message(
             "There's no active draft to quit!", 
             ephemeral=True
@@ -393,12 +474,12 @@ async def quit_draft(interaction: discord.Interaction):
     
     try:
         # Clear the pack display
-        draft = bot.draft_sessions[guild_id]
+        draft = interaction.client.draft_sessions[guild_id]
         await draft.pack_display.clear_display(guild_id)
         
         # Clear all states
-        bot.active_drafts[guild_id] = []
-        bot.draft_sessions.pop(guild_id, None)
+        interaction.client.active_drafts[guild_id] = []
+        interaction.client.draft_sessions.pop(guild_id, None)
         
         await interaction.response.send_message(
             "Draft has been terminated. All states have been reset.\n"
@@ -415,27 +496,25 @@ async def quit_draft(interaction: discord.Interaction):
 
 @app_commands.command(name="v4cb_start", description="Start a new V4CB game with a banned list")
 @app_commands.describe(banned_list="Comma-separated list of banned cards")
+@app_commands.autocomplete(banned_list=card_list_autocomplete)
+@v4cb_mutation
 async def v4cb_start(interaction: discord.Interaction, banned_list: str):
     """Start a new V4CB game"""
-    channel_id = interaction.channel_id
-    server_id = interaction.guild_id  # Get the server/guild ID
+    # Loads the channel's game from storage, or creates an inactive one
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id in bot.v4cb_games and bot.v4cb_games[channel_id].is_active:
+    if game.is_active:
         await interaction.response.send_message(
             "There's already an active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    # Create new game or get existing game instance
-    if channel_id not in bot.v4cb_games:
-        bot.v4cb_games[channel_id] = V4CBGame(channel_id, server_id)  # Pass both IDs
-    
     # Parse banned list
     banned_cards = [card.strip() for card in banned_list.split(',')]
     
     # Start the game
-    await bot.v4cb_games[channel_id].start_game(banned_cards)  # Note: start_game is now async
+    await game.start_game(banned_cards)  # Note: start_game is now async
     
     await interaction.response.send_message(
         f"V4CB game started! Banned cards:\n{', '.join(banned_cards)}\n\n"
@@ -444,11 +523,13 @@ async def v4cb_start(interaction: discord.Interaction, banned_list: str):
 
 @app_commands.command(name="v4cb_submit", description="Submit your cards for V4CB")
 @app_commands.describe(cards="Comma-separated list of exactly 4 cards")
+@app_commands.autocomplete(cards=card_list_autocomplete)
+@v4cb_mutation
 async def v4cb_submit(interaction: discord.Interaction, cards: str):
     """Submit cards for V4CB"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
@@ -459,15 +540,14 @@ async def v4cb_submit(interaction: discord.Interaction, cards: str):
     card_list = [card.strip() for card in cards.split(',')]
     
     # Submit cards
-    success, error = bot.v4cb_games[channel_id].submit_cards(interaction.user, card_list)
+    success, error = game.submit_cards(interaction.user, card_list)
     
     if not success:
         await interaction.response.send_message(error, ephemeral=True)
         return
     
     # Create status message
-    game = bot.v4cb_games[channel_id]
-    submitted_players = [player.display_name for player in game.submissions.keys()]
+    submitted_players = [submission.display_name for submission in game.submissions.values()]
     
     embed = discord.Embed(
         title="Cards Submitted Successfully!",
@@ -497,11 +577,12 @@ async def v4cb_submit(interaction: discord.Interaction, cards: str):
     await interaction.channel.send(embed=public_embed)
 
 @app_commands.command(name="v4cb_reveal", description="Reveal all submitted cards and start new round")
+@v4cb_mutation
 async def v4cb_reveal(interaction: discord.Interaction):
     """Reveal all submitted cards and reset for next round"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
@@ -509,7 +590,7 @@ async def v4cb_reveal(interaction: discord.Interaction):
         return
     
     # Get submissions and reset for next round
-    submissions = bot.v4cb_games[channel_id].reveal()
+    submissions = game.reveal()
     
     if not submissions:
         await interaction.response.send_message("No submissions to reveal!")
@@ -522,10 +603,10 @@ async def v4cb_reveal(interaction: discord.Interaction):
         color=discord.Color.gold()
     )
     
-    for player, cards in submissions.items():
+    for submission in submissions.values():
         embed.add_field(
-            name=player.display_name,
-            value=", ".join(cards),
+            name=submission.display_name,
+            value=", ".join(submission.cards),
             inline=False
         )
     
@@ -539,11 +620,13 @@ async def v4cb_reveal(interaction: discord.Interaction):
 
 @app_commands.command(name="v4cb_update_banned", description="Add cards to the banned list")
 @app_commands.describe(banned_list="Comma-separated list of cards to ban")
+@app_commands.autocomplete(banned_list=card_list_autocomplete)
+@v4cb_mutation
 async def v4cb_update_banned(interaction: discord.Interaction, banned_list: str):
     """Add cards to the banned list"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
@@ -552,7 +635,6 @@ async def v4cb_update_banned(interaction: discord.Interaction, banned_list: str)
     
     # Parse and update banned list
     new_banned_cards = [card.strip() for card in banned_list.split(',')]
-    game = bot.v4cb_games[channel_id]
     
     # Store current banned list size
     old_size = len(game.banned_cards)
@@ -569,6 +651,15 @@ async def v4cb_update_banned(interaction: discord.Interaction, banned_list: str)
         color=discord.Color.blue()
     )
     
+    # Flag names the card database doesn't recognize, since they won't catch any submissions
+    unknown_cards = game.unknown_cards(new_banned_cards)
+    if unknown_cards:
+        embed.add_field(
+            name="Unrecognized Cards",
+            value="\n".join(unknown_cards),
+            inline=False
+        )
+    
     embed.add_field(
         name="View Banned List",
         value="Use `/v4cb_banned` to see the complete list of banned cards.",
@@ -578,33 +669,33 @@ async def v4cb_update_banned(interaction: discord.Interaction, banned_list: str)
     await interaction.response.send_message(embed=embed)
 
 @app_commands.command(name="v4cb_end", description="End the current V4CB game")
+@v4cb_mutation
 async def v4cb_end(interaction: discord.Interaction):
     """End the current V4CB game"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    await bot.v4cb_games[channel_id].end_game()
+    await game.end_game()
     await interaction.response.send_message("V4CB game ended!")
 
 @app_commands.command(name="v4cb_status", description="Show the current game status")
 async def v4cb_status(interaction: discord.Interaction):
     """Show the current game status, including submissions and banned list"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if game is None or not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
     
     # Create status message
     embed = discord.Embed(
@@ -613,7 +704,7 @@ async def v4cb_status(interaction: discord.Interaction):
     )
     
     # Add submitted players field
-    submitted_players = [player.display_name for player in game.submissions.keys()]
+    submitted_players = [submission.display_name for submission in game.submissions.values()]
     embed.add_field(
         name="Submitted Players",
         value="\n".join(submitted_players) if submitted_players else "No submissions yet",
@@ -631,11 +722,13 @@ async def v4cb_status(interaction: discord.Interaction):
 
 @app_commands.command(name="v4cb_set_banned", description="Overwrite the current banned list with a new one")
 @app_commands.describe(banned_list="Comma-separated list of cards for the new banned list")
+@app_commands.autocomplete(banned_list=card_list_autocomplete)
+@v4cb_mutation
 async def v4cb_set_banned(interaction: discord.Interaction, banned_list: str):
     """Overwrite the current banned list"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
@@ -644,13 +737,13 @@ async def v4cb_set_banned(interaction: discord.Interaction, banned_list: str):
     
     # Parse and set new banned list
     new_banned_list = [card.strip() for card in banned_list.split(',')]
-    game = bot.v4cb_games[channel_id]
     
     # Store old list for comparison
-    old_banned_list = set(game.banned_cards)
+    old_banned_list = game.banned_cards.copy()
     
     # Set the new banned list
     await game.set_banned_list(new_banned_list)
+    new_banned_set = game.banned_cards.copy()
     
     # Create informative embed
     embed = discord.Embed(
@@ -660,27 +753,27 @@ async def v4cb_set_banned(interaction: discord.Interaction, banned_list: str):
     )
     
     # Show removed cards if any
-    removed_cards = old_banned_list - game.banned_cards
+    removed_cards = old_banned_list - new_banned_set
     if removed_cards:
         embed.add_field(
             name="Removed Cards",
-            value="\n".join(sorted(removed_cards)),
+            value=summarize_cards(removed_cards),
             inline=False
         )
     
     # Show added cards if any
-    added_cards = game.banned_cards - old_banned_list
+    added_cards = new_banned_set - old_banned_list
     if added_cards:
         embed.add_field(
             name="Added Cards",
-            value="\n".join(sorted(added_cards)),
+            value=summarize_cards(added_cards),
             inline=False
         )
     
     # Show current complete list
     embed.add_field(
         name="Current Banned List",
-        value="\n".join(sorted(game.banned_cards)) if game.banned_cards else "No banned cards",
+        value=summarize_cards(game.banned_cards, more_hint=" (see /v4cb_banned)") if game.banned_cards else "No banned cards",
         inline=False
     )
     
@@ -689,17 +782,16 @@ async def v4cb_set_banned(interaction: discord.Interaction, banned_list: str):
 @app_commands.command(name="v4cb_see_my_deck", description="View your currently submitted deck for this round")
 async def v4cb_see_my_deck(interaction: discord.Interaction):
     """Show the requesting user their currently submitted deck"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if game is None or not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
-    user_submission = game.submissions.get(interaction.user)
+    user_submission = game.submissions.get(interaction.user.id)
     
     if not user_submission:
         await interaction.response.send_message(
@@ -717,13 +809,14 @@ async def v4cb_see_my_deck(interaction: discord.Interaction):
     # Add cards as a formatted list
     embed.add_field(
         name="Your Cards",
-        value="\n".join(f"• {card}" for card in user_submission),
+        value="\n".join(f"• {card}" for card in user_submission.cards),
         inline=False
     )
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 @app_commands.command(name="v4cb_clear_banned", description="Remove all cards from the banned list")
+@v4cb_mutation
 async def v4cb_clear_banned(interaction: discord.Interaction):
     """Clear all cards from the banned list"""
     # Check for admin permissions
@@ -734,16 +827,15 @@ async def v4cb_clear_banned(interaction: discord.Interaction):
         )
         return
 
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
     
     # Store current banned list for the message
     old_banned_list = game.banned_cards.copy()
@@ -760,14 +852,103 @@ async def v4cb_clear_banned(interaction: discord.Interaction):
     if old_banned_list:
         embed.add_field(
             name="Previously Banned Cards",
-            value="\n".join(sorted(old_banned_list)),
+            value=summarize_cards(old_banned_list),
             inline=False
         )
     
     await interaction.response.send_message(embed=embed)
 
+@app_commands.command(name="v4cb_reset", description="Delete this channel's V4CB game, banned list and scores (Admin only)")
+@v4cb_mutation
+async def v4cb_reset(interaction: discord.Interaction):
+    """Delete everything stored for this channel's V4CB game"""
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message(
+            "You need administrator permissions to reset the game!",
+            ephemeral=True
+        )
+        return
+
+    await interaction.response.defer()
+    game = await interaction.client.get_v4cb_game(interaction)
+    success = await game.delete_state()
+    interaction.client.v4cb_games.remove(interaction.channel_id)
+
+    if success:
+        await interaction.followup.send("V4CB game reset. The banned list and scores for this channel have been deleted.")
+    else:
+        await interaction.followup.send(
+            "Some of this channel's stored game data couldn't be deleted. Please try again.",
+            ephemeral=True
+        )
+
+@app_commands.command(name="v4cb_stats", description="Show card statistics from this channel's past rounds")
+@app_commands.describe(card="Show statistics for one card instead")
+@app_commands.autocomplete(card=card_list_autocomplete)
+async def v4cb_stats(interaction: discord.Interaction, card: Optional[str] = None):
+    """Show most played cards, best win rates and most played banned cards"""
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
+    # Answered from counters kept up to date as rounds are recorded
+    stats = await game.card_stats() if game else None
+    
+    if not stats or not stats.through:
+        await interaction.response.send_message("No rounds have been completed in this channel yet!", ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title="V4CB Card Statistics",
+        description=f"From {stats.through} round(s)",
+        color=discord.Color.blue()
+    )
+    
+    if card:
+        card = game.normalize_card(card)
+        wins, played = stats.win_rate(card)
+        embed.title = f"V4CB Card Statistics: {card}"
+        if not played:
+            embed.add_field(name="Played", value="Never submitted in this channel", inline=False)
+        else:
+            embed.add_field(name="Played", value=f"{played} round(s)", inline=True)
+            embed.add_field(name="Won", value=f"{wins} ({wins / played:.0%})", inline=True)
+        if card in game.banned_cards:
+            embed.add_field(name="Status", value="Banned", inline=True)
+        await interaction.response.send_message(embed=embed)
+        return
+    
+    most_played = [f"{name}: {played}" for name, played in stats.most_played(10)]
+    embed.add_field(name="Most Played", value="\n".join(most_played) or "None", inline=False)
+    win_rates = [f"{name}: {wins}/{played} ({wins / played:.0%})" for name, wins, played in stats.best_win_rates(10)]
+    embed.add_field(name="Best Win Rates (3+ rounds)", value="\n".join(win_rates) or "Not enough rounds yet", inline=False)
+    banned = [f"{name}: {played}" for name, played in stats.most_played_banned(game.banned_cards, 10)]
+    embed.add_field(name="Most Played Before Being Banned", value="\n".join(banned) or "None", inline=False)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="v4cb_rebuild_stats", description="Recompute card statistics from the round history (Admin only)")
+async def v4cb_rebuild_stats(interaction: discord.Interaction):
+    """Recompute this channel's card statistics from scratch"""
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message(
+            "You need administrator permissions to rebuild statistics!",
+            ephemeral=True
+        )
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
+    if game is None:
+        await interaction.followup.send("There's no V4CB game in this channel!", ephemeral=True)
+        return
+    stats = await game.rebuild_stats()
+    await interaction.followup.send(
+        f"Card statistics rebuilt from {stats.through} round(s) covering {len(stats.played)} card(s).",
+        ephemeral=True
+    )
+
 @app_commands.command(name="v4cb_remove_banned_card", description="Remove a single card from the banned list")
 @app_commands.describe(card="The card to remove from the banned list")
+@app_commands.autocomplete(card=banned_card_autocomplete)
+@v4cb_mutation
 async def v4cb_remove_banned_card(interaction: discord.Interaction, card: str):
     """Remove a single card from the banned list"""
     # Check for admin permissions
@@ -778,16 +959,15 @@ async def v4cb_remove_banned_card(interaction: discord.Interaction, card: str):
         )
         return
 
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
     success, error = await game.remove_banned_card(card)
     
     if not success:
@@ -806,7 +986,7 @@ async def v4cb_remove_banned_card(interaction: discord.Interaction, card: str):
     # Show current banned list
     embed.add_field(
         name="Current Banned List",
-        value="\n".join(sorted(game.banned_cards)) if game.banned_cards else "No banned cards",
+        value=summarize_cards(game.banned_cards, more_hint=" (see /v4cb_banned)") if game.banned_cards else "No banned cards",
         inline=False
     )
     
@@ -814,18 +994,18 @@ async def v4cb_remove_banned_card(interaction: discord.Interaction, card: str):
 
 @app_commands.command(name="v4cb_submit_winner", description="Submit winner(s) for the current round")
 @app_commands.describe(winners="Comma-separated list of winning players")
+@v4cb_mutation
 async def v4cb_submit_winner(interaction: discord.Interaction, winners: str):
     """Submit winner(s) for the current round and update scores"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
     winner_names = [name.strip() for name in winners.split(',')]
     
     success, error = await game.submit_winner(winner_names)
@@ -859,16 +1039,15 @@ async def v4cb_submit_winner(interaction: discord.Interaction, winners: str):
 @app_commands.command(name="v4cb_score", description="Show current game scores")
 async def v4cb_score(interaction: discord.Interaction):
     """Display current game scores"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if game is None or not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
     scores = game.get_scores()
     
     if not scores:
@@ -883,9 +1062,8 @@ async def v4cb_score(interaction: discord.Interaction):
         color=discord.Color.blue()
     )
     
-    # Sort by score (descending) then name (ascending)
-    standings = "\n".join(f"• {player}: {score}" for player, score in 
-                         sorted(scores.items(), key=lambda x: (-x[1], x[0])))
+    # The leaderboard is kept in rank order: score (descending) then name (ascending)
+    standings = "\n".join(f"• {player}: {score}" for player, score in game.leaderboard)
     embed.add_field(
         name="Current Standings",
         value=standings,
@@ -894,8 +1072,60 @@ async def v4cb_score(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed)
 
+@app_commands.command(name="v4cb_leaderboard", description="Show the top players in this channel or across the server")
+@app_commands.describe(
+    server_wide="Total scores across every V4CB channel in this server",
+    top="Number of players to show"
+)
+async def v4cb_leaderboard(interaction: discord.Interaction, server_wide: bool = False,
+                           top: app_commands.Range[int, 1, 25] = 10):
+    """Show the top of the channel or server leaderboard"""
+    board = await fetch_leaderboard(interaction, server_wide)
+    
+    if not board:
+        await interaction.response.send_message("No scores recorded yet!", ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title="V4CB Server Leaderboard" if server_wide else "V4CB Channel Leaderboard",
+        description=f"{len(board)} player(s) with points",
+        color=discord.Color.blue()
+    )
+    # Tied players share a rank
+    lines = [f"{board.rank(player)}. {player}: {score}" for player, score in board.top(top)]
+    embed.add_field(name=f"Top {len(lines)}", value="\n".join(lines), inline=False)
+    
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="v4cb_rank", description="Show a player's rank in this channel or across the server")
+@app_commands.describe(
+    player="Player to look up (defaults to you)",
+    server_wide="Rank by total scores across every V4CB channel in this server"
+)
+@app_commands.autocomplete(player=leaderboard_player_autocomplete)
+async def v4cb_rank(interaction: discord.Interaction, player: Optional[str] = None, server_wide: bool = False):
+    """Show one player's rank and score"""
+    board = await fetch_leaderboard(interaction, server_wide)
+    name = board.find(player or interaction.user.display_name)
+    
+    if name is None:
+        await interaction.response.send_message(
+            f"{player or 'You'} {'has' if player else 'have'} no points yet!",
+            ephemeral=True
+        )
+        return
+    
+    rank = board.rank(name)
+    score = board.scores[name]
+    message = f"**{name}** is ranked #{rank} of {len(board)} with {score} point(s)"
+    if rank > 1:
+        message += f", {board.top(1)[0][1] - score} behind the leader"
+    
+    await interaction.response.send_message(message)
+
 @app_commands.command(name="v4cb_overwrite_score", description="Overwrite the current scores (Admin only)")
 @app_commands.describe(scores="Format: player1=score1,player2=score2,...")
+@v4cb_mutation
 async def v4cb_overwrite_score(interaction: discord.Interaction, scores: str):
     """Overwrite current game scores"""
     if not interaction.user.guild_permissions.administrator:
@@ -905,16 +1135,15 @@ async def v4cb_overwrite_score(interaction: discord.Interaction, scores: str):
         )
         return
     
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
     
     try:
         # Parse scores (format: player1=score1,player2=score2,...)
@@ -947,44 +1176,260 @@ async def v4cb_overwrite_score(interaction: discord.Interaction, scores: str):
             ephemeral=True
         )
 
+# Card lists are text; anything bigger than this isn't one
+MAX_IMPORT_BYTES = 4 * 1024 * 1024
+
+async def attachment_chunks(session, attachment: discord.Attachment, chunk_size: int = 64 * 1024):
+    """Stream an attachment's bytes through an HTTP session instead of loading the whole file into memory"""
+    async with session.get(attachment.url) as response:
+        response.raise_for_status()
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+
+@app_commands.command(name="v4cb_import_banned", description="Add or replace the banned list from an uploaded card list")
+@app_commands.describe(
+    file="Text file with one card per line, or a Cube Cobra CSV export",
+    replace="Replace the banned list instead of adding to it"
+)
+@v4cb_mutation
+async def v4cb_import_banned(interaction: discord.Interaction, file: discord.Attachment, replace: bool = False):
+    """Import a banned list from an attached file"""
+    game = await interaction.client.get_v4cb_game(interaction)
+    
+    if not game.is_active:
+        await interaction.response.send_message(
+            "There's no active V4CB game in this channel!",
+            ephemeral=True
+        )
+        return
+    
+    if file.size > MAX_IMPORT_BYTES:
+        await interaction.response.send_message(
+            f"That file is too large to be a card list (limit {MAX_IMPORT_BYTES // (1024 * 1024)} MB).",
+            ephemeral=True
+        )
+        return
+    
+    await interaction.response.defer()
+    
+    try:
+        session = await interaction.client.get_http_session()
+        cards = [card async for card in parse_card_lines(attachment_chunks(session, file))]
+    except Exception as e:
+        logging.error(f"Error reading banned list import: {str(e)}")
+        await interaction.followup.send("Couldn't read that file. Please upload a text or CSV file.", ephemeral=True)
+        return
+    
+    if not cards:
+        await interaction.followup.send("No card names found in that file.", ephemeral=True)
+        return
+    
+    unknown_cards = game.unknown_cards(cards)
+    added, removed, saved = await game.import_banned_list(cards, replace=replace)
+    
+    embed = discord.Embed(
+        title="Banned List Imported",
+        description=(
+            f"Read {len(cards)} card(s) from `{file.filename}`.\n"
+            f"Added {len(added)}, removed {len(removed)}. Total banned cards: {len(game.banned_cards)}"
+        ),
+        color=discord.Color.blue()
+    )
+    if added:
+        embed.add_field(name="Added Cards", value=summarize_cards(added), inline=False)
+    if removed:
+        embed.add_field(name="Removed Cards", value=summarize_cards(removed), inline=False)
+    if unknown_cards:
+        embed.add_field(name="Unrecognized Cards", value=summarize_cards(unknown_cards), inline=False)
+    if not saved:
+        embed.add_field(
+            name="Not Saved Yet",
+            value="The import couldn't be saved to storage yet; it will be retried automatically.",
+            inline=False
+        )
+    
+    await interaction.followup.send(embed=embed)
+
+@app_commands.command(name="v4cb_export_banned", description="Download the banned list as a text file")
+async def v4cb_export_banned(interaction: discord.Interaction):
+    """Export the banned list, one card per line"""
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
+    
+    if game is None or not game.is_active:
+        await interaction.response.send_message(
+            "There's no active V4CB game in this channel!",
+            ephemeral=True
+        )
+        return
+    
+    # The banned list is kept sorted, so this is a single pass
+    content = export_text(game.banned_cards).encode("utf-8")
+    await interaction.response.send_message(
+        f"Banned list: {len(game.banned_cards)} card(s). Import it elsewhere with `/v4cb_import_banned`.",
+        file=discord.File(io.BytesIO(content), filename=f"banned_list_{interaction.channel_id}.txt")
+    )
+
 @app_commands.command(name="v4cb_banned", description="Show the current banned list with pagination")
 async def v4cb_banned(interaction: discord.Interaction):
     """Show the banned list with pagination controls"""
-    channel_id = interaction.channel_id
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
     
-    if channel_id not in bot.v4cb_games or not bot.v4cb_games[channel_id].is_active:
+    if game is None or not game.is_active:
         await interaction.response.send_message(
             "There's no active V4CB game in this channel!",
             ephemeral=True
         )
         return
     
-    game = bot.v4cb_games[channel_id]
-    embeds = await game.create_banned_list_embeds()
-    
-    if not embeds:
+    if not game.banned_cards:
         await interaction.response.send_message("No cards are currently banned.", ephemeral=True)
         return
     
-    view = BannedListPaginator(embeds)
+    # Pages are rendered on demand from the cached page text
+    view = BannedListPaginator(game)
     # Store the message for the view's timeout handler
-    view.message = await interaction.response.send_message(embed=embeds[0], view=view)
+    view.message = await interaction.response.send_message(embed=view.current_embed(), view=view)
+
+# Rounds per page of /v4cb_history
+HISTORY_PAGE_SIZE = 5
 
-def handle_sigterm(*args):
+@app_commands.command(name="v4cb_history", description="Show past V4CB rounds, newest first")
+@app_commands.describe(page="Page of round history to show (1 is the most recent)")
+async def v4cb_history(interaction: discord.Interaction, page: app_commands.Range[int, 1] = 1):
+    """Show a page of resolved rounds with their submissions and winners"""
+    game = await interaction.client.get_v4cb_game(interaction, create=False)
+    
+    if game is None or not game.history.total:
+        await interaction.response.send_message("No rounds have been completed in this channel yet!", ephemeral=True)
+        return
+    
+    page_count = game.history.page_count(HISTORY_PAGE_SIZE)
+    if page > page_count:
+        await interaction.response.send_message(
+            f"There are only {page_count} page(s) of round history.",
+            ephemeral=True
+        )
+        return
+    
+    # Only the history segments covering this page are read
+    await interaction.response.defer()
+    rounds = await game.history.page(page, HISTORY_PAGE_SIZE)
+    
+    embed = discord.Embed(
+        title="V4CB Round History",
+        description=f"{game.history.total} round(s) played",
+        color=discord.Color.blue()
+    )
+    for record in rounds:
+        winners = set(record["winners"])
+        lines = [
+            f"{'🏆 ' if user_id in winners else ''}{submission['display_name']}: {', '.join(submission['cards'])}"
+            for user_id, submission in record["submissions"].items()
+        ]
+        value = "\n".join([f"<t:{int(record['timestamp'])}:f>"] + lines)
+        embed.add_field(
+            name=f"Round {record['round'] + 1}",
+            # 5 rounds of at most 1024 characters each stay inside Discord's 6000 character embed limit
+            value=value if len(value) <= 1024 else value[:1021] + "...",
+            inline=False
+        )
+    embed.set_footer(text=f"Page {page}/{page_count}")
+    
+    await interaction.followup.send(embed=embed)
+
+def handle_sigterm(bot: commands.Bot):
     """Handle termination signal"""
     logging.info("Received termination signal")
     asyncio.create_task(bot.close())
 
 # Then define bot class and create instance
 class DraftBot(commands.Bot):
-    def __init__(self, *, test_mode: bool):
+    def __init__(self, *, test_mode: bool, force_sync: bool = False):
+        # Intents are required to manage certain events
+        intents = discord.Intents.default()
+        intents.messages = True
+        intents.message_content = True
+        intents.guilds = True
+        
         super().__init__(command_prefix=commands.when_mentioned_or("drafty"), intents=intents)
         self.active_drafts: Dict[int, List[discord.Member]] = {}
         self.draft_sessions: Dict[int, RochesterDraft] = {}
         self.cube_parser = CubeCobraParser()
         self.test_mode = test_mode
-        self.v4cb_games: Dict[int, V4CBGame] = {}
-        self.storage = StorageManager()
+        self.force_sync = force_sync or os.getenv('FORCE_COMMAND_SYNC') == '1'
+        # Heavy dependencies (storage client, card database) are created on first use
+        self.storage = shared_storage()
+        self._card_db: Optional[CardDatabase] = None
+        self._card_db_task: Optional[asyncio.Task] = None
+        # General-purpose HTTP session (e.g. for attachment downloads), created on first use
+        self._http_session = None
+        # Long-running tasks (eviction loop, preload), referenced so they aren't garbage-collected mid-run
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.v4cb_games = V4CBGameRegistry(
+            self.storage,
+            card_db_loader=self.load_card_db,
+            idle_timeout=float(os.getenv('V4CB_IDLE_TIMEOUT', '3600')),
+            flush_delay=float(os.getenv('V4CB_FLUSH_DELAY', '2'))
+        )
+    
+    @property
+    def card_db(self) -> Optional[CardDatabase]:
+        """The card name database if it has loaded; otherwise None, and loading starts in the background"""
+        if self._card_db is None:
+            self._start_card_db_load()
+        return self._card_db
+    
+    async def load_card_db(self) -> CardDatabase:
+        """The card name database, read in a worker thread the first time it's needed"""
+        if self._card_db is None:
+            # Shielded, so a cancelled caller doesn't cancel the shared load
+            await asyncio.shield(self._start_card_db_load())
+        return self._card_db
+    
+    def _start_card_db_load(self) -> asyncio.Task:
+        if self._card_db_task is None:
+            self._card_db_task = asyncio.create_task(self._load_card_db())
+        return self._card_db_task
+    
+    async def _load_card_db(self) -> CardDatabase:
+        # Parsing a bulk data file takes a while, so keep it off the event loop
+        self._card_db = await asyncio.to_thread(CardDatabase.load, os.getenv('CARD_DB_PATH'))
+        return self._card_db
+    
+    async def get_http_session(self):
+        """The bot's shared HTTP session, created on first use"""
+        if self._http_session is None or self._http_session.closed:
+            # Deferred import, like the Cube Cobra session
+            import aiohttp
+            self._http_session = aiohttp.ClientSession()
+        return self._http_session
+    
+    def start_background_task(self, coro: Coroutine) -> asyncio.Task:
+        """Run a coroutine for the life of the bot; close() cancels it if it's still running"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def close(self):
+        """Stop background tasks and flush unsaved game state, then release the HTTP sessions and storage workers"""
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        await self.v4cb_games.flush_all()
+        await self.cube_parser.close()
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        await super().close()
+        # Waits for in-flight storage writes to finish
+        await asyncio.to_thread(self.storage.close)
+        
+    async def get_v4cb_game(self, interaction: discord.Interaction, create: bool = True) -> Optional[V4CBGame]:
+        """
+        Get the V4CB game for the interaction's channel, loading it from storage on first use.
+        Read-only commands pass create=False and get None for a channel with no game.
+        """
+        return await self.v4cb_games.get(interaction.channel_id, interaction.guild_id, create=create)
         
     async def setup_hook(self):
         """This is called when the bot is done preparing data"""
@@ -1007,63 +1452,107 @@ class DraftBot(commands.Bot):
         self.tree.add_command(v4cb_set_banned)
         self.tree.add_command(v4cb_see_my_deck)
         self.tree.add_command(v4cb_clear_banned)
+        self.tree.add_command(v4cb_reset)
+        self.tree.add_command(v4cb_import_banned)
+        self.tree.add_command(v4cb_export_banned)
         self.tree.add_command(v4cb_remove_banned_card)
         self.tree.add_command(v4cb_submit_winner)
         self.tree.add_command(v4cb_score)
         self.tree.add_command(v4cb_overwrite_score)
+        self.tree.add_command(v4cb_leaderboard)
+        self.tree.add_command(v4cb_rank)
         self.tree.add_command(v4cb_banned)
+        self.tree.add_command(v4cb_history)
+        self.tree.add_command(v4cb_stats)
+        self.tree.add_command(v4cb_rebuild_stats)
+        
+        # Drop games from memory once they've been idle for a while
+        self.start_background_task(self.v4cb_games.run_eviction_loop())
         
         # Sync commands based on mode
         try:
             if self.test_mode and os.getenv('TEST_GUILD_ID'):
                 test_guild = discord.Object(id=int(os.getenv('TEST_GUILD_ID')))
                 self.tree.copy_global_to(guild=test_guild)
-                await self.tree.sync(guild=test_guild)
-                print(f"Test guild commands synced!")
+                if await self.sync_commands(guild=test_guild):
+                    print(f"Test guild commands synced!")
             else:
-                await self.tree.sync()
-                print("Global commands synced!")
+                if await self.sync_commands():
+                    print("Global commands synced!")
         except Exception as e:
             print(f"Failed to sync commands: {e}")
 
+    async def sync_commands(self, guild: discord.Object = None) -> bool:
+        """
+        Sync the command tree for a scope, skipping the sync when the tree's
+        fingerprint matches the last one synced. Returns True if a sync happened.
+        """
+        # Scopes are per application, since test and production bots may share a bucket
+        scope = f"{self.application_id}/" + (f"guild-{guild.id}" if guild else "global")
+        fingerprint = fingerprint_commands(self.tree.get_commands(guild=guild))
+        
+        sync_state = await self.storage.read_path_json(SYNC_STATE_FILE) or {}
+        if not self.force_sync and sync_state.get(scope) == fingerprint:
+            print(f"Commands unchanged for {scope}, skipping sync")
+            return False
+        
+        await self.tree.sync(guild=guild)
+        sync_state[scope] = fingerprint
+        await self.storage.write_path_json(SYNC_STATE_FILE, sync_state)
+        return True
+
     async def on_ready(self):
         print(f"Logged in as {self.user} (ID: {self.user.id})")
         print("------")
         
-        # Load existing games after bot is ready
-        print("Loading existing games...")
-        await self.load_existing_games()
+        # Games are loaded on demand; optionally warm the cache in the background
+        if os.getenv('V4CB_PRELOAD') == '1':
+            print("Preloading existing games...")
+            self.start_background_task(self.load_existing_games())
 
     async def load_existing_games(self):
-        """Load existing V4CB games from storage"""
+        """Preload existing V4CB games from storage into the game registry"""
         try:
-            # Get list of all guilds the bot is in
-            for guild in self.guilds:
-                # For each guild, check all text channels
-                for channel in guild.text_channels:
-                    # Check if a game exists in storage for this channel
-                    if await V4CBGame.game_exists(self.storage, str(guild.id), str(channel.id)):
-                        print(f"Game exists in storage for channel {channel.id}")
-                        # Create and load the game
-                        game = V4CBGame(channel.id, guild.id)
-                        await game.load_state()
-                        if game.is_active:  # Only add if game was actually loaded
-                            self.v4cb_games[channel.id] = game
-                            logging.info(f"Loaded existing game in channel {channel.id}")
+            # One prefix listing finds every channel with a game, instead of probing each channel
+            guild_ids = {str(guild.id) for guild in self.guilds}
+            channels = [
+                (server_id, channel_id)
+                for server_id, channel_id in await V4CBGame.discover(self.storage)
+                if server_id in guild_ids
+            ]
+            print(f"Found {len(channels)} V4CB game(s) in storage")
+            
+            # State documents are read in batches; old-layout games load individually
+            loaded = await self.v4cb_games.preload(channels, concurrency=int(os.getenv('V4CB_LOAD_CONCURRENCY', '16')))
+            logging.info(f"Preloaded {loaded} V4CB game(s)")
         
         except Exception as e:
             logging.error(f"Error loading existing games: {str(e)}")
 
-# Initialize bot with test mode flag
-bot = DraftBot(test_mode=args.test)
+def create_bot(test_mode: bool = False, force_sync: bool = False) -> DraftBot:
+    """
+    Application factory. Building the bot does no network I/O; the storage client,
+    HTTP session and card database are all created lazily.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+    return DraftBot(test_mode=test_mode, force_sync=force_sync)
 
-# Run the bot
-if __name__ == "__main__":
+def main():
+    # Add argument parsing
+    parser = argparse.ArgumentParser(description='Run the MTG Draft Discord Bot')
+    parser.add_argument('--test', action='store_true', help='Run in test mode with specific guild')
+    parser.add_argument('--force-sync', action='store_true', help='Sync slash commands even if they are unchanged')
+    args = parser.parse_args()
+    
     logging.basicConfig(level=logging.INFO)
     
+    # Initialize bot with test mode flag
+    bot = create_bot(test_mode=args.test, force_sync=args.force_sync)
+    
     # Register signal handlers
-    signal.signal(signal.SIGTERM, handle_sigterm)
-    signal.signal(signal.SIGINT, handle_sigterm)
+    signal.signal(signal.SIGTERM, lambda *_: handle_sigterm(bot))
+    signal.signal(signal.SIGINT, lambda *_: handle_sigterm(bot))
     
     try:
         # Run the bot
@@ -1073,3 +1562,7 @@ if __name__ == "__main__":
         # Ensure cleanup
         if not bot.is_closed():
             asyncio.run(bot.close())
+
+# Run the bot
+if __name__ == "__main__":
+    main()
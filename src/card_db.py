@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import sys
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional
+
+_QUOTES = str.maketrans({"\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"'})
+
+def normalize_card_name(name: str) -> str:
+    """Normalize a card name for lookups: lowercase, no accents, straight quotes, single spaces"""
+    if name.isascii():
+        return " ".join(name.lower().split())
+    name = unicodedata.normalize("NFKD", name.translate(_QUOTES))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    return " ".join(name.lower().split())
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CardDatabase:
+    """Sorted in-memory index of every known card name.
+
+    Prefix and word-prefix lookups are a bisect into sorted arrays; fuzzy lookups
+    use a trigram index that is only built the first time it is needed.
+    """
+    def __init__(self, names: Iterable[str]):
+        by_key: Dict[str, str] = {}
+        for name in names:
+            name = name.strip()
+            if name:
+                by_key.setdefault(normalize_card_name(name), name)
+
+        self._keys: List[str] = sorted(by_key)
+        self._names: List[str] = [by_key[key] for key in self._keys]
+        self._index: Dict[str, int] = {key: idx for idx, key in enumerate(self._keys)}
+
+        # Front faces of split/double-faced cards resolve to the full name,
+        # and every word after the first is indexed for mid-name completion
+        words = []
+        for idx, key in enumerate(self._keys):
+            if " // " in key:
+                self._index.setdefault(key.split(" // ")[0], idx)
+            for word in key.split()[1:]:
+                words.append((word, idx))
+        words.sort()
+        self._word_keys: List[str] = [word for word, _ in words]
+        self._word_ids: List[int] = [idx for _, idx in words]
+
+        self._trigram_index: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "CardDatabase":
+        """Load card names from a Scryfall bulk data file (.json) or a names file (one per line).
+
+        Returns an empty database if no path is configured or the file can't be read,
+        in which case name validation is skipped.
+        """
+        if not path:
+            return cls([])
+        try:
+            with open(path, encoding="utf-8") as f:
+                if path.endswith(".json"):
+                    return cls(card["name"] for card in json.load(f) if "name" in card)
+                return cls(f)
+        except Exception as e:
+            logging.error(f"Error loading card database from {path}: {str(e)}")
+            return cls([])
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Return the canonical spelling of a card name, or None if it isn't a known card"""
+        idx = self._index.get(normalize_card_name(name))
+        return self._names[idx] if idx is not None else None
+
+    def complete(self, query: str, limit: int = 25) -> List[str]:
+        """Card names starting with the query, then names with a later word starting with it"""
+        key = normalize_card_name(query)
+        if not key:
+            return []
+
+        ids = []
+        start = bisect_left(self._keys, key)
+        for idx in range(start, min(start + limit, len(self._keys))):
+            if not self._keys[idx].startswith(key):
+                break
+            ids.append(idx)
+
+        if len(ids) < limit:
+            seen = set(ids)
+            start = bisect_left(self._word_keys, key)
+            for pos in range(start, len(self._word_keys)):
+                if len(ids) >= limit or not self._word_keys[pos].startswith(key):
+                    break
+                idx = self._word_ids[pos]
+                if idx not in seen:
+                    seen.add(idx)
+                    ids.append(idx)
+
+        return [self._names[idx] for idx in ids]
+
+    def suggest(self, query: str, limit: int = 3, cutoff: float = 0.75) -> List[str]:
+        """Closest card names to a possibly misspelled query"""
+        key = normalize_card_name(query)
+        if not key or not self._keys:
+            return []
+
+        if self._trigram_index is None:
+            self._build_trigram_index()
+
+        votes: Counter = Counter()
+        for gram in _trigrams(key):
+            votes.update(self._trigram_index.get(gram, ()))
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(key)
+        scored = []
+        for idx, _ in votes.most_common(limit * 10):
+            matcher.set_seq1(self._keys[idx])
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= cutoff:
+                scored.append((-ratio, idx))
+
+        scored.sort()
+        return [self._names[idx] for _, idx in scored[:limit]]
+
+    def _build_trigram_index(self) -> None:
+        index: Dict[str, List[int]] = {}
+        for idx, key in enumerate(self._keys):
+            for gram in _trigrams(key):
+                index.setdefault(gram, []).append(idx)
+        self._trigram_index = index
+
+def build_names_file(bulk_path: str, output_path: str) -> int:
+    """Convert a Scryfall bulk data file into a sorted names file that loads much faster"""
+    with open(bulk_path, encoding="utf-8") as f:
+        database = CardDatabase(card["name"] for card in json.load(f) if "name" in card)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.writelines(f"{name}\n" for name in database._names)
+    return len(database)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(f"Usage: python {os.path.basename(__file__)} <scryfall-bulk.json> <card_names.txt>")
+        sys.exit(1)
+    count = build_names_file(sys.argv[1], sys.argv[2])
+    print(f"Wrote {count} card names to {sys.argv[2]}")
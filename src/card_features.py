@@ -0,0 +1,69 @@
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from cube_parser import CardData, table_size
+
+COLORS = "WUBRG"
+CARD_TYPES = ("Creature", "Instant", "Sorcery", "Artifact", "Enchantment", "Planeswalker", "Land", "Battle")
+
+class CubeFeatures:
+    """
+    A cube's cards encoded once as arrays indexed by card_id: ratings, color
+    bits and masks, CMC, card type flags and tags. Packs and pools are then
+    just arrays of card IDs, so bots score them with a few array operations
+    instead of looping over CardData attributes.
+    """
+    def __init__(self, cards: List[CardData], ratings: Optional[Sequence[float]] = None, default_rating: float = 0.0):
+        """`ratings`, if given, is indexed by card_id like everything else"""
+        size = table_size(cards)
+        self.cards: List[Optional[CardData]] = [None] * size
+        self.colors = np.zeros((size, len(COLORS)), dtype=bool)
+        self.cmc = np.zeros(size, dtype=np.float32)
+        self.types = np.zeros((size, len(CARD_TYPES)), dtype=bool)
+        self.tag_names = sorted({tag.strip() for card in cards for tag in card.tags if tag.strip()})
+        tag_columns = {tag: column for column, tag in enumerate(self.tag_names)}
+        self.tags = np.zeros((size, len(self.tag_names)), dtype=bool)
+        for card in cards:
+            self.cards[card.card_id] = card
+            for column, letter in enumerate(COLORS):
+                self.colors[card.card_id, column] = letter in card.color.upper()
+            self.cmc[card.card_id] = card.cmc
+            for column, card_type in enumerate(CARD_TYPES):
+                self.types[card.card_id, column] = card_type in card.type
+            for tag in card.tags:
+                if tag.strip():
+                    self.tags[card.card_id, tag_columns[tag.strip()]] = True
+        # Color bits packed into one WUBRG bitmask per card (0 for colorless)
+        self.masks = self.colors.astype(np.uint8) @ (1 << np.arange(len(COLORS), dtype=np.uint8))
+        self.ratings = np.full(size, default_rating, dtype=np.float32)
+        if ratings is not None:
+            self.ratings[:] = ratings
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def freeze(self) -> None:
+        """Make the arrays read-only, so features shared between bots and drafts can't be changed by one of them"""
+        for array in (self.colors, self.cmc, self.types, self.tags, self.masks, self.ratings):
+            array.setflags(write=False)
+
+    def matrix(self) -> np.ndarray:
+        """All features as one float matrix, one row per card: colors, CMC, types, then tags"""
+        return np.hstack([self.colors, self.cmc[:, None], self.types, self.tags]).astype(np.float32)
+
+    def encode(self, cards: List[CardData]) -> np.ndarray:
+        """Card IDs of a pack or pool"""
+        return np.fromiter((card.card_id for card in cards), dtype=np.intp, count=len(cards))
+
+    def encode_packs(self, packs: List[List[CardData]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Card IDs of several packs as one (packs x cards) matrix, plus a mask of which entries are real cards"""
+        width = max((len(pack) for pack in packs), default=0)
+        ids = np.zeros((len(packs), width), dtype=np.intp)
+        valid = np.zeros((len(packs), width), dtype=bool)
+        for row, pack in enumerate(packs):
+            ids[row, :len(pack)] = self.encode(pack)
+            valid[row, :len(pack)] = True
+        return ids, valid
+
+    def color_counts(self, pool_ids: np.ndarray) -> np.ndarray:
+        """Cards of each color in a pool, in WUBRG order"""
+        return self.colors[pool_ids].sum(axis=0)
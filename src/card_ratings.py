@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+from card_features import CubeFeatures
+from cube_parser import CardData, table_size
+from pick_history import PickTable
+
+# Rating for cards the table doesn't know
+DEFAULT_RATING = 0.0
+
+class RatingTable:
+    """Pick ratings by card name (higher is better), e.g. from a file or learned from past drafts"""
+    def __init__(self, ratings: Optional[Dict[str, float]] = None, default: float = DEFAULT_RATING):
+        self.ratings = {name.lower(): float(rating) for name, rating in (ratings or {}).items()}
+        self.default = default
+
+    @classmethod
+    def load(cls, path: str) -> "RatingTable":
+        """Load a JSON object of card name to rating"""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def rating(self, name: str) -> float:
+        return self.ratings.get(name.lower(), self.default)
+
+    def for_cube(self, cards: List[CardData]) -> CubeFeatures:
+        """Encode a cube with these ratings; its cards must carry their position in it as card_id"""
+        ratings = [self.default] * table_size(cards)
+        for card in cards:
+            ratings[card.card_id] = self.rating(card.name)
+        return CubeFeatures(cards, ratings, self.default)
+
+class PickTableRatings(RatingTable):
+    """Ratings learned from past drafts: how early a card is picked, read from a memory-mapped pick table"""
+    def __init__(self, table: PickTable, default: float = DEFAULT_RATING):
+        super().__init__(default=default)
+        self.table = table
+
+    def rating(self, name: str) -> float:
+        row = self.table.lookup(name)
+        if row is None or not row["picked"]:
+            return self.default
+        # 1 for a card always taken first, 0 for one always taken last
+        return 1.0 - float(row["position"])
+
+_default_table: Optional[RatingTable] = None
+
+def default_rating_table() -> RatingTable:
+    """
+    The table named by DRAFT_RATINGS_PATH (a JSON file of ratings, or a .npy
+    pick table from pick_history.py), or an empty one (every card rated the same)
+    if it isn't set. Loaded once per process. Raises ValueError if the file
+    can't be loaded; a failed load isn't kept, so the next call tries again.
+    """
+    global _default_table
+    if _default_table is None:
+        path = os.getenv('DRAFT_RATINGS_PATH')
+        try:
+            if not path:
+                _default_table = RatingTable()
+            elif path.endswith(".npy"):
+                _default_table = PickTableRatings(PickTable(path))
+            else:
+                _default_table = RatingTable.load(path)
+        except Exception as e:
+            logging.error(f"Error loading draft ratings from {path}: {str(e)}")
+            raise ValueError(f"Couldn't load the draft bot ratings ({path}). Try random bots instead.") from e
+    return _default_table
@@ -0,0 +1,44 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+from discord import app_commands
+
+SYNC_STATE_FILE = "meta/command_sync.json"
+
+def _describe_command(command: Any) -> Dict[str, Any]:
+    """Everything about a command that Discord stores, in a stable JSON-able form"""
+    permissions = getattr(command, "default_permissions", None)
+    data: Dict[str, Any] = {
+        "kind": type(command).__name__,
+        "name": command.name,
+        "description": getattr(command, "description", ""),
+        "guild_only": getattr(command, "guild_only", False),
+        "nsfw": getattr(command, "nsfw", False),
+        "default_permissions": permissions.value if permissions is not None else None,
+    }
+
+    if isinstance(command, app_commands.Group):
+        data["commands"] = [_describe_command(sub) for sub in sorted(command.commands, key=lambda c: c.name)]
+    elif isinstance(command, app_commands.Command):
+        data["parameters"] = [
+            {
+                "name": param.name,
+                "description": param.description,
+                "type": param.type.value,
+                "required": param.required,
+                "autocomplete": param.autocomplete,
+                "choices": [[choice.name, choice.value] for choice in param.choices],
+                "min_value": param.min_value,
+                "max_value": param.max_value,
+                "channel_types": sorted(channel_type.value for channel_type in param.channel_types),
+            }
+            for param in command.parameters
+        ]
+
+    return data
+
+def fingerprint_commands(commands: List[Any]) -> str:
+    """Hash a set of application commands so unchanged trees can skip syncing"""
+    payload = [_describe_command(command) for command in sorted(commands, key=lambda c: (type(c).__name__, c.name))]
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
@@ -1,11 +1,12 @@
-import aiohttp
 from typing import List, Optional, Dict
 import re
 import csv
 from io import StringIO
 
 class CardData:
-    def __init__(self, row: Dict[str, str]):
+    def __init__(self, row: Dict[str, str], card_id: int):
+        # Position in the cube list, so per-cube tables can be plain arrays indexed by card
+        self.card_id = card_id
         self.name = row['name']
         self.cmc = float(row['CMC']) if row['CMC'] else 0
         self.type = row['Type']
@@ -18,10 +19,42 @@ class CardData:
         self.tags = row['tags'].split(',') if row['tags'] else []
         self.mtgo_id = row['MTGO ID']
 
+def table_size(cards: List[CardData]) -> int:
+    """Length of a table indexed by the cards' card_id; raises ValueError for a card without one"""
+    missing = [card.name for card in cards if card.card_id < 0]
+    if missing:
+        raise ValueError(f"Cards without a card_id: {', '.join(missing[:5])}")
+    return max((card.card_id for card in cards), default=-1) + 1
+
 class CubeCobraParser:
     def __init__(self):
         self.base_url = "https://cubecobra.com"
         self.download_url_template = "https://cubecobra.com/cube/download/csv/{cube_id}"
+        self._session = None
+    
+    async def get_session(self):
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # Deferred import so modules that only need CardData don't pull in aiohttp
+            import aiohttp
+            
+            # Add headers to mimic a browser request
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'text/csv,application/csv,text/plain,*/*',
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Referer': 'https://cubecobra.com/',
+            }
+            
+            # Create connector that skips SSL verification
+            connector = aiohttp.TCPConnector(ssl=False)
+            self._session = aiohttp.ClientSession(connector=connector, headers=headers)
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session if it was created"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
     
     def _extract_cube_id(self, url: str) -> Optional[str]:
         """Extract cube ID from either a list URL or direct ID."""
@@ -51,52 +84,41 @@ class CubeCobraParser:
             download_url = self.download_url_template.format(cube_id=cube_id)
             print(f"Attempting to fetch cube data from: {download_url}")
             
-            # Add headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/csv,application/csv,text/plain,*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Referer': 'https://cubecobra.com/',
-            }
-            
-            # Create connector that skips SSL verification
-            connector = aiohttp.TCPConnector(ssl=False)
-            
-            async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
-                print(f"Sending GET request to {download_url}")
-                async with session.get(download_url, allow_redirects=True) as response:
-                    print(f"Received response with status: {response.status}")
-                    if response.status != 200:
-                        print(f"Failed to fetch cube list. Status: {response.status}")
-                        response_text = await response.text()
-                        print(f"Response body: {response_text[:200]}...")
-                        return None
-                    
-                    text = await response.text()
-                    print(f"Received data length: {len(text)} characters")
-                    print(f"First few lines of data:\n{text[:500]}...")
-                    
-                    # Parse CSV data
-                    csv_file = StringIO(text)
-                    reader = csv.DictReader(csv_file)
-                    
-                    cards = []
-                    for row in reader:
-                        try:
-                            card = CardData(row)
-                            cards.append(card)
-                        except Exception as e:
-                            print(f"Error parsing card row: {row}")
-                            print(f"Error details: {e}")
-                            continue
-                    
-                    print(f"Successfully parsed {len(cards)} cards from cube")
-                    if not cards:
-                        print("No cards found in cube list")
-                        return None
-                    
-                    return cards
-                    
+            session = await self.get_session()
+            print(f"Sending GET request to {download_url}")
+            async with session.get(download_url, allow_redirects=True) as response:
+                print(f"Received response with status: {response.status}")
+                if response.status != 200:
+                    print(f"Failed to fetch cube list. Status: {response.status}")
+                    response_text = await response.text()
+                    print(f"Response body: {response_text[:200]}...")
+                    return None
+                
+                text = await response.text()
+                print(f"Received data length: {len(text)} characters")
+                print(f"First few lines of data:\n{text[:500]}...")
+                
+                # Parse CSV data
+                csv_file = StringIO(text)
+                reader = csv.DictReader(csv_file)
+                
+                cards = []
+                for row in reader:
+                    try:
+                        card = CardData(row, card_id=len(cards))
+                        cards.append(card)
+                    except Exception as e:
+                        print(f"Error parsing card row: {row}")
+                        print(f"Error details: {e}")
+                        continue
+                
+                print(f"Successfully parsed {len(cards)} cards from cube")
+                if not cards:
+                    print("No cards found in cube list")
+                    return None
+                
+                return cards
+                
         except Exception as e:
             print(f"Error fetching cube data: {e}")
             print(f"Error type: {type(e)}")
@@ -1,10 +1,16 @@
 from typing import Dict, List, Optional, Union
+import asyncio
+import logging
+import os
 import random
 import discord
 from dataclasses import dataclass
 from cube_parser import CardData
 from draft_bots import DraftBot, create_bot
 from pack_display import PackDisplay, PackState
+from pack_index import PackIndex
+from pick_history import PickRecorder, pick_log_path
+from storage_manager import StorageManager, shared_storage
 from io import StringIO
 
 @dataclass
@@ -18,7 +24,8 @@ class DraftState:
 
 class RochesterDraft:
     """Manages a Rochester draft session"""
-    def __init__(self, cards: List[CardData], num_players: int, cards_per_pack: int, num_packs: int, num_bots: int = 0):
+    def __init__(self, cards: List[CardData], num_players: int, cards_per_pack: int, num_packs: int, num_bots: int = 0,
+                 storage: Optional[StorageManager] = None):
         self.cards = cards
         self.num_players = num_players + num_bots
         self.num_human_players = num_players
@@ -31,6 +38,12 @@ class RochesterDraft:
         self.picked_cards: Dict[str, List[CardData]] = {}
         self.draft_channel: Optional[discord.TextChannel] = None
         self.active_players: List[discord.Member] = []
+        self.pack_version = 0  # Bumped on every pick so autocomplete indexes can be reused between picks
+        self._pack_index: Optional[PackIndex] = None
+        # Every pick with the pack it was made from, saved when the draft completes for pick statistics
+        self.pick_recorder = PickRecorder(cards) if os.getenv('DRAFT_RECORD_PICKS', '0') == '1' else None
+        self._pick_log_path: Optional[str] = None
+        self.storage = storage
         
         # Rochester-specific state
         self.state = DraftState(
@@ -41,10 +54,17 @@ class RochesterDraft:
             current_player=0
         )
     
-    def add_bots(self, num_bots: int):
-        """Add bot players to fill remaining seats"""
+    def add_bots(self, num_bots: int, bot_types: Union[str, List[str]] = "random"):
+        """
+        Add bot players to fill remaining seats. `bot_types` is one strategy for
+        every bot, or one per seat with the last repeated for any seats left over.
+        """
+        if isinstance(bot_types, str):
+            bot_types = [bot_types]
         for i in range(num_bots):
-            bot = create_bot(name=f"Bot_{i+1}")
+            bot_type = bot_types[min(i, len(bot_types) - 1)]
+            # Strategies that score cards share one set of cube features across bots and drafts
+            bot = create_bot(bot_type, name=f"Bot_{i+1}", cube=self.cards)
             self.bots.append(bot)
             self.player_pools[bot] = []
     
@@ -75,6 +95,15 @@ class RochesterDraft:
         pack_idx = (self.state.current_pack_number - 1) * self.num_players + self.state.current_pack_index
         return self.packs[pack_idx] if pack_idx < len(self.packs) else None
     
+    def get_pack_index(self) -> Optional[PackIndex]:
+        """Get the autocomplete index for the current pack, rebuilding it only after a pick"""
+        if self._pack_index is None or self._pack_index.version != self.pack_version:
+            current_pack = self.get_current_pack()
+            if not current_pack:
+                return None
+            self._pack_index = PackIndex(current_pack, self.pack_version)
+        return self._pack_index
+    
     def get_current_player(self) -> Union[discord.Member, DraftBot]:
         """Get the current player or bot"""
         if self.is_bot_turn():
@@ -130,9 +159,16 @@ class RochesterDraft:
         if not picked_card:
             return None
             
+        if self.pick_recorder is not None:
+            self.pick_recorder.record(self.state.current_player, self.state.current_pack_number,
+                                      self.state.current_pick, current_pack, picked_card)
+        
         # Add to player's pool and remove from pack
         self.player_pools[player].append(picked_card)
+        if isinstance(player, DraftBot):
+            player.record_pick(picked_card)
         current_pack.remove(picked_card)
+        self.pack_version += 1
         
         # Add to picked cards list for this pack
         player_name = player.name if isinstance(player, DraftBot) else player.display_name
@@ -147,6 +183,7 @@ class RochesterDraft:
         self.advance_draft()
         
         if self.is_draft_complete():
+            await self.save_pick_history()
             if self.draft_channel:
                 results = await self.generate_draft_results()
                 await self.draft_channel.send(
@@ -160,6 +197,28 @@ class RochesterDraft:
         
         return picked_card
     
+    async def save_pick_history(self, attempts: int = 3) -> bool:
+        """
+        Store the draft's pick stream for the pick statistics job. Returns True on success.
+        The recorder is kept until the save succeeds, and every attempt writes the same path,
+        so retrying (here or in a later call) never records the draft twice.
+        """
+        if self.pick_recorder is None or not self.pick_recorder.picks:
+            return True
+        if self._pick_log_path is None:
+            guild_id = self.draft_channel.guild.id if self.draft_channel else "unknown"
+            self._pick_log_path = pick_log_path(guild_id)
+        storage = self.storage or shared_storage()
+        document = self.pick_recorder.to_json(self.num_players)
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(2 ** (attempt - 1))
+            if await storage.write_path_json(self._pick_log_path, document):
+                self.pick_recorder = None
+                return True
+        logging.error(f"Error saving pick history to {self._pick_log_path}: gave up after {attempts} attempts")
+        return False
+    
     async def set_draft_channel(self, channel: discord.TextChannel):
         """Set the channel where pack displays will be shown"""
         self.draft_channel = channel
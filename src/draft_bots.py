@@ -1,31 +1,292 @@
+import asyncio
+import logging
+import os
 import random
-from typing import List, Optional
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Type
 from cube_parser import CardData
 
+if TYPE_CHECKING:
+    # NumPy-backed modules are imported where they're used, so random-bot drafts
+    # (and importing the bot) never load NumPy
+    import numpy as np
+    from card_features import CubeFeatures
+
+# Bot strategies by type name, filled in by @register_bot
+BOT_TYPES: Dict[str, Type["DraftBot"]] = {}
+
+def register_bot(bot_type: str, description: str) -> Callable[[Type["DraftBot"]], Type["DraftBot"]]:
+    """Class decorator that makes a bot strategy available to create_bot and /start_draft"""
+    def register(cls: Type["DraftBot"]) -> Type["DraftBot"]:
+        cls.bot_type = bot_type
+        cls.description = description
+        BOT_TYPES[bot_type] = cls
+        return cls
+    return register
+
+# Features of recently used cubes, shared read-only by every bot in every draft of that cube
+_cube_features: "OrderedDict[Tuple[str, ...], CubeFeatures]" = OrderedDict()
+CUBE_FEATURES_CACHE_SIZE = 8
+
+def cube_features(cube: List[CardData]) -> "CubeFeatures":
+    """
+    The cube's features with the default ratings, built once per process per
+    cube. Drafts of the same cube fetch their own CardData, so the cache is
+    keyed by the card names in card_id order.
+    """
+    key = tuple(card.name for card in sorted(cube, key=lambda card: card.card_id))
+    features = _cube_features.get(key)
+    if features is None:
+        from card_ratings import default_rating_table
+        features = default_rating_table().for_cube(cube)
+        features.freeze()
+        _cube_features[key] = features
+        if len(_cube_features) > CUBE_FEATURES_CACHE_SIZE:
+            _cube_features.popitem(last=False)
+    else:
+        _cube_features.move_to_end(key)
+    return features
+
 class DraftBot:
     """Base class for draft bots"""
+    # Bots that think for a while set this, so their picks run in a worker thread (see choose_pick)
+    offload = False
+
+    bot_type = "base"
+    description = ""
+
+    @classmethod
+    def create(cls, name: str, cube: Optional[List[CardData]] = None) -> "DraftBot":
+        """Build a bot for a draft of `cube`; strategies that need shared resources fetch them here"""
+        return cls(name)
+
     def __init__(self, name: str):
         self.name = name
         self.picked_cards: List[CardData] = []
         self.display_name = name
     
-    def make_pick(self, pack: List[CardData]) -> Optional[CardData]:
-        """Make a pick from the current pack"""
+    def make_pick(self, pack: List[CardData], deadline: Optional[float] = None) -> Optional[CardData]:
+        """
+        Make a pick from the current pack. Bots that improve their answer over
+        time return their best pick so far once time.monotonic() reaches `deadline`.
+        """
         raise NotImplementedError("Base DraftBot cannot make picks")
+    
+    def fallback_pick(self, pack: List[CardData]) -> Optional[CardData]:
+        """A cheap pick, used when make_pick misses its deadline"""
+        return random.choice(pack) if pack else None
+    
+    def record_pick(self, card: CardData) -> None:
+        """Called by the draft once a pick has been made, so bots can update their state"""
+        self.picked_cards.append(card)
 
+@register_bot("random", "Picks at random")
 class RandomBot(DraftBot):
     """Bot that makes completely random picks"""
-    def make_pick(self, pack: List[CardData]) -> Optional[CardData]:
+    def make_pick(self, pack: List[CardData], deadline: Optional[float] = None) -> Optional[CardData]:
         if not pack:
             return None
         return random.choice(pack)
 
-def create_bot(bot_type: str = "random", name: str = None) -> DraftBot:
-    """Factory function to create different types of draft bots"""
+def rating_scores(features: "CubeFeatures", ids: "np.ndarray", colors: "np.ndarray", picks: "np.ndarray",
+                  color_weight: float, commit_picks: int) -> "np.ndarray":
+    """
+    Rating-bot scores for a (seats x cards) matrix of card IDs, given each
+    seat's per-color pick counts (seats x 5) and number of picks. A card's
+    score is its rating plus a bonus for fitting the seat's colors, which
+    grows to `color_weight` over the first `commit_picks` picks.
+    """
+    import numpy as np
+    share = colors / np.maximum(picks, 1)[:, None]
+    ramp = color_weight * np.minimum(1.0, picks / commit_picks)
+    card_colors = features.colors[ids]
+    # A card fits as well as the least drafted of its colors
+    fit = np.where(card_colors, share[:, None, :], np.inf).min(axis=-1)
+    # Colorless cards fit any deck, but don't pull towards one
+    fit = np.where(card_colors.any(axis=-1), fit, share.max(axis=-1)[:, None] / 2)
+    return features.ratings[ids] + ramp[:, None] * fit
+
+@register_bot("rating", "Takes the best rated card, leaning into its colors")
+class RatingBot(DraftBot):
+    """
+    Bot that takes the highest rated card, leaning towards the colors it has
+    already drafted. Ratings and colors come from the cube's feature arrays,
+    and color commitment is a running count per color updated as each pick
+    is recorded, so a pick is a gather and an argmax over the pack.
+    """
+    # Bonus for a card in the bot's colors, at full commitment
+    COLOR_WEIGHT = 1.0
+    # Picks before color fit counts in full
+    COMMIT_PICKS = 8
+
+    @classmethod
+    def create(cls, name: str, cube: Optional[List[CardData]] = None) -> "DraftBot":
+        if cube is None:
+            raise ValueError(f"{cls.bot_type} bots need the cube")
+        return cls(name, cube_features(cube))
+
+    def __init__(self, name: str, features: "CubeFeatures"):
+        import numpy as np
+        from card_features import COLORS
+        super().__init__(name)
+        self.features = features
+        # Picks so far of each color, in WUBRG order
+        self.colors = np.zeros(len(COLORS), dtype=np.int32)
+
+    def record_pick(self, card: CardData) -> None:
+        super().record_pick(card)
+        self.colors += self.features.colors[card.card_id]
+
+    def score_pack(self, ids: "np.ndarray") -> "np.ndarray":
+        """Scores for a pack encoded as card IDs"""
+        import numpy as np
+        picks = np.array([len(self.picked_cards)])
+        return rating_scores(self.features, ids[None, :], self.colors[None, :], picks,
+                             self.COLOR_WEIGHT, self.COMMIT_PICKS)[0]
+
+    def make_pick(self, pack: List[CardData], deadline: Optional[float] = None) -> Optional[CardData]:
+        if not pack:
+            return None
+        return pack[int(self.score_pack(self.features.encode(pack)).argmax())]
+
+    def fallback_pick(self, pack: List[CardData]) -> Optional[CardData]:
+        return RatingBot.make_pick(self, pack)
+
+@register_bot("rollout", "Simulates the rest of the draft for its best options (slower)")
+class RolloutBot(RatingBot):
+    """
+    Anytime bot that plays out the rest of its draft for each of its top
+    candidates. Each rollout draws random future packs from the cube and picks
+    from them as a rating bot would; a candidate's value is the final pool's
+    total rating plus how concentrated its colors are. Rollouts repeat until
+    the deadline, so more time gives a better estimate.
+    """
+    offload = True
+    # Cards considered, in rating-bot order
+    CANDIDATES = 5
+    # Future picks simulated per rollout, and cards in each simulated pack
+    ROLLOUT_PICKS = 14
+    ROLLOUT_PACK_SIZE = 8
+    # Value of a pool entirely in two colors, over one spread evenly across five
+    FOCUS_WEIGHT = 2.0
+    # Rollouts per candidate when there's no deadline
+    MAX_ROLLOUTS = 256
+
+    def __init__(self, name: str, features: "CubeFeatures", seed: Optional[int] = None):
+        import numpy as np
+        super().__init__(name, features)
+        self.rng = np.random.default_rng(seed)
+
+    def make_pick(self, pack: List[CardData], deadline: Optional[float] = None) -> Optional[CardData]:
+        import numpy as np
+        if not pack:
+            return None
+        order = np.argsort(-self.score_pack(self.features.encode(pack)), kind="stable")[:self.CANDIDATES]
+        candidates = self.features.encode([pack[index] for index in order])
+        totals = np.zeros(len(candidates))
+        rollouts = 0
+        while len(candidates) > 1 and rollouts < self.MAX_ROLLOUTS:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            totals += self._rollout(candidates)
+            rollouts += 1
+            # Running in a worker thread: hand the GIL back between rollouts so the event loop stays responsive
+            time.sleep(0)
+        # With no rollouts this is the rating bot's pick
+        return pack[int(order[int(np.argmax(totals))])]
+
+    def _rollout(self, candidates: "np.ndarray") -> "np.ndarray":
+        """One simulated rest of the draft per candidate, all drawing the same future packs"""
+        import numpy as np
+        features = self.features
+        colors = self.colors[None, :] + features.colors[candidates]
+        picks = np.full(len(candidates), len(self.picked_cards) + 1)
+        value = features.ratings[candidates].astype(np.float64)
+        for _ in range(self.ROLLOUT_PICKS):
+            pack = self.rng.integers(len(features), size=self.ROLLOUT_PACK_SIZE)
+            ids = np.broadcast_to(pack, (len(candidates), len(pack)))
+            scores = rating_scores(features, ids, colors, picks, self.COLOR_WEIGHT, self.COMMIT_PICKS)
+            chosen = pack[scores.argmax(axis=1)]
+            value += features.ratings[chosen]
+            colors += features.colors[chosen]
+            picks += 1
+        top_two = np.sort(colors, axis=1)[:, -2:].sum(axis=1)
+        return value + self.FOCUS_WEIGHT * top_two / np.maximum(colors.sum(axis=1), 1)
+
+def pick_many(bots: List[RatingBot], packs: List[List[CardData]]) -> List[Optional[CardData]]:
+    """
+    Picks for many seats at once (e.g. a simultaneous-pick round or a
+    simulated draft), scoring every seat's pack in one call. The bots must
+    share one cube's features.
+    """
+    import numpy as np
+    if not bots:
+        return []
+    bot = bots[0]
+    features = bot.features
+    ids, valid = features.encode_packs(packs)
+    if not ids.size:
+        return [None] * len(bots)
+    colors = np.stack([seat.colors for seat in bots])
+    picks = np.array([len(seat.picked_cards) for seat in bots])
+    scores = rating_scores(features, ids, colors, picks, bot.COLOR_WEIGHT, bot.COMMIT_PICKS)
+    choices = np.where(valid, scores, -np.inf).argmax(axis=1)
+    return [pack[choice] if pack else None for pack, choice in zip(packs, choices.tolist())]
+
+_pick_executor: Optional[ThreadPoolExecutor] = None
+
+def pick_executor() -> ThreadPoolExecutor:
+    """
+    Worker threads for offloaded bot picks, shared by every draft (DRAFT_BOT_WORKERS,
+    default 4). Threads rather than processes, so bots and their shared feature
+    arrays aren't copied for every pick; the array work releases the GIL.
+    """
+    global _pick_executor
+    if _pick_executor is None:
+        _pick_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('DRAFT_BOT_WORKERS', '4')),
+            thread_name_prefix="draft-bot"
+        )
+    return _pick_executor
+
+# Extra time a worker gets past the bot's deadline before its fallback pick is used
+PICK_GRACE = 0.25
+
+async def choose_pick(bot: DraftBot, pack: List[CardData], budget: Optional[float] = None) -> Optional[CardData]:
+    """
+    Get a bot's pick without blocking the event loop. Offloaded bots think in
+    a worker thread for up to `budget` seconds (DRAFT_BOT_BUDGET, default 0.5);
+    if the worker is late or fails, the bot's cheap fallback pick is used.
+    """
+    if not bot.offload:
+        return bot.make_pick(pack)
+    if budget is None:
+        budget = float(os.getenv('DRAFT_BOT_BUDGET', '0.5'))
+    loop = asyncio.get_running_loop()
+    # A copy, since the draft moves on (and changes the pack) if the worker is late
+    future = loop.run_in_executor(pick_executor(), bot.make_pick, list(pack), time.monotonic() + budget)
+    try:
+        return await asyncio.wait_for(future, budget + PICK_GRACE)
+    except asyncio.TimeoutError:
+        logging.warning(f"{bot.name} missed its {budget}s pick deadline, using its fallback pick")
+    except Exception as e:
+        logging.error(f"Error making a pick for {bot.name}: {str(e)}")
+    return bot.fallback_pick(pack)
+
+def create_bot(bot_type: str = "random", name: str = None, cube: Optional[List[CardData]] = None,
+               ratings: Optional["CubeFeatures"] = None) -> DraftBot:
+    """
+    Factory function to create a bot of any registered type. Bots that score
+    cards use the cube's shared features, or `ratings` if given.
+    """
     if name is None:
         name = f"Bot_{random.randint(1000, 9999)}"
     
-    if bot_type.lower() == "random":
-        return RandomBot(name)
-    else:
-        raise ValueError(f"Unknown bot type: {bot_type}") 
\ No newline at end of file
+    cls = BOT_TYPES.get(bot_type.lower())
+    if cls is None:
+        raise ValueError(f"Unknown bot type: {bot_type}")
+    if ratings is not None and issubclass(cls, RatingBot):
+        return cls(name, ratings)
+    return cls.create(name, cube)
@@ -0,0 +1,161 @@
+import logging
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from storage_manager import StorageManager
+from write_behind import WriteBehindBuffer
+
+LEADERBOARD_FILE = "leaderboard.json"
+
+def server_leaderboard_path(server_id: str) -> str:
+    # Beside the server's channel directories, so channel listings don't pick it up
+    return f"v4cb/{server_id}/{LEADERBOARD_FILE}"
+
+class Leaderboard:
+    """
+    Player scores kept in rank order (highest score first, then by name).
+    Changing a score moves one entry, so standings, top-N and rank lookups
+    never re-sort the whole table.
+    """
+    def __init__(self, scores: Optional[Dict[str, int]] = None):
+        self.scores: Dict[str, int] = {}
+        self._order: List[Tuple[int, str]] = []
+        if scores:
+            self.replace(scores)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __contains__(self, player) -> bool:
+        return player in self.scores
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        """(player, score) pairs in rank order"""
+        for negative_score, player in self._order:
+            yield player, -negative_score
+
+    def set(self, player: str, score: int) -> None:
+        old = self.scores.get(player)
+        if old == score:
+            return
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, player))]
+        self.scores[player] = score
+        insort(self._order, (-score, player))
+
+    def remove(self, player: str) -> None:
+        old = self.scores.pop(player, None)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, player))]
+
+    def increment(self, player: str, delta: int = 1) -> None:
+        self.set(player, self.scores.get(player, 0) + delta)
+
+    def replace(self, scores: Dict[str, int]) -> None:
+        """Make the table equal to `scores`, moving only the entries that changed"""
+        for player in [player for player in self.scores if player not in scores]:
+            self.remove(player)
+        for player, score in scores.items():
+            self.set(player, score)
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return [(player, -negative_score) for negative_score, player in self._order[:n]]
+
+    def rank(self, player: str) -> Optional[int]:
+        """1-based rank, shared by tied players; None if the player has no score"""
+        score = self.scores.get(player)
+        if score is None:
+            return None
+        # Every entry before (-score,) has a strictly higher score
+        return bisect_left(self._order, (-score,)) + 1
+
+    def find(self, player: str) -> Optional[str]:
+        """The player's name as stored, matched case-insensitively"""
+        if player in self.scores:
+            return player
+        lowered = player.strip().lower()
+        return next((name for name in self.scores if name.lower() == lowered), None)
+
+class ServerLeaderboard:
+    """
+    Server-wide totals across every V4CB channel. Each channel's scores are
+    stored as its contribution to one per-server document; a change in one
+    channel applies only that channel's difference to the totals, so no other
+    channel's data is read.
+    """
+    def __init__(self, storage: StorageManager, server_id: str, flush_delay: float = 2.0):
+        self.storage = storage
+        self.server_id = str(server_id)
+        self.board = Leaderboard()
+        self.channels: Dict[str, Dict[str, int]] = {}
+        # Channels whose contribution changed since the document was last written
+        self._dirty_channels: Set[str] = set()
+        self._writes = WriteBehindBuffer(self._write_documents, flush_delay)
+
+    def _apply_delta(self, old: Dict[str, int], new: Dict[str, int]) -> None:
+        for player in old.keys() | new.keys():
+            delta = new.get(player, 0) - old.get(player, 0)
+            if not delta:
+                continue
+            total = self.board.scores.get(player, 0) + delta
+            if total:
+                self.board.set(player, total)
+            else:
+                self.board.remove(player)
+
+    def _set_contribution(self, channel_id: str, scores: Dict[str, int]) -> None:
+        self._apply_delta(self.channels.get(channel_id, {}), scores)
+        if scores:
+            self.channels[channel_id] = dict(scores)
+        else:
+            self.channels.pop(channel_id, None)
+
+    def update_channel(self, channel_id: str, scores: Dict[str, int]) -> None:
+        """Record a channel's current scores and schedule a write if they changed"""
+        channel_id = str(channel_id)
+        if self.channels.get(channel_id, {}) == scores:
+            return
+        self._set_contribution(channel_id, scores)
+        self._dirty_channels.add(channel_id)
+        self._writes.mark_dirty(LEADERBOARD_FILE)
+
+    def apply_document(self, document: Optional[Dict[str, Any]]) -> None:
+        """Take other writers' contributions from the stored document, keeping unsaved local ones"""
+        stored = (document or {}).get("channels", {})
+        for channel_id in (self.channels.keys() | stored.keys()) - self._dirty_channels:
+            self._set_contribution(channel_id, stored.get(channel_id, {}))
+
+    async def load(self) -> None:
+        self.apply_document(await self.storage.read_path_json(server_leaderboard_path(self.server_id)))
+
+    async def save(self) -> bool:
+        return await self._writes.flush()
+
+    @property
+    def has_unsaved_changes(self) -> bool:
+        return self._writes.is_dirty
+
+    async def _write_documents(self, documents: Set[str]) -> Set[str]:
+        dirty, self._dirty_channels = self._dirty_channels, set()
+        contributions = {channel_id: dict(self.channels.get(channel_id, {})) for channel_id in dirty}
+
+        def merge(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            channels = dict((current or {}).get("channels", {}))
+            for channel_id, scores in contributions.items():
+                if scores:
+                    channels[channel_id] = scores
+                else:
+                    channels.pop(channel_id, None)
+            return {"schema": 1, "channels": channels}
+
+        merged = None
+        try:
+            merged = await self.storage.update_path_json(server_leaderboard_path(self.server_id), merge)
+        finally:
+            if merged is None:
+                # Failed or cancelled: these channels are written again on the next flush
+                self._dirty_channels |= dirty
+        if merged is None:
+            logging.error(f"Error saving the leaderboard for server {self.server_id}")
+            return {LEADERBOARD_FILE}
+        self.apply_document(merged)
+        return set()
@@ -0,0 +1,80 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import List
+from discord import app_commands
+from cube_parser import CardData
+
+# Discord has a limit of 25 choices per autocomplete response
+MAX_CHOICES = 25
+
+class PackIndex:
+    """Prebuilt autocomplete lookup for the cards in a single pack.
+
+    The index is immutable: the draft builds a new one (with a new version) after
+    every pick, so cached results can never go stale.
+    """
+    def __init__(self, cards: List[CardData], version: int, cache_size: int = 128):
+        self.version = version
+        self.cache_size = cache_size
+        self._choices = [
+            app_commands.Choice(
+                name=f"{card.name} ({card.color_category.upper()})",
+                value=card.name
+            )
+            for card in cards
+        ]
+        names = [card.name.lower() for card in cards]
+
+        # Sorted (name, position) pairs for prefix lookups via bisect
+        self._sorted_names = sorted((name, idx) for idx, name in enumerate(names))
+        self._sorted_keys = [name for name, _ in self._sorted_names]
+
+        # All names joined into one string so substring scans run in C via str.find
+        self._haystack = "\n".join(names)
+        self._starts = []
+        offset = 0
+        for name in names:
+            self._starts.append(offset)
+            offset += len(name) + 1
+
+        self._cache: "OrderedDict[tuple[int, str], List[app_commands.Choice[str]]]" = OrderedDict()
+
+    def search(self, query: str) -> List[app_commands.Choice[str]]:
+        """Return choices matching the query, prefix matches first, in pack order"""
+        key = (self.version, query.lower().replace("\n", " "))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        results = self._lookup(key[1])
+        self._cache[key] = results
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return results
+
+    def _lookup(self, query: str) -> List[app_commands.Choice[str]]:
+        if not query:
+            return self._choices[:MAX_CHOICES]
+
+        # Prefix matches come from a contiguous slice of the sorted names
+        lo = bisect_left(self._sorted_keys, query)
+        hi = bisect_right(self._sorted_keys, query + "\uffff", lo)
+        prefix_hits = sorted(idx for _, idx in self._sorted_names[lo:hi])
+        if len(prefix_hits) >= MAX_CHOICES:
+            return [self._choices[idx] for idx in prefix_hits[:MAX_CHOICES]]
+
+        # Remaining substring matches, skipping cards already matched by prefix
+        seen = set(prefix_hits)
+        substring_hits = []
+        pos = self._haystack.find(query)
+        while pos != -1 and len(prefix_hits) + len(substring_hits) < MAX_CHOICES:
+            idx = bisect_right(self._starts, pos) - 1
+            if idx not in seen:
+                seen.add(idx)
+                substring_hits.append(idx)
+            # Jump to the next card; a single name only needs to match once
+            next_start = self._starts[idx + 1] if idx + 1 < len(self._starts) else len(self._haystack)
+            pos = self._haystack.find(query, next_start)
+
+        return [self._choices[idx] for idx in prefix_hits + substring_hits]
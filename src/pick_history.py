@@ -0,0 +1,147 @@
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from cube_parser import CardData, table_size
+from storage_manager import StorageManager
+
+if TYPE_CHECKING:
+    # Only the pick table needs NumPy; drafts record picks without loading it
+    import numpy as np
+
+# Every recorded draft is one document under this prefix
+PICK_LOG_PREFIX = "drafts/"
+# Drafts read at once by the aggregation job; memory use doesn't grow with the number of drafts
+READ_CHUNK = 32
+
+def pick_log_path(guild_id: Any) -> str:
+    return f"{PICK_LOG_PREFIX}{guild_id}/{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.json"
+
+class PickRecorder:
+    """
+    The pick stream of one draft: for every pick, the cards the drafter saw
+    and the one they took. Cards are stored as their card_id, with the cube's
+    card names listed once.
+    """
+    def __init__(self, cards: List[CardData]):
+        self.names: List[Optional[str]] = [None] * table_size(cards)
+        for card in cards:
+            self.names[card.card_id] = card.name
+        self.picks: List[list] = []
+
+    def record(self, seat: int, pack_number: int, pick_number: int, seen: List[CardData], picked: CardData) -> None:
+        self.picks.append([seat, pack_number, pick_number, [card.card_id for card in seen], picked.card_id])
+
+    def to_json(self, seats: int) -> Dict[str, Any]:
+        return {
+            "schema": 1,
+            "recorded_at": time.time(),
+            "seats": seats,
+            "cards": self.names,
+            # [seat, pack number, pick number within the pack, card IDs seen, card ID picked]
+            "picks": self.picks,
+        }
+
+class PickAggregator:
+    """Per-card running totals over recorded drafts, fed one draft at a time"""
+    def __init__(self):
+        self.drafts = 0
+        # Per card name: [drafts seen in, picks offered in, times picked, pick number total, pick fraction total]
+        self.totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0, 0, 0.0, 0.0])
+
+    def add_draft(self, document: Dict[str, Any]) -> None:
+        names = document["cards"]
+        seen_in_draft = set()
+        for _, _, pick_number, seen, picked in document["picks"]:
+            seen_in_draft.update(seen)
+            for card_id in seen:
+                self.totals[names[card_id].lower()][1] += 1
+            # Pick number as a fraction of the pack, so different pack sizes compare
+            pack_size = pick_number + len(seen) - 1
+            totals = self.totals[names[picked].lower()]
+            totals[2] += 1
+            totals[3] += pick_number
+            totals[4] += (pick_number - 1) / max(1, pack_size - 1)
+        for card_id in seen_in_draft:
+            self.totals[names[card_id].lower()][0] += 1
+        self.drafts += 1
+
+    def table(self) -> "np.ndarray":
+        """Per-card results as a structured array sorted by name, ready for write_pick_table"""
+        import numpy as np
+        width = max((len(name.encode("utf-8")) for name in self.totals), default=1)
+        table = np.zeros(len(self.totals), dtype=pick_table_dtype(width))
+        for row, name in enumerate(sorted(self.totals, key=lambda name: name.encode("utf-8"))):
+            drafts, offered, picked, pick_total, fraction_total = self.totals[name]
+            table[row] = (
+                name.encode("utf-8"),
+                pick_total / picked if picked else 0,
+                picked / offered if offered else 0,
+                fraction_total / picked if picked else 1,
+                picked,
+                drafts,
+            )
+        return table
+
+def pick_table_dtype(name_width: int) -> "np.dtype":
+    import numpy as np
+    return np.dtype([
+        ("name", f"S{name_width}"),  # Lowercased UTF-8 card name; rows are sorted by it
+        ("ata", "f4"),               # Average pick number within the pack (1 is first pick)
+        ("pick_rate", "f4"),         # Times picked / times offered
+        ("position", "f4"),          # Average pick position as a fraction of the pack (0 is first pick)
+        ("picked", "u4"),
+        ("drafts", "u4"),
+    ])
+
+def write_pick_table(path: str, table: "np.ndarray") -> None:
+    import numpy as np
+    # .npy, so readers can memory-map it instead of loading it
+    with open(path, "wb") as f:
+        np.save(f, table, allow_pickle=False)
+
+class PickTable:
+    """A pick table written by the aggregation job, memory-mapped and searched by name"""
+    def __init__(self, path: str):
+        import numpy as np
+        self.table = np.load(path, mmap_mode="r", allow_pickle=False)
+        self.names = self.table["name"]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def lookup(self, name: str) -> Optional["np.void"]:
+        import numpy as np
+        key = name.lower().encode("utf-8")
+        row = int(np.searchsorted(self.names, key))
+        if row < len(self.names) and self.names[row] == key:
+            return self.table[row]
+        return None
+
+async def aggregate(storage: StorageManager, output: str) -> int:
+    """
+    Stream every recorded draft through a PickAggregator, READ_CHUNK at a time,
+    and write the pick table to `output`. Returns the number of drafts read.
+    """
+    aggregator = PickAggregator()
+    # Paths are listed a chunk at a time too, so nothing here grows with the number of drafts
+    async for page in storage.iter_paths(PICK_LOG_PREFIX, READ_CHUNK):
+        paths = [path for path in page if path.endswith(".json")]
+        documents = await asyncio.gather(*(storage.read_path_json(path) for path in paths))
+        for document in documents:
+            if document is not None:
+                aggregator.add_draft(document)
+    write_pick_table(output, aggregator.table())
+    return aggregator.drafts
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(f"Usage: python {os.path.basename(__file__)} <pick_table.npy>")
+        sys.exit(1)
+    storage = StorageManager()
+    count = asyncio.run(aggregate(storage, sys.argv[1]))
+    storage.close()
+    print(f"Aggregated {count} draft(s) into {sys.argv[1]}")
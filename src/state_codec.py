@@ -0,0 +1,40 @@
+import gzip
+import json
+from typing import Any, Optional, Tuple
+
+try:
+    # Optional: several times faster than the standard library for large documents
+    import orjson
+except ImportError:
+    orjson = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+def dumps(data: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def loads(content: bytes) -> Any:
+    """Parse UTF-8 JSON, compact or pretty-printed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def encode(data: Any, compress_over: Optional[int] = None) -> Tuple[bytes, str]:
+    """
+    Serialize a document to compact JSON, gzipped if the JSON is larger than
+    `compress_over` bytes. Returns (content, content_type).
+    """
+    content = dumps(data)
+    if compress_over is not None and len(content) > compress_over:
+        # mtime=0 keeps the output deterministic, so unchanged documents encode identically
+        return gzip.compress(content, compresslevel=6, mtime=0), "application/gzip"
+    return content, "application/json"
+
+def decode(content: bytes) -> Any:
+    """Parse a document written by `encode` (or any plain JSON), detecting gzip by its magic bytes"""
+    if content[:2] == GZIP_MAGIC:
+        content = gzip.decompress(content)
+    return loads(content)
@@ -0,0 +1,502 @@
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+@dataclass
+class StoredObject:
+    """An object's contents plus the generation numbers used for conditional requests"""
+    data: bytes
+    generation: int
+    metageneration: int = 1
+
+class PreconditionFailed(Exception):
+    """A conditional write found a different generation than it expected"""
+
+# Returned by read_object when the stored generation matches if_generation_not_match
+NOT_MODIFIED = object()
+
+class StorageBackend:
+    """
+    Blocking object store used by StorageManager. Keys are slash-separated paths
+    like "v4cb/{server_id}/{channel_id}/scores.json"; values are raw bytes.
+    StorageManager runs these calls in its worker pool, so implementations must
+    be thread-safe.
+
+    Every object has a generation that changes whenever it's written, which
+    supports cheap revalidation of cached reads and conditional writes.
+    """
+    def read_object(self, key: str, if_generation_not_match: Optional[int] = None) -> Union[StoredObject, None, object]:
+        """
+        Return the object, None if it doesn't exist, or NOT_MODIFIED if its
+        generation equals `if_generation_not_match`
+        """
+        raise NotImplementedError
+
+    def write_object(self, key: str, data: bytes, content_type: str = "application/json",
+                     if_generation_match: Optional[int] = None) -> int:
+        """
+        Create or overwrite an object and return its new generation. If
+        `if_generation_match` is given, the write only succeeds if the current
+        generation matches it (0 means the object must not exist yet); otherwise
+        PreconditionFailed is raised.
+        """
+        raise NotImplementedError
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Return the object's contents, or None if it doesn't exist"""
+        stored = self.read_object(key)
+        return stored.data if stored is not None else None
+
+    def write(self, key: str, data: bytes, content_type: str = "application/json") -> None:
+        """Create or overwrite an object"""
+        self.write_object(key, data, content_type)
+
+    def delete(self, key: str) -> None:
+        """Delete an object; deleting a missing object is not an error"""
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> List[str]:
+        """Return the keys of every object under a prefix, sorted"""
+        raise NotImplementedError
+
+    def list_page(self, prefix: str, start_after: Optional[str] = None, limit: int = 1000) -> List[str]:
+        """
+        Return up to `limit` keys under a prefix that sort after `start_after`, sorted.
+        Pass the last key of one page as `start_after` to get the next.
+        """
+        keys = [key for key in self.list(prefix) if start_after is None or key > start_after]
+        return keys[:limit]
+
+    def close(self) -> None:
+        """Release any resources held by the backend"""
+
+    # Batch operations return a result per key: the value, or the exception that key
+    # failed with. Backends list the operations ("read", "write", "delete") they can
+    # do natively in a few requests; StorageManager pipelines single calls for the rest.
+    native_batch: FrozenSet[str] = frozenset()
+
+    def read_many(self, keys: List[str]) -> Dict[str, Union[StoredObject, None, Exception]]:
+        """Read several objects; missing objects map to None"""
+        results = {}
+        for key in keys:
+            try:
+                results[key] = self.read_object(key)
+            except Exception as e:
+                results[key] = e
+        return results
+
+    def write_many(self, items: List[Tuple[str, bytes, str]]) -> Dict[str, Union[int, Exception]]:
+        """Write several (key, data, content_type) objects, returning each new generation"""
+        results = {}
+        for key, data, content_type in items:
+            try:
+                results[key] = self.write_object(key, data, content_type)
+            except Exception as e:
+                results[key] = e
+        return results
+
+    def delete_many(self, keys: List[str]) -> Dict[str, Optional[Exception]]:
+        """Delete several objects; successful deletes map to None"""
+        results = {}
+        for key in keys:
+            try:
+                self.delete(key)
+                results[key] = None
+            except Exception as e:
+                results[key] = e
+        return results
+
+def _check_generation(key: str, current: int, expected: Optional[int]) -> None:
+    if expected is not None and current != expected:
+        raise PreconditionFailed(f"{key} is at generation {current}, expected {expected}")
+
+# One Google Cloud Storage client (auth session + connection pool) and one handle
+# per bucket for the whole process, however many backends or managers are built
+_gcs_client = None
+_gcs_buckets: Dict[str, object] = {}
+_gcs_lock = threading.Lock()
+
+def shared_gcs_client(pool_size: Optional[int] = None):
+    """
+    The process-wide Google Cloud Storage client, created on first call.
+    `pool_size` (default STORAGE_POOL_SIZE, or 16) caps the HTTP connections
+    kept open to GCS; it only applies to the first call.
+    """
+    global _gcs_client
+    with _gcs_lock:
+        if _gcs_client is None:
+            # Deferred imports: google-cloud-storage is slow to import
+            import google.auth
+            from google.auth.transport.requests import AuthorizedSession
+            from google.cloud import storage
+            from requests.adapters import HTTPAdapter
+
+            pool_size = pool_size or int(os.getenv('STORAGE_POOL_SIZE', '16'))
+            credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+            session = AuthorizedSession(credentials)
+            # The default pool keeps 10 connections, fewer than a busy worker pool uses
+            session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+            _gcs_client = storage.Client(project=os.getenv('GOOGLE_CLOUD_PROJECT', project),
+                                         credentials=credentials, _http=session)
+        return _gcs_client
+
+def shared_gcs_bucket(bucket_name: str):
+    """The process-wide handle for a bucket; the bucket is looked up (or created) once"""
+    bucket = _gcs_buckets.get(bucket_name)
+    if bucket is not None:
+        return bucket
+    client = shared_gcs_client()
+    with _gcs_lock:
+        if bucket_name not in _gcs_buckets:
+            from google.api_core import exceptions
+            try:
+                _gcs_buckets[bucket_name] = client.get_bucket(bucket_name)
+            except exceptions.NotFound:
+                _gcs_buckets[bucket_name] = client.create_bucket(bucket_name)
+                logging.info(f"Created new bucket: {bucket_name}")
+        return _gcs_buckets[bucket_name]
+
+class GCSBackend(StorageBackend):
+    """Google Cloud Storage bucket, through the shared client. Nothing connects until first use."""
+    def __init__(self, bucket_name: str = "mtg-discord-bot-data", timeout: float = 10):
+        self.bucket_name = bucket_name
+        self.timeout = timeout
+
+    @property
+    def client(self):
+        return shared_gcs_client()
+
+    @property
+    def bucket(self):
+        return shared_gcs_bucket(self.bucket_name)
+
+    def read_object(self, key: str, if_generation_not_match: Optional[int] = None) -> Union[StoredObject, None, object]:
+        # A single download request: a missing object is a 404, an unchanged one a 304
+        from google.api_core import exceptions
+        blob = self.bucket.blob(key)
+        try:
+            data = blob.download_as_bytes(if_generation_not_match=if_generation_not_match, timeout=self.timeout)
+        except exceptions.NotFound:
+            return None
+        except exceptions.NotModified:
+            return NOT_MODIFIED
+        return StoredObject(data, int(blob.generation), int(blob.metageneration or 1))
+
+    def write_object(self, key: str, data: bytes, content_type: str = "application/json",
+                     if_generation_match: Optional[int] = None) -> int:
+        from google.api_core import exceptions
+        blob = self.bucket.blob(key)
+        try:
+            blob.upload_from_string(data, content_type=content_type, if_generation_match=if_generation_match,
+                                    timeout=self.timeout)
+        except exceptions.PreconditionFailed as e:
+            raise PreconditionFailed(str(e)) from e
+        return int(blob.generation)
+
+    def delete(self, key: str) -> None:
+        from google.api_core import exceptions
+        try:
+            self.bucket.blob(key).delete(timeout=self.timeout)
+        except exceptions.NotFound:
+            pass
+
+    # The JSON batch API covers deletes but not media uploads or downloads
+    native_batch = frozenset({"delete"})
+    BATCH_LIMIT = 100
+
+    def delete_many(self, keys: List[str]) -> Dict[str, Optional[Exception]]:
+        results = {}
+        for start in range(0, len(keys), self.BATCH_LIMIT):
+            chunk = keys[start:start + self.BATCH_LIMIT]
+            try:
+                with self.client.batch():
+                    for key in chunk:
+                        self.bucket.delete_blob(key, timeout=self.timeout)
+                results.update((key, None) for key in chunk)
+            except Exception:
+                # The batch reports only its first error (often just a missing object),
+                # so retry the chunk one by one to get a result for each key
+                results.update(super().delete_many(chunk))
+        return results
+
+    def list(self, prefix: str) -> List[str]:
+        blobs = self.bucket.list_blobs(prefix=prefix, fields="items(name),nextPageToken", timeout=self.timeout)
+        return sorted(blob.name for page in blobs.pages for blob in page)
+
+    def list_page(self, prefix: str, start_after: Optional[str] = None, limit: int = 1000) -> List[str]:
+        # start_offset is inclusive, so ask for one extra in case start_after itself still exists
+        blobs = self.bucket.list_blobs(prefix=prefix, start_offset=start_after, max_results=limit + 1,
+                                       fields="items(name),nextPageToken", timeout=self.timeout)
+        return [blob.name for blob in blobs if blob.name != start_after][:limit]
+
+class LocalBackend(StorageBackend):
+    """A directory on the local filesystem; each key is a file under the root."""
+    def __init__(self, root: str = "data"):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split('/')))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def read_object(self, key: str, if_generation_not_match: Optional[int] = None) -> Union[StoredObject, None, object]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                generation = os.fstat(f.fileno()).st_mtime_ns
+                if generation == if_generation_not_match:
+                    return NOT_MODIFIED
+                return StoredObject(f.read(), generation)
+        except FileNotFoundError:
+            return None
+
+    def _generation(self, path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def write_object(self, key: str, data: bytes, content_type: str = "application/json",
+                     if_generation_match: Optional[int] = None) -> int:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The file's mtime is its generation; the lock makes check-and-replace atomic in this process
+        with self._lock:
+            previous = self._generation(path)
+            _check_generation(key, previous, if_generation_match)
+            # Write to a temporary file and rename, so readers never see a partial object
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            generation = self._generation(path)
+            if generation <= previous:
+                # Coarse filesystem timestamps: bump the mtime so the generation always changes
+                generation = previous + 1
+                os.utime(path, ns=(generation, generation))
+            return generation
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str) -> List[str]:
+        # Only walk the directory the prefix points into, not the whole store
+        directory, _, name_prefix = prefix.rpartition('/')
+        start = self._path(directory) if directory else self.root
+        keys = []
+        for dirpath, dirnames, filenames in os.walk(start):
+            rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+            if dirpath == start:
+                # Below the starting directory everything matches; at it, only names starting with the rest
+                dirnames[:] = [d for d in dirnames if d.startswith(name_prefix)]
+                filenames = [f for f in filenames if f.startswith(name_prefix)]
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                keys.append(filename if rel_dir == "." else f"{rel_dir}/{filename}")
+        return sorted(keys)
+
+class SQLiteBackend(StorageBackend):
+    """A single SQLite database file in WAL mode, for small self-hosted deployments."""
+    def __init__(self, path: str = "data/storage.db"):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, content_type TEXT NOT NULL, "
+            "generation INTEGER NOT NULL DEFAULT 1)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(objects)")]
+        if "generation" not in columns:
+            self._conn.execute("ALTER TABLE objects ADD COLUMN generation INTEGER NOT NULL DEFAULT 1")
+
+    def read_object(self, key: str, if_generation_not_match: Optional[int] = None) -> Union[StoredObject, None, object]:
+        with self._lock:
+            row = self._conn.execute("SELECT generation FROM objects WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] == if_generation_not_match:
+                return NOT_MODIFIED
+            data = self._conn.execute("SELECT data FROM objects WHERE key = ?", (key,)).fetchone()[0]
+        return StoredObject(bytes(data), row[0])
+
+    def write_object(self, key: str, data: bytes, content_type: str = "application/json",
+                     if_generation_match: Optional[int] = None) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT generation FROM objects WHERE key = ?", (key,)).fetchone()
+            previous = row[0] if row else 0
+            _check_generation(key, previous, if_generation_match)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO objects (key, data, content_type, generation) VALUES (?, ?, ?, ?)",
+                (key, data, content_type, previous + 1)
+            )
+        return previous + 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM objects WHERE key = ?", (key,))
+
+    native_batch = frozenset({"read", "write", "delete"})
+    # Stay under SQLite's limit on bound parameters per statement
+    BATCH_LIMIT = 500
+
+    def read_many(self, keys: List[str]) -> Dict[str, Union[StoredObject, None, Exception]]:
+        results: Dict[str, Union[StoredObject, None, Exception]] = dict.fromkeys(keys)
+        with self._lock:
+            for start in range(0, len(keys), self.BATCH_LIMIT):
+                chunk = keys[start:start + self.BATCH_LIMIT]
+                rows = self._conn.execute(
+                    f"SELECT key, data, generation FROM objects WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, data, generation in rows:
+                    results[key] = StoredObject(bytes(data), generation)
+        return results
+
+    def write_many(self, items: List[Tuple[str, bytes, str]]) -> Dict[str, Union[int, Exception]]:
+        # One transaction for the whole batch: one fsync instead of one per object
+        results: Dict[str, Union[int, Exception]] = {}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key, data, content_type in items:
+                    row = self._conn.execute("SELECT generation FROM objects WHERE key = ?", (key,)).fetchone()
+                    generation = (row[0] if row else 0) + 1
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO objects (key, data, content_type, generation) VALUES (?, ?, ?, ?)",
+                        (key, data, content_type, generation)
+                    )
+                    results[key] = generation
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                self._conn.execute("ROLLBACK")
+                return {key: e for key, _, _ in items}
+        return results
+
+    def delete_many(self, keys: List[str]) -> Dict[str, Optional[Exception]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("DELETE FROM objects WHERE key = ?", [(key,) for key in keys])
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                self._conn.execute("ROLLBACK")
+                return dict.fromkeys(keys, e)
+        return dict.fromkeys(keys)
+
+    def list(self, prefix: str) -> List[str]:
+        # Range scan on the primary key instead of LIKE, which would treat % and _ as wildcards
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM objects WHERE key >= ? AND key < ? ORDER BY key",
+                (prefix, prefix + "\U0010ffff")
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def list_page(self, prefix: str, start_after: Optional[str] = None, limit: int = 1000) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM objects WHERE key >= ? AND key < ? AND key > ? ORDER BY key LIMIT ?",
+                (prefix, prefix + "\U0010ffff", start_after or "", limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class MemoryBackend(StorageBackend):
+    """In-process dictionary; nothing survives a restart. Useful for tests and benchmarks."""
+    def __init__(self):
+        self._objects: Dict[str, Tuple[bytes, int]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def read_object(self, key: str, if_generation_not_match: Optional[int] = None) -> Union[StoredObject, None, object]:
+        with self._lock:
+            stored = self._objects.get(key)
+        if stored is None:
+            return None
+        if stored[1] == if_generation_not_match:
+            return NOT_MODIFIED
+        return StoredObject(stored[0], stored[1])
+
+    def write_object(self, key: str, data: bytes, content_type: str = "application/json",
+                     if_generation_match: Optional[int] = None) -> int:
+        with self._lock:
+            stored = self._objects.get(key)
+            _check_generation(key, stored[1] if stored else 0, if_generation_match)
+            # Generations are unique across the store, like GCS's
+            self._generation += 1
+            self._objects[key] = (bytes(data), self._generation)
+            return self._generation
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._objects.pop(key, None)
+
+    native_batch = frozenset({"read", "write", "delete"})
+
+    def read_many(self, keys: List[str]) -> Dict[str, Union[StoredObject, None, Exception]]:
+        with self._lock:
+            stored = {key: self._objects.get(key) for key in keys}
+        return {key: StoredObject(*value) if value else None for key, value in stored.items()}
+
+    def write_many(self, items: List[Tuple[str, bytes, str]]) -> Dict[str, Union[int, Exception]]:
+        results: Dict[str, Union[int, Exception]] = {}
+        with self._lock:
+            for key, data, _ in items:
+                self._generation += 1
+                self._objects[key] = (bytes(data), self._generation)
+                results[key] = self._generation
+        return results
+
+    def delete_many(self, keys: List[str]) -> Dict[str, Optional[Exception]]:
+        with self._lock:
+            for key in keys:
+                self._objects.pop(key, None)
+        return dict.fromkeys(keys)
+
+    def list(self, prefix: str) -> List[str]:
+        with self._lock:
+            return sorted(key for key in self._objects if key.startswith(prefix))
+
+BACKENDS = {
+    "gcs": GCSBackend,
+    "local": LocalBackend,
+    "sqlite": SQLiteBackend,
+    "memory": MemoryBackend,
+}
+
+def create_backend(kind: Optional[str] = None) -> StorageBackend:
+    """
+    Build the storage backend selected by configuration:
+    STORAGE_BACKEND (gcs, local, sqlite or memory; default gcs), plus
+    STORAGE_BUCKET for gcs and STORAGE_PATH for local/sqlite.
+    """
+    kind = (kind or os.getenv('STORAGE_BACKEND', 'gcs')).lower()
+    if kind == "gcs":
+        return GCSBackend(
+            os.getenv('STORAGE_BUCKET', 'mtg-discord-bot-data'),
+            timeout=float(os.getenv('STORAGE_TIMEOUT', '10'))
+        )
+    if kind == "local":
+        return LocalBackend(os.getenv('STORAGE_PATH', 'data'))
+    if kind == "sqlite":
+        return SQLiteBackend(os.getenv('STORAGE_PATH', 'data/storage.db'))
+    if kind == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown storage backend: {kind}")
@@ -1,78 +1,359 @@
-from google.cloud import storage
-import json
-from typing import Any, Dict, Optional
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 import logging
+from collections import OrderedDict
+import state_codec
+from storage_backends import NOT_MODIFIED, PreconditionFailed, StorageBackend, StoredObject, create_backend
 
 class StorageManager:
-    def __init__(self, bucket_name: str = "mtg-discord-bot-data"):
-        """Initialize the storage manager with Google Cloud Storage client."""
-        self.client = storage.Client()
-        self.bucket_name = bucket_name
-        self._ensure_bucket_exists()
-
-    def _ensure_bucket_exists(self) -> None:
-        """Ensure the bucket exists, create it if it doesn't."""
-        try:
-            self.bucket = self.client.get_bucket(self.bucket_name)
-        except Exception:
-            self.bucket = self.client.create_bucket(self.bucket_name)
-            logging.info(f"Created new bucket: {self.bucket_name}")
+    def __init__(self, backend: Optional[StorageBackend] = None, max_workers: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        """
+        Initialize the storage manager on top of a storage backend (GCS, local
+        directory, SQLite or in-memory). If no backend is given, it's chosen from
+        configuration; see storage_backends.create_backend. The default GCS backend
+        connects on first use, so constructing this does no network I/O.
+
+        Backends are synchronous, so every call runs in a bounded thread pool to
+        keep the event loop responsive. `max_workers` caps concurrent storage
+        calls and `timeout` bounds how long a caller waits for one.
+
+        Reads go through a cache of raw object bytes keyed by path. A cached
+        object is revalidated with a generation-conditional read, so an unchanged
+        object costs one small request instead of a full download.
+        """
+        self.backend = backend or create_backend()
+        self.max_workers = max_workers or int(os.getenv('STORAGE_MAX_WORKERS', '8'))
+        self.timeout = timeout or float(os.getenv('STORAGE_TIMEOUT', '10'))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.cache_size = int(os.getenv('STORAGE_CACHE_SIZE', '1024'))
+        self._cache: "OrderedDict[str, StoredObject]" = OrderedDict()
+        # Documents are stored as compact JSON, gzipped above this many bytes (0 disables compression)
+        self.compress_over = int(os.getenv('STORAGE_COMPRESS_OVER', '16384')) or None
+
+    def _cache_put(self, blob_path: str, stored: StoredObject) -> None:
+        self._cache[blob_path] = stored
+        self._cache.move_to_end(blob_path)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, blob_path: str) -> None:
+        """Forget the cached copy of an object"""
+        self._cache.pop(blob_path, None)
 
     def _get_blob_path(self, server_id: str, channel_id: str, filename: str) -> str:
         """Generate the full path for a blob."""
         return f"v4cb/{server_id}/{channel_id}/{filename}"
 
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking storage call in the worker pool. Raises asyncio.TimeoutError
+        if it takes longer than the configured timeout.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="storage")
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        return await asyncio.wait_for(loop.run_in_executor(self._executor, call), self.timeout)
+
+    def close(self) -> None:
+        """Shut down the worker pool, waiting for in-flight calls to finish, then the backend."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.backend.close()
+
     async def read_json(self, server_id: str, channel_id: str, filename: str) -> Optional[Dict[str, Any]]:
         """Read JSON data from a file in storage."""
+        return await self.read_path_json(self._get_blob_path(server_id, channel_id, filename))
+
+    async def write_json(self, server_id: str, channel_id: str, filename: str, data: Dict[str, Any]) -> bool:
+        """Write JSON data to a file in storage."""
+        return await self.write_path_json(self._get_blob_path(server_id, channel_id, filename), data)
+
+    async def _read_object(self, blob_path: str) -> Optional[StoredObject]:
+        """Read an object, revalidating the cached copy instead of downloading it again"""
+        cached = self._cache.get(blob_path)
+        stored = await self._run(self.backend.read_object, blob_path,
+                                 if_generation_not_match=cached.generation if cached else None)
+        if stored is NOT_MODIFIED:
+            self._cache.move_to_end(blob_path)
+            return cached
+        if stored is None:
+            self.invalidate(blob_path)
+            return None
+        self._cache_put(blob_path, stored)
+        return stored
+
+    def _encode(self, data: Dict[str, Any]) -> Tuple[bytes, str]:
+        return state_codec.encode(data, self.compress_over)
+
+    async def read_path_json(self, blob_path: str) -> Optional[Dict[str, Any]]:
+        """Read JSON data from an arbitrary path in storage."""
         try:
-            blob_path = self._get_blob_path(server_id, channel_id, filename)
-            blob = self.bucket.blob(blob_path)
-            
-            if not blob.exists():
+            stored = await self._read_object(blob_path)
+            if stored is None:
                 return None
-            
-            content = blob.download_as_string()
-            return json.loads(content)
+            return state_codec.decode(stored.data)
+        except asyncio.TimeoutError:
+            logging.error(f"Timed out reading {blob_path}")
+            return None
         except Exception as e:
-            logging.error(f"Error reading {filename}: {str(e)}")
+            logging.error(f"Error reading {blob_path}: {str(e)}")
             return None
 
-    async def write_json(self, server_id: str, channel_id: str, filename: str, data: Dict[str, Any]) -> bool:
-        """Write JSON data to a file in storage."""
+    async def write_path_json(self, blob_path: str, data: Dict[str, Any]) -> bool:
+        """Write JSON data to an arbitrary path in storage, replacing whatever is there."""
         try:
-            blob_path = self._get_blob_path(server_id, channel_id, filename)
-            blob = self.bucket.blob(blob_path)
-            
-            json_str = json.dumps(data, indent=2)
-            blob.upload_from_string(json_str, content_type='application/json')
+            content, content_type = self._encode(data)
+            generation = await self._run(self.backend.write_object, blob_path, content, content_type)
+            self._cache_put(blob_path, StoredObject(content, generation))
             return True
+        except asyncio.TimeoutError:
+            # The write may or may not have landed, so the cached copy can't be trusted
+            self.invalidate(blob_path)
+            logging.error(f"Timed out writing {blob_path}")
+            return False
         except Exception as e:
-            logging.error(f"Error writing {filename}: {str(e)}")
+            self.invalidate(blob_path)
+            logging.error(f"Error writing {blob_path}: {str(e)}")
             return False
 
+    async def update_json(self, server_id: str, channel_id: str, filename: str,
+                          merge: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+                          retries: int = 5) -> Optional[Dict[str, Any]]:
+        """
+        Read-modify-write a JSON file without losing concurrent updates.
+        `merge` receives the current stored data (None if the file doesn't exist)
+        and returns the data to write. The write only succeeds if nobody else has
+        written the file since it was read; on a conflict the file is re-read
+        and merged again. If the file is cached, the first attempt skips the read.
+
+        Returns the data written, or None on failure. A timed-out write may still
+        have landed, so `merge` should make applying the same changes twice harmless.
+        """
+        return await self.update_path_json(self._get_blob_path(server_id, channel_id, filename), merge, retries)
+
+    async def update_path_json(self, blob_path: str, merge: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+                               retries: int = 5) -> Optional[Dict[str, Any]]:
+        """Read-modify-write JSON data at an arbitrary path in storage; see update_json."""
+        try:
+            # Optimistically merge into the cached copy; a stale cache just costs one conflict
+            stored = self._cache.get(blob_path)
+            cached = stored is not None
+            for attempt in range(retries):
+                if not cached:
+                    stored = await self._read_object(blob_path)
+                cached = False
+                current = state_codec.decode(stored.data) if stored is not None else None
+                merged = merge(current)
+                content, content_type = self._encode(merged)
+                try:
+                    generation = await self._run(self.backend.write_object, blob_path, content, content_type,
+                                                 if_generation_match=stored.generation if stored is not None else 0)
+                except PreconditionFailed:
+                    logging.info(f"Concurrent update to {blob_path}, retrying (attempt {attempt + 1})")
+                    self.invalidate(blob_path)
+                    continue
+                self._cache_put(blob_path, StoredObject(content, generation))
+                return merged
+            logging.error(f"Error updating {blob_path}: gave up after {retries} conflicting writes")
+            return None
+        except asyncio.TimeoutError:
+            self.invalidate(blob_path)
+            logging.error(f"Timed out updating {blob_path}")
+            return None
+        except Exception as e:
+            self.invalidate(blob_path)
+            logging.error(f"Error updating {blob_path}: {str(e)}")
+            return None
+
     async def delete_json(self, server_id: str, channel_id: str, filename: str) -> bool:
         """Delete a JSON file from storage."""
+        blob_path = self._get_blob_path(server_id, channel_id, filename)
         try:
-            blob_path = self._get_blob_path(server_id, channel_id, filename)
-            blob = self.bucket.blob(blob_path)
-            
-            if blob.exists():
-                blob.delete()
+            self.invalidate(blob_path)
+            await self._run(self.backend.delete, blob_path)
             return True
+        except asyncio.TimeoutError:
+            logging.error(f"Timed out deleting {filename}")
+            return False
         except Exception as e:
             logging.error(f"Error deleting {filename}: {str(e)}")
             return False
 
+    # Batch operations take (server_id, channel_id, filename) keys and return a result per key.
+    # Backends with native batching get a few large calls; the rest get single-object calls
+    # pipelined through the worker pool.
+
+    BATCH_SIZE = 100
+
+    async def _bounded(self, calls: Iterable[Callable[[], Awaitable[Any]]]) -> List[Any]:
+        """
+        Run calls concurrently, at most max_workers at a time. Calls wait here rather
+        than in the pool's queue, so their timeouts only start once they're running.
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(call):
+            async with semaphore:
+                try:
+                    return await call()
+                except asyncio.TimeoutError:
+                    return asyncio.TimeoutError("Timed out")
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*(run(call) for call in calls))
+
+    async def _batched(self, operation: str, items: List[Any], key: Callable[[Any], str],
+                       single: Callable[[Any], Awaitable[Any]], many: Callable[[List[Any]], Any]) -> Dict[str, Any]:
+        """Dispatch a batch to the backend's native implementation or to pipelined single calls"""
+        if operation in self.backend.native_batch:
+            chunks = [items[start:start + self.BATCH_SIZE] for start in range(0, len(items), self.BATCH_SIZE)]
+            results: Dict[str, Any] = {}
+            outcomes = await self._bounded(functools.partial(self._run, many, chunk) for chunk in chunks)
+            for chunk, outcome in zip(chunks, outcomes):
+                if isinstance(outcome, Exception):
+                    results.update((key(item), outcome) for item in chunk)
+                else:
+                    results.update(outcome)
+            return results
+        outcomes = await self._bounded(functools.partial(single, item) for item in items)
+        return {key(item): outcome for item, outcome in zip(items, outcomes)}
+
+    async def read_many_json(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], Optional[Dict[str, Any]]]:
+        """Read several JSON files. Missing or unreadable files map to None (errors are logged)."""
+        paths = {self._get_blob_path(*key): key for key in keys}
+        results = await self._batched("read", list(paths), lambda path: path, self._read_object,
+                                      self.backend.read_many)
+        documents = {}
+        for path, stored in results.items():
+            documents[paths[path]] = None
+            if isinstance(stored, Exception):
+                logging.error(f"Error reading {path}: {str(stored)}")
+                continue
+            if stored is None:
+                self.invalidate(path)
+                continue
+            self._cache_put(path, stored)
+            try:
+                documents[paths[path]] = state_codec.decode(stored.data)
+            except Exception as e:
+                logging.error(f"Error reading {path}: {str(e)}")
+        return documents
+
+    async def write_many_json(self, documents: Dict[Tuple[str, str, str], Dict[str, Any]]) -> Dict[Tuple[str, str, str], bool]:
+        """Write several JSON files, replacing whatever is there. Returns whether each write succeeded."""
+        paths = {self._get_blob_path(*key): key for key in documents}
+        items = [(path, *self._encode(documents[key])) for path, key in paths.items()]
+        results = await self._batched(
+            "write", items, lambda item: item[0],
+            lambda item: self._run(self.backend.write_object, *item), self.backend.write_many
+        )
+        written = {}
+        for path, content, _ in items:
+            generation = results[path]
+            if isinstance(generation, Exception):
+                self.invalidate(path)
+                logging.error(f"Error writing {path}: {str(generation)}")
+            else:
+                self._cache_put(path, StoredObject(content, generation))
+            written[paths[path]] = not isinstance(generation, Exception)
+        return written
+
+    async def delete_many(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], bool]:
+        """Delete several files. Returns whether each delete succeeded."""
+        paths = {self._get_blob_path(*key): key for key in keys}
+        for path in paths:
+            self.invalidate(path)
+        results = await self._batched(
+            "delete", list(paths), lambda path: path,
+            lambda path: self._run(self.backend.delete, path), self.backend.delete_many
+        )
+        deleted = {}
+        for path, error in results.items():
+            if isinstance(error, Exception):
+                logging.error(f"Error deleting {path}: {str(error)}")
+            deleted[paths[path]] = not isinstance(error, Exception)
+        return deleted
+
+    async def clear_channel(self, server_id: str, channel_id: str) -> bool:
+        """Delete every file in a server/channel directory. Returns True if all were deleted."""
+        filenames = await self.list_files(server_id, channel_id)
+        results = await self.delete_many([(server_id, channel_id, filename) for filename in filenames])
+        return all(results.values())
+
     async def list_files(self, server_id: str, channel_id: str) -> list[str]:
         """List all files in a server/channel directory."""
         try:
             prefix = f"v4cb/{server_id}/{channel_id}/"
-            blobs = self.bucket.list_blobs(prefix=prefix)
-            return [blob.name.split('/')[-1] for blob in blobs]
+            names = await self._run(self.backend.list, prefix)
+            return [name.split('/')[-1] for name in names]
+        except asyncio.TimeoutError:
+            logging.error("Timed out listing files")
+            return []
         except Exception as e:
             logging.error(f"Error listing files: {str(e)}")
             return []
 
+    async def list_paths(self, prefix: str) -> List[str]:
+        """List every path under an arbitrary prefix, sorted."""
+        try:
+            return await self._run(self.backend.list, prefix)
+        except asyncio.TimeoutError:
+            logging.error(f"Timed out listing {prefix}")
+            return []
+        except Exception as e:
+            logging.error(f"Error listing {prefix}: {str(e)}")
+            return []
+
+    async def iter_paths(self, prefix: str, page_size: int = 1000) -> AsyncIterator[List[str]]:
+        """
+        List the paths under a prefix a page at a time, sorted, so callers never hold
+        every path at once. Stops early (after logging) if a page can't be listed.
+        """
+        start_after = None
+        while True:
+            try:
+                page = await self._run(self.backend.list_page, prefix, start_after, page_size)
+            except asyncio.TimeoutError:
+                logging.error(f"Timed out listing {prefix}")
+                return
+            except Exception as e:
+                logging.error(f"Error listing {prefix}: {str(e)}")
+                return
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            start_after = page[-1]
+
+    async def list_channels(self) -> Dict[Tuple[str, str], List[str]]:
+        """
+        List every server/channel directory with its files, using a single paginated
+        prefix listing instead of probing channels one by one.
+        """
+        try:
+            names = await self._run(self.backend.list, "v4cb/")
+            channels: Dict[Tuple[str, str], List[str]] = {}
+            for name in names:
+                parts = name.split('/')
+                if len(parts) != 4:
+                    continue
+                _, server_id, channel_id, filename = parts
+                channels.setdefault((server_id, channel_id), []).append(filename)
+            return channels
+        except asyncio.TimeoutError:
+            logging.error("Timed out listing channels")
+            return {}
+        except Exception as e:
+            logging.error(f"Error listing channels: {str(e)}")
+            return {}
+
     async def ensure_directory_exists(self, server_id: str, channel_id: str) -> bool:
         """
         Ensure the directory structure exists by creating an empty .keep file if needed.
@@ -80,11 +361,27 @@ class StorageManager:
         """
         try:
             blob_path = self._get_blob_path(server_id, channel_id, ".keep")
-            blob = self.bucket.blob(blob_path)
-            
-            if not blob.exists():
-                blob.upload_from_string("")
+            # Create-if-absent in one request; an existing marker is a precondition failure
+            await self._run(self.backend.write_object, blob_path, b"", "text/plain", if_generation_match=0)
+            return True
+        except PreconditionFailed:
             return True
+        except asyncio.TimeoutError:
+            logging.error("Timed out ensuring directory exists")
+            return False
         except Exception as e:
             logging.error(f"Error ensuring directory exists: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+_shared_storage: Optional[StorageManager] = None
+
+def shared_storage() -> StorageManager:
+    """
+    The process-wide StorageManager, created on first use. Games and other
+    components should share it (and with it, one worker pool and one backend
+    client) rather than building their own.
+    """
+    global _shared_storage
+    if _shared_storage is None:
+        _shared_storage = StorageManager()
+    return _shared_storage
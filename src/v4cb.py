@@ -1,76 +1,418 @@
-from typing import Dict, List, Set, Optional
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Set, Optional, Tuple
 import discord
-from storage_manager import StorageManager
+from storage_manager import StorageManager, shared_storage
+from card_db import CardDatabase
+from banned_list import BannedList
+from leaderboard import Leaderboard, ServerLeaderboard
+from v4cb_history import RoundHistory
+from v4cb_stats import STATS_FILE, CardStats
+from write_behind import CounterChanges, MapChanges, SetChanges, WriteBehindBuffer
 import logging
-from discord.ext import commands
+
+# All of a channel's state lives in one document
+STATE_FILE = "state.json"
+SCHEMA_VERSION = 2
+
+# Pseudo-document for the write-behind buffer: history segments with rounds to archive
+HISTORY = "history"
+
+# Layout used before the single state document; migrated on first load
+BANNED_LIST_FILE = "banned_list.json"
+SCORES_FILE = "scores.json"
+LEGACY_FILES = (BANNED_LIST_FILE, SCORES_FILE)
+
+# Writers whose last applied batch the state document remembers
+RECENT_WRITERS = 16
+
+def upgrade_state(state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bring a stored state document up to the current schema (None gives an empty state)"""
+    state = dict(state or {})
+    schema = state.get("schema", SCHEMA_VERSION)
+    if schema > SCHEMA_VERSION:
+        # Written by a newer version of the bot; overwriting it could drop data
+        raise ValueError(f"State schema {schema} is newer than supported ({SCHEMA_VERSION})")
+    state["schema"] = SCHEMA_VERSION
+    # Before schema 2 the flag wasn't stored, and any stored game counted as active
+    state.setdefault("is_active", schema < 2)
+    state.setdefault("banned_cards", [])
+    state.setdefault("scores", {})
+    # Logical clock: at least one higher on every write, so newer state never loses to older
+    state.setdefault("version", 0)
+    # Version at which each field was last replaced wholesale (e.g. /v4cb_set_banned)
+    state.setdefault("replaced_at", {})
+    # Current round, keyed by user ID so it survives restarts
+    state.setdefault("submissions", {})
+    state.setdefault("round_revealed", False)
+    # Round history manifest, plus resolved rounds not yet written to a history segment
+    state.setdefault("history", {"rounds": 0})
+    state.setdefault("unarchived", [])
+    # Per writer (game instance), the number of its last batch of changes applied here
+    state.setdefault("writers", {})
+    return state
+
+class Submission:
+    """A player's cards for the current round"""
+    def __init__(self, user_id: int, name: str, display_name: str, cards: List[str]):
+        self.user_id = user_id
+        self.name = name
+        self.display_name = display_name
+        self.cards = cards
+
+    @classmethod
+    def from_json(cls, user_id: str, data: Dict[str, Any]) -> "Submission":
+        return cls(int(user_id), data["name"], data["display_name"], data["cards"])
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"name": self.name, "display_name": self.display_name, "cards": self.cards}
+
+class StateBatch:
+    """
+    Changes taken from a game for one state write. Batches are numbered per
+    writer, so a batch whose write timed out (and may have landed anyway) is
+    skipped rather than applied again when it's retried.
+    """
+    def __init__(self, number: int, banned: SetChanges, scores: CounterChanges, submissions: MapChanges,
+                 revealed: Optional[bool], active: Optional[bool], rounds: List[Dict[str, Any]]):
+        self.number = number
+        self.banned = banned
+        self.scores = scores
+        self.submissions = submissions
+        self.revealed = revealed
+        self.active = active
+        self.rounds = rounds
 
 class V4CBGame:
-    def __init__(self, channel_id: int, server_id: int):
+    STATE_FILES = (STATE_FILE,) + LEGACY_FILES
+
+    def __init__(self, channel_id: int, server_id: int, card_db: Optional[CardDatabase] = None,
+                 storage: Optional[StorageManager] = None, flush_delay: float = 2.0):
         self.channel_id = str(channel_id)  # Convert to string for storage
         self.server_id = str(server_id)    # Convert to string for storage
-        self.banned_cards: Set[str] = set()
-        self.submissions: Dict[discord.Member, List[str]] = {}
+        # Sorted and paged, so showing the banned list doesn't re-sort it
+        self.banned_cards = BannedList()
+        # Per banned-list page: the page text an embed was built from, and the embed
+        self._embed_cache: Dict[int, Tuple[str, discord.Embed]] = {}
+        self.submissions: Dict[int, Submission] = {}
         self.is_active = False
         self.scores: Dict[str, int] = {}
+        # Scores in rank order, plus the server-wide totals this channel contributes to (set by the registry)
+        self.leaderboard = Leaderboard()
+        self.server_leaderboard: Optional[ServerLeaderboard] = None
         self.current_round_revealed = False
-        self.storage = StorageManager()
+        self.storage = storage or shared_storage()
+        self.card_db = card_db
+        # Changes are written behind: each mutation marks its document dirty, and
+        # bursts of mutations are flushed together after `flush_delay` seconds
+        self._writes = WriteBehindBuffer(self._write_documents, delay=flush_delay)
+        # What changed since the last flush, replayed onto the stored documents so that
+        # concurrent writers (e.g. another bot instance) don't overwrite each other
+        self._banned_changes = SetChanges()
+        self._score_changes = CounterChanges()
+        self._submission_changes = MapChanges()
+        self._revealed_change: Optional[bool] = None
+        self._active_change: Optional[bool] = None
+        # Resolved rounds waiting for a round number from the next state write
+        self._pending_rounds: List[Dict[str, Any]] = []
+        # Batches written without confirmation; they're sent again, in order, with the next write
+        self._writer_id = uuid.uuid4().hex[:12]
+        self._batch_number = 0
+        self._unconfirmed: List[StateBatch] = []
+        self.history = RoundHistory(self.storage, self.server_id, self.channel_id)
+        # Card statistics, read on first use and updated as rounds are recorded
+        self.stats: Optional[CardStats] = None
+        self._stats_stale = False
+        # Held while updating or rebuilding the statistics, which happens outside `lock` (on flush,
+        # and from read-only commands), so an older count never replaces a newer one
+        self._stats_lock = asyncio.Lock()
+        # Mutating commands hold this for their whole read-modify-respond sequence, so
+        # mutations in a channel never interleave; read-only commands don't take it
+        self.lock = asyncio.Lock()
+        # Set once the game has been reset; commands that were waiting on the lock use the channel's new game
+        self.closed = False
+        # Incremented by every mutation and carried into storage with it
+        self.version = 0
         
     @staticmethod
-    async def game_exists(storage: StorageManager, server_id: str, channel_id: str) -> bool:
-        """Check if a game exists in storage for this channel"""
-        try:
-            banned_data = await storage.read_json(server_id, channel_id, "banned_list.json")
-            scores_data = await storage.read_json(server_id, channel_id, "scores.json")
-            return banned_data is not None or scores_data is not None
-        except Exception as e:
-            logging.error(f"Error checking game existence: {str(e)}")
-            return False
+    async def discover(storage: StorageManager) -> List[tuple[str, str]]:
+        """List the (server_id, channel_id) pairs that have a game in storage"""
+        channels = await storage.list_channels()
+        return [
+            channel for channel, files in channels.items()
+            if any(filename in V4CBGame.STATE_FILES for filename in files)
+        ]
 
-    async def load_state(self) -> None:
-        """Load game state from storage"""
+    async def load_state(self) -> bool:
+        """
+        Load game state from storage, migrating the old per-file layout if needed.
+        Returns True if the channel has stored state.
+        """
         try:
-            # Load banned list
-            banned_data = await self.storage.read_json(self.server_id, self.channel_id, "banned_list.json")
-            if banned_data:
-                self.banned_cards = set(banned_data.get("cards", []))
-                self.is_active = True  # If we have data, the game is active
-            
-            # Load scores
-            scores_data = await self.storage.read_json(self.server_id, self.channel_id, "scores.json")
-            if scores_data:
-                self.scores = scores_data.get("scores", {})
-                
+            state = await self.storage.read_json(self.server_id, self.channel_id, STATE_FILE)
+            if state is None:
+                state = await self._migrate_legacy_state()
+            if state is not None:
+                self.apply_state(state)
+                return True
         except Exception as e:
             logging.error(f"Error loading game state: {str(e)}")
+        return False
+
+    def apply_state(self, state: Dict[str, Any]) -> None:
+        """Hydrate from a state document that has already been read, e.g. by a batch load"""
+        state = upgrade_state(state)
+        self.banned_cards.replace(state["banned_cards"])
+        self.scores = state["scores"]
+        self._scores_changed()
+        self.submissions = {
+            int(user_id): Submission.from_json(user_id, data) for user_id, data in state["submissions"].items()
+        }
+        self.current_round_revealed = state["round_revealed"]
+        self.version = max(self.version, state["version"])
+        # Rounds a previous run didn't get to archive are archived on the next write
+        self.history.apply_manifest(state["history"], state["unarchived"])
+        self.is_active = state["is_active"]
+
+    async def _migrate_legacy_state(self) -> Optional[Dict[str, Any]]:
+        """Fold the old banned_list.json and scores.json into a state document"""
+        keys = [(self.server_id, self.channel_id, filename) for filename in LEGACY_FILES]
+        documents = await self.storage.read_many_json(keys)
+        banned_data, scores_data = (documents[key] for key in keys)
+        if banned_data is None and scores_data is None:
+            return None
+        state = upgrade_state({
+            "is_active": True,
+            "banned_cards": sorted((banned_data or {}).get("cards", [])),
+            "scores": (scores_data or {}).get("scores", {}),
+        })
+        # Only create the document if nobody else has; a concurrent migration wins
+        merged = await self.storage.update_json(self.server_id, self.channel_id, STATE_FILE,
+                                                lambda current: upgrade_state(current) if current else state)
+        if merged is None:
+            # Keep the old files so the next load can try again
+            return state
+        await self.storage.delete_many(keys)
+        logging.info(f"Migrated V4CB state for channel {self.channel_id} to {STATE_FILE}")
+        return merged
 
-    async def save_state(self) -> None:
-        """Save current game state to storage"""
+    async def delete_state(self) -> bool:
+        """
+        Reset the game and delete everything stored for this channel, closing
+        this instance for good. Returns True on success.
+        """
+        self.closed = True
+        await self._writes.discard()
+        self._banned_changes = SetChanges()
+        self._score_changes = CounterChanges()
+        self._submission_changes = MapChanges()
+        self._revealed_change = None
+        self._active_change = None
+        self._pending_rounds = []
+        self._unconfirmed = []
+        self.history = RoundHistory(self.storage, self.server_id, self.channel_id)
+        self.stats = None
+        self._stats_stale = False
+        self.banned_cards.clear()
+        self.scores = {}
+        # Withdraw this channel's scores from the server leaderboard, then stop feeding it
+        self._scores_changed()
+        self.server_leaderboard = None
+        self.submissions.clear()
+        self.current_round_revealed = False
+        self.is_active = False
+        return await self.storage.clear_channel(self.server_id, self.channel_id)
+
+    @property
+    def has_unsaved_changes(self) -> bool:
+        return self._writes.is_dirty
+
+    async def save_state(self) -> bool:
+        """Write any unsaved changes to storage now. Returns True if everything was saved."""
+        return await self._writes.flush()
+
+    def _changed(self) -> int:
+        """Record a mutation: bump the state version and schedule a write. Returns the new version."""
+        self.version += 1
+        self._writes.mark_dirty(STATE_FILE)
+        return self.version
+
+    def _apply_changes(self, state: Dict[str, Any], field: str, changes, value):
+        """Apply pending changes to a stored field, refusing to persist a replacement older than the stored one"""
+        if changes.replacement is not None:
+            if changes.replaced_at < state["replaced_at"].get(field, 0):
+                logging.warning(f"Not persisting stale {field} replacement (version {changes.replaced_at}) "
+                                f"for channel {self.channel_id}")
+                changes = changes.without_replacement()
+            else:
+                state["replaced_at"][field] = changes.replaced_at
+        return changes.apply(value)
+
+    async def _write_documents(self, documents: Set[str]) -> Set[str]:
+        """Write the state document, count and archive resolved rounds, returning what failed"""
+        failed = set()
+        if STATE_FILE in documents and not await self._write_state():
+            failed.add(STATE_FILE)
+        # Before archiving, while the new rounds can still be counted without reading them back
+        if self._stats_stale and not await self._update_stats():
+            failed.add(STATS_FILE)
+        if self.history.unarchived and not await self.history.archive():
+            failed.add(HISTORY)
+        return failed
+
+    def _take_batch(self) -> StateBatch:
+        """Take the changes made since the last write as a new numbered batch"""
+        self._batch_number += 1
+        batch = StateBatch(self._batch_number, self._banned_changes, self._score_changes,
+                           self._submission_changes, self._revealed_change, self._active_change,
+                           self._pending_rounds)
+        self._banned_changes = SetChanges()
+        self._score_changes = CounterChanges()
+        self._submission_changes = MapChanges()
+        self._revealed_change = None
+        self._active_change = None
+        self._pending_rounds = []
+        return batch
+
+    def _apply_batch(self, state: Dict[str, Any], batch: StateBatch) -> None:
+        state["banned_cards"] = sorted(
+            self._apply_changes(state, "banned_cards", batch.banned, set(state["banned_cards"]))
+        )
+        state["scores"] = self._apply_changes(state, "scores", batch.scores, state["scores"])
+        state["submissions"] = self._apply_changes(state, "submissions", batch.submissions, state["submissions"])
+        if batch.revealed is not None:
+            state["round_revealed"] = batch.revealed
+        if batch.active is not None:
+            state["is_active"] = batch.active
+        # Number the new rounds and hold them here until they're in a history segment
+        history = dict(state["history"])
+        first = history.get("rounds", 0)
+        history["rounds"] = first + len(batch.rounds)
+        history.setdefault("segment_size", self.history.segment_size)
+        state["history"] = history
+        state["unarchived"] = state["unarchived"] + [
+            {**record, "round": first + offset} for offset, record in enumerate(batch.rounds)
+        ]
+
+    async def _write_state(self) -> bool:
+        batches = self._unconfirmed + [self._take_batch()]
+        self._unconfirmed = []
+        archived = set(self.history.archived)
+        version = self.version
+
+        def merge(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            state = upgrade_state(current)
+            state["unarchived"] = [record for record in state["unarchived"] if record["round"] not in archived]
+            writers = dict(state["writers"])
+            applied = writers.pop(self._writer_id, 0)
+            for batch in batches:
+                if batch.number > applied:
+                    self._apply_batch(state, batch)
+            # Most recent writer last, so the oldest are dropped first
+            writers[self._writer_id] = batches[-1].number
+            state["writers"] = dict(list(writers.items())[-RECENT_WRITERS:])
+            state["version"] = max(state["version"] + 1, version)
+            return state
+
+        merged = None
         try:
-            # Save banned list
-            await self.storage.write_json(
-                self.server_id,
-                self.channel_id,
-                "banned_list.json",
-                {"cards": list(self.banned_cards)}
-            )
-            
-            # Save scores
-            await self.storage.write_json(
-                self.server_id,
-                self.channel_id,
-                "scores.json",
-                {"scores": self.scores}
-            )
-            
-        except Exception as e:
-            logging.error(f"Error saving game state: {str(e)}")
+            merged = await self.storage.update_json(self.server_id, self.channel_id, STATE_FILE, merge)
+        finally:
+            if merged is None:
+                # Failed, timed out or cancelled: send the same batches again with the next write.
+                # If this write landed after all, the stored batch number makes the retry skip them
+                self._unconfirmed = batches
+        if merged is None:
+            return False
+        # Pick up other writers' changes, keeping local ones made while the write was in flight
+        self.banned_cards.replace(self._banned_changes.apply(set(merged["banned_cards"])))
+        self.scores = self._score_changes.apply(merged["scores"])
+        self._scores_changed()
+        self.submissions = {
+            int(user_id): Submission.from_json(user_id, data)
+            for user_id, data in self._submission_changes.apply(merged["submissions"]).items()
+        }
+        if self._revealed_change is None:
+            self.current_round_revealed = merged["round_revealed"]
+        if self._active_change is None:
+            self.is_active = merged["is_active"]
+        self.version = max(self.version, merged["version"])
+        # Rounds confirmed archived are now out of the state document too
+        self.history.archived -= archived
+        if merged["history"]["rounds"] > self.history.total:
+            self._stats_stale = True
+        self.history.apply_manifest(merged["history"], merged["unarchived"])
+        return True
+
+    async def card_stats(self) -> CardStats:
+        """Card statistics for this channel, counting any rounds recorded since they were last updated"""
+        if self.stats is None or self.stats.through < self.history.total:
+            await self._update_stats()
+        return self.stats or CardStats()
+
+    async def _update_stats(self) -> bool:
+        """Count rounds recorded since the stored statistics were last updated. Returns True if up to date."""
+        async with self._stats_lock:
+            if self.stats is None:
+                stored = await self.storage.read_json(self.server_id, self.channel_id, STATS_FILE)
+                self.stats = CardStats.from_json(stored)
+            if self.stats.through >= self.history.total:
+                self._stats_stale = False
+                return True
+            records = await self.history.rounds(self.stats.through, self.history.total)
+
+            def merge(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+                stats = CardStats.from_json(current)
+                stats.add_rounds(records)
+                return stats.to_json()
+
+            merged = await self.storage.update_json(self.server_id, self.channel_id, STATS_FILE, merge)
+            if merged is None:
+                return False
+            self.stats = CardStats.from_json(merged)
+            self._stats_stale = self.stats.through < self.history.total
+            return not self._stats_stale
+
+    async def rebuild_stats(self) -> CardStats:
+        """Recompute the card statistics from the whole round history, one segment at a time"""
+        async with self._stats_lock:
+            stats = CardStats()
+            async for record in self.history.iter_rounds():
+                if record["round"] != stats.through:
+                    # A segment couldn't be read; the rounds after it are counted on the next update
+                    break
+                stats.add_round(record)
+
+            # Counts always cover exactly rounds 0..through-1, so replacing the stored copy is safe,
+            # unless another process has meanwhile counted further than this rebuild got
+            def merge(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+                stored = CardStats.from_json(current)
+                return stored.to_json() if stored.through > stats.through else stats.to_json()
+
+            merged = await self.storage.update_json(self.server_id, self.channel_id, STATS_FILE, merge)
+            if merged is not None:
+                self.stats = CardStats.from_json(merged)
+        return await self.card_stats()
+
+    def normalize_card(self, card: str) -> str:
+        """Canonicalize a card name through the card database (if loaded) and lowercase it"""
+        canonical = self.card_db.canonical(card) if self.card_db else None
+        return (canonical or card.strip()).lower()
+
+    def unknown_cards(self, cards: List[str]) -> List[str]:
+        """Return the cards that aren't in the card database (empty if no database is loaded)"""
+        if not self.card_db:
+            return []
+        return [card for card in cards if self.card_db.canonical(card) is None]
 
     async def start_game(self, banned_list: List[str]) -> None:
         """Start a new game with the given banned list"""
-        self.banned_cards = set(card.lower() for card in banned_list)
-        self.submissions.clear()
+        self.banned_cards.replace(self.normalize_card(card) for card in banned_list)
         self.is_active = True
-        await self.save_state()
+        self._active_change = True
+        self._banned_changes.replace(self.banned_cards, self._changed())
+        self._clear_round()
     
     def submit_cards(self, player: discord.Member, cards: List[str]) -> tuple[bool, Optional[str]]:
         """
@@ -79,13 +421,25 @@ class V4CBGame:
         if not self.is_active:
             return False, "No active game in this channel!"
             
-        # Convert to lowercase for comparison
-        cards = [card.lower() for card in cards]
-        
-        # Check if exactly 4 cards
+        # Check the count first (ignoring blanks from stray commas) so a malformed
+        # submission never pays for a card database lookup per entry
+        cards = [card.strip() for card in cards if card.strip()]
         if len(cards) != 4:
             return False, "You must submit exactly 4 cards!"
             
+        # Reject names the card database doesn't know, with suggestions for likely typos
+        unknown = self.unknown_cards(cards)
+        if unknown:
+            lines = []
+            for card in unknown:
+                suggestions = self.card_db.suggest(card)
+                hint = f" (did you mean {' or '.join(suggestions)}?)" if suggestions else ""
+                lines.append(f"• {card}{hint}")
+            return False, "Unknown card name(s):\n" + "\n".join(lines)
+        
+        # Canonicalize and lowercase for comparison
+        cards = [self.normalize_card(card) for card in cards]
+            
         # Check for duplicates
         if len(set(cards)) != 4:
             return False, "All cards must be unique!"
@@ -95,56 +449,96 @@ class V4CBGame:
         if banned_cards:
             return False, f"**Submission Refused:** Your submission contains banned card(s):\n**{', '.join(banned_cards)}**\n\nPlease submit a new set of cards that doesn't include banned cards."
             
-        self.submissions[player] = cards
+        submission = Submission(player.id, player.name, player.display_name, cards)
+        self.submissions[player.id] = submission
+        self._submission_changes.set(str(player.id), submission.to_json())
+        self._changed()
         return True, None
     
-    def get_all_submissions(self) -> Dict[discord.Member, List[str]]:
+    def get_all_submissions(self) -> Dict[int, Submission]:
         """Get all submissions for reveal"""
         return self.submissions
     
     async def clear_submissions(self) -> None:
         """Clear all current submissions without ending the game"""
+        self._clear_round()
+
+    def _clear_round(self) -> None:
+        """Drop the current round's submissions, in memory and in storage"""
         self.submissions.clear()
-        # No need to save state as submissions are temporary
+        self.current_round_revealed = False
+        self._submission_changes.replace({}, self._changed())
+        self._revealed_change = False
 
-    def reveal(self) -> Dict[discord.Member, List[str]]:
+    def reveal(self) -> Dict[int, Submission]:
         """Get all submissions but don't clear them until winner is submitted"""
         submissions = self.submissions.copy()
-        self.current_round_revealed = True
+        if submissions and not self.current_round_revealed:
+            self.current_round_revealed = True
+            self._revealed_change = True
+            self._changed()
         return submissions
     
     async def update_banned_list(self, new_banned_cards: List[str]) -> None:
         """Add new cards to the banned list"""
-        self.banned_cards.update(card.lower() for card in new_banned_cards)
-        await self.save_state()
+        cards = set(self.normalize_card(card) for card in new_banned_cards)
+        self.banned_cards.update(cards)
+        self._banned_changes.add(cards)
+        self._changed()
     
+    async def import_banned_list(self, cards: List[str], replace: bool = False) -> Tuple[Set[str], Set[str], bool]:
+        """
+        Apply an imported card list as one change: added to the banned list, or
+        replacing it. The result is saved immediately in a single write.
+        Returns (added, removed, saved).
+        """
+        normalized = set(self.normalize_card(card) for card in cards if card.strip())
+        if replace:
+            old_cards = self.banned_cards.copy()
+            self.banned_cards.replace(normalized)
+            self._banned_changes.replace(normalized, self._changed())
+            added, removed = normalized - old_cards, old_cards - normalized
+        else:
+            added = {card for card in normalized if card not in self.banned_cards}
+            removed = set()
+            self.banned_cards.update(added)
+            self._banned_changes.add(added)
+            self._changed()
+        saved = await self.save_state()
+        return added, removed, saved
+
     async def end_game(self) -> None:
         """End the current game"""
         self.is_active = False
-        self.submissions.clear()
+        self._active_change = False
+        self._clear_round()
+        # Flush anything still pending rather than waiting for the write-behind delay
         await self.save_state()
     
     async def set_banned_list(self, banned_list: List[str]) -> None:
         """Overwrite the current banned list with a new one"""
-        self.banned_cards = set(card.lower() for card in banned_list)
-        await self.save_state()
+        self.banned_cards.replace(self.normalize_card(card) for card in banned_list)
+        self._banned_changes.replace(self.banned_cards, self._changed())
     
     async def clear_banned_list(self) -> None:
         """Clear all cards from the banned list"""
         self.banned_cards.clear()
-        await self.save_state()
+        self._banned_changes.replace(set(), self._changed())
     
     async def remove_banned_card(self, card: str) -> tuple[bool, Optional[str]]:
         """
         Remove a single card from the banned list
         Returns (success, error_message)
         """
-        card = card.lower()
+        # Fall back to the plain lowercased name for entries banned before canonicalization
+        normalized = self.normalize_card(card)
+        card = normalized if normalized in self.banned_cards else card.strip().lower()
         if card not in self.banned_cards:
             return False, f"Card '{card}' is not in the banned list"
         
         self.banned_cards.remove(card)
-        await self.save_state()
+        self._banned_changes.remove([card])
+        self._changed()
         return True, None
 
     async def submit_winner(self, winner_names: List[str]) -> tuple[bool, Optional[str]]:
@@ -157,17 +551,21 @@ class V4CBGame:
         
         # Create mapping of both name and display_name to the display_name
         name_mapping = {}
-        for player in self.submissions.keys():
-            name_mapping[player.name.lower()] = player.display_name
-            name_mapping[player.display_name.lower()] = player.display_name
+        winner_ids = {}
+        for submission in self.submissions.values():
+            for name in (submission.name, submission.display_name):
+                name_mapping[name.lower()] = submission.display_name
+                winner_ids[name.lower()] = submission.user_id
         
         # Validate all winners are current players and convert to display_names
         display_names = []
+        winners = []
         invalid_winners = []
         for name in winner_names:
             name_lower = name.strip().lower()
             if name_lower in name_mapping:
                 display_names.append(name_mapping[name_lower])
+                winners.append(winner_ids[name_lower])
             else:
                 invalid_winners.append(name)
         
@@ -180,15 +578,29 @@ class V4CBGame:
             if display_name not in self.scores:
                 self.scores[display_name] = 0
             self.scores[display_name] += 1
+            self._score_changes.increment(display_name)
+        self._scores_changed()
         
-        # Clear submissions for next round
-        self.submissions.clear()
-        self.current_round_revealed = False
+        # Record the round; it's numbered and archived when the state is next written
+        self._pending_rounds.append({
+            "round": None,
+            "timestamp": time.time(),
+            "submissions": {str(user_id): submission.to_json() for user_id, submission in self.submissions.items()},
+            "winners": [str(user_id) for user_id in winners],
+            "winner_names": display_names,
+        })
         
-        # Save the updated scores
-        await self.save_state()
+        # Clear submissions for next round. Scores, the cleared round and the record
+        # are written behind, together with any other changes in this burst
+        self._clear_round()
         return True, None
 
+    def _scores_changed(self) -> None:
+        """Bring the channel and server leaderboards up to date with the scores"""
+        self.leaderboard.replace(self.scores)
+        if self.server_leaderboard is not None:
+            self.server_leaderboard.update_channel(self.channel_id, self.scores)
+
     def get_scores(self) -> Dict[str, int]:
         """Get current game scores"""
         return self.scores
@@ -196,61 +608,66 @@ class V4CBGame:
     async def set_scores(self, new_scores: Dict[str, int]) -> None:
         """Overwrite the current scores"""
         self.scores = new_scores.copy()
-        await self.save_state()
+        self._scores_changed()
+        self._score_changes.replace(self.scores, self._changed())
 
     async def get_banned_list_pages(self) -> List[str]:
         """Get the banned list formatted into pages"""
         if not self.banned_cards:
             return ["No cards are currently banned."]
-            
-        # Sort the banned cards alphabetically
-        sorted_cards = sorted(self.banned_cards)
-        
-        # Create a paginator with appropriate line length for embeds
-        paginator = commands.Paginator(prefix="", suffix="", max_size=1024)
-        
-        # Add each card on its own line with a bullet point
-        for card in sorted_cards:
-            paginator.add_line(f"• {card}")
-        
-        return paginator.pages
+        return self.banned_cards.pages()
 
-    async def create_banned_list_embeds(self) -> List[discord.Embed]:
-        """Create a list of embeds for the banned list"""
-        pages = await self.get_banned_list_pages()
-        embeds = []
-        
-        for i, page in enumerate(pages, 1):
-            embed = discord.Embed(
-                title=f"Banned Cards ({len(self.banned_cards)} total)",  # Added total count
-                description=page,
-                color=discord.Color.red()
-            )
-            embed.set_footer(text=f"Page {i}/{len(pages)}")
-            embeds.append(embed)
-            
-        return embeds
+    def banned_list_embed(self, index: int) -> discord.Embed:
+        """
+        The embed for one page of the banned list. It's rebuilt only when that
+        page's text changes; the totals in the title and footer change with any
+        page, so they're filled in each time the embed is shown.
+        """
+        page_count = self.banned_cards.page_count
+        for stale in [page for page in self._embed_cache if page >= page_count]:
+            del self._embed_cache[stale]
+        text = self.banned_cards.page_text(index)
+        cached = self._embed_cache.get(index)
+        if cached is not None and cached[0] == text:
+            embed = cached[1]
+        else:
+            embed = discord.Embed(description=text, color=discord.Color.red())
+            self._embed_cache[index] = (text, embed)
+        embed.title = f"Banned Cards ({len(self.banned_cards)} total)"
+        embed.set_footer(text=f"Page {index + 1}/{page_count}")
+        return embed
 
 class BannedListPaginator(discord.ui.View):
-    def __init__(self, embeds: List[discord.Embed]):
+    """Pages through a game's banned list, building each page's embed only when it's shown"""
+    def __init__(self, game: V4CBGame):
         super().__init__(timeout=180)  # 3 minute timeout
-        self.embeds = embeds
+        self.game = game
         self.current_page = 0
         
         # Disable buttons if there's only one page
-        if len(self.embeds) == 1:
+        if game.banned_cards.page_count <= 1:
             self.children[0].disabled = True
             self.children[1].disabled = True
 
+    def current_embed(self) -> discord.Embed:
+        return self.game.banned_list_embed(self.current_page)
+
+    async def _turn(self, interaction: discord.Interaction, step: int):
+        # The list may have changed since the view was sent, so wrap with the current page count
+        page_count = max(1, self.game.banned_cards.page_count)
+        self.current_page = (self.current_page + step) % page_count
+        if not self.game.banned_cards:
+            await interaction.response.edit_message(content="No cards are currently banned.", embed=None)
+            return
+        await interaction.response.edit_message(embed=self.current_embed())
+
     @discord.ui.button(label="Previous", style=discord.ButtonStyle.gray)
     async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_page = (self.current_page - 1) % len(self.embeds)
-        await interaction.response.edit_message(embed=self.embeds[self.current_page])
+        await self._turn(interaction, -1)
 
     @discord.ui.button(label="Next", style=discord.ButtonStyle.gray)
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_page = (self.current_page + 1) % len(self.embeds)
-        await interaction.response.edit_message(embed=self.embeds[self.current_page])
+        await self._turn(interaction, 1)
 
     async def on_timeout(self):
         # Disable all buttons when the view times out
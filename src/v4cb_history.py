@@ -0,0 +1,91 @@
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from storage_manager import StorageManager
+
+# Rounds per history segment. A segment is rewritten when a round is appended to it,
+# so appends cost O(SEGMENT_SIZE) no matter how long the history gets.
+SEGMENT_SIZE = 100
+
+def segment_filename(index: int) -> str:
+    return f"history-{index:05d}.json"
+
+class RoundHistory:
+    """
+    Append-only log of a channel's resolved rounds, stored as numbered
+    segments of SEGMENT_SIZE rounds each. Round numbers are assigned in the
+    channel's state document (which also lists rounds not yet archived into a
+    segment), so the log never needs to be listed or read in full.
+    """
+    def __init__(self, storage: StorageManager, server_id: str, channel_id: str):
+        self.storage = storage
+        self.server_id = server_id
+        self.channel_id = channel_id
+        # Number of rounds ever recorded, from the state document's manifest
+        self.total = 0
+        self.segment_size = SEGMENT_SIZE
+        # Numbered rounds that are in the state document but not yet in a segment
+        self.unarchived: Dict[int, Dict[str, Any]] = {}
+        # Round numbers written to their segment since the state document was last saved
+        self.archived: set = set()
+
+    def apply_manifest(self, manifest: Dict[str, Any], unarchived: Iterable[Dict[str, Any]]) -> None:
+        self.total = max(self.total, manifest.get("rounds", 0))
+        self.segment_size = manifest.get("segment_size", SEGMENT_SIZE)
+        self.unarchived = {
+            record["round"]: record for record in unarchived if record["round"] not in self.archived
+        }
+
+    async def archive(self) -> bool:
+        """Write unarchived rounds into their segments. Returns True if none are left."""
+        by_segment: Dict[int, List[Dict[str, Any]]] = {}
+        for number, record in self.unarchived.items():
+            by_segment.setdefault(number // self.segment_size, []).append(record)
+
+        for index, records in sorted(by_segment.items()):
+            def merge(current: Optional[Dict[str, Any]], index=index, records=records) -> Dict[str, Any]:
+                # Keyed by round number, so re-archiving a round (e.g. after a crash) is harmless
+                rounds = {record["round"]: record for record in (current or {}).get("rounds", [])}
+                rounds.update((record["round"], record) for record in records)
+                return {"schema": 1, "segment": index, "rounds": [rounds[number] for number in sorted(rounds)]}
+
+            written = await self.storage.update_json(self.server_id, self.channel_id, segment_filename(index), merge)
+            if written is None:
+                logging.error(f"Error archiving history segment {index} for channel {self.channel_id}")
+                continue
+            for record in records:
+                self.unarchived.pop(record["round"], None)
+                self.archived.add(record["round"])
+        return not self.unarchived
+
+    async def rounds(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Rounds numbered start..stop-1, reading only the segments that cover them"""
+        start, stop = max(0, start), min(stop, self.total)
+        if start >= stop:
+            return []
+        found = {number: record for number, record in self.unarchived.items() if start <= number < stop}
+        if len(found) == stop - start:
+            # Recent rounds are usually still in the state document, so nothing needs reading
+            return [found[number] for number in sorted(found)]
+        indexes = range(start // self.segment_size, (stop - 1) // self.segment_size + 1)
+        segments = await self.storage.read_many_json(
+            [(self.server_id, self.channel_id, segment_filename(index)) for index in indexes]
+        )
+        for segment in segments.values():
+            for record in (segment or {}).get("rounds", []):
+                if start <= record["round"] < stop:
+                    found.setdefault(record["round"], record)
+        return [found[number] for number in sorted(found)]
+
+    async def page(self, page: int, per_page: int = 5) -> List[Dict[str, Any]]:
+        """One page of rounds, newest first (page 1 is the most recent)"""
+        stop = self.total - (page - 1) * per_page
+        return list(reversed(await self.rounds(stop - per_page, stop)))
+
+    def page_count(self, per_page: int = 5) -> int:
+        return max(1, -(-self.total // per_page))
+
+    async def iter_rounds(self) -> AsyncIterator[Dict[str, Any]]:
+        """Every recorded round, oldest first, one segment at a time"""
+        for start in range(0, self.total, self.segment_size):
+            for record in await self.rounds(start, start + self.segment_size):
+                yield record
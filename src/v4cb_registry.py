@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from card_db import CardDatabase
+from leaderboard import ServerLeaderboard
+from storage_manager import StorageManager
+from v4cb import STATE_FILE, V4CBGame
+
+class V4CBGameRegistry:
+    """
+    In-memory cache of V4CB games. Games are hydrated from storage on first use
+    and evicted once they have been idle for `idle_timeout` seconds.
+    """
+    def __init__(self, storage: StorageManager, card_db_loader: Optional[Callable[[], Awaitable[CardDatabase]]] = None,
+                 idle_timeout: float = 3600, flush_delay: float = 2.0):
+        self.storage = storage
+        # Called when a game is first loaded, so the card database is only read if V4CB is used
+        self.card_db_loader = card_db_loader
+        self.idle_timeout = idle_timeout
+        self.flush_delay = flush_delay
+        self.games: Dict[int, V4CBGame] = {}
+        self._last_used: Dict[int, float] = {}
+        self._loading: Dict[int, asyncio.Task] = {}
+        # Server-wide leaderboards stay in memory; they're small and every game in the server feeds them
+        self.leaderboards: Dict[int, ServerLeaderboard] = {}
+        self._leaderboards_loading: Dict[int, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def peek(self, channel_id: int) -> Optional[V4CBGame]:
+        """Return the game if it's already in memory, without loading it"""
+        return self.games.get(channel_id)
+
+    async def get(self, channel_id: int, server_id: int, create: bool = True) -> Optional[V4CBGame]:
+        """
+        Return the game for a channel, loading it from storage if needed.
+        Concurrent first requests for the same channel share a single load.
+
+        A channel with nothing stored only gets a game in memory if `create`
+        is set (e.g. for mutating commands); otherwise this returns None, so
+        read-only commands in channels without a game don't fill the cache.
+        """
+        game = self.games.get(channel_id)
+        if game is None:
+            task = self._loading.get(channel_id)
+            if task is None:
+                task = asyncio.create_task(self._load(channel_id, server_id))
+                self._loading[channel_id] = task
+            # Shield the shared load so one cancelled caller doesn't cancel it for everyone
+            loaded, found, board = await asyncio.shield(task)
+            # Another caller sharing the load may have kept the game already
+            game = self.games.get(channel_id)
+            if game is None:
+                if not found and not create:
+                    return None
+                game = loaded
+                self._attach(game, board)
+                self.games[channel_id] = game
+        self._last_used[channel_id] = time.monotonic()
+        return game
+
+    async def _card_db(self) -> Optional[CardDatabase]:
+        return await self.card_db_loader() if self.card_db_loader else None
+
+    def _new_game(self, channel_id: int, server_id: int, card_db: Optional[CardDatabase]) -> V4CBGame:
+        return V4CBGame(channel_id, server_id, card_db=card_db, storage=self.storage, flush_delay=self.flush_delay)
+
+    async def server_leaderboard(self, server_id: int) -> ServerLeaderboard:
+        """Return the server's leaderboard, loading it from storage on first use"""
+        board = self.leaderboards.get(server_id)
+        if board is not None:
+            return board
+
+        task = self._leaderboards_loading.get(server_id)
+        if task is None:
+            task = asyncio.create_task(self._load_leaderboard(server_id))
+            self._leaderboards_loading[server_id] = task
+        return await asyncio.shield(task)
+
+    async def _load_leaderboard(self, server_id: int) -> ServerLeaderboard:
+        try:
+            board = ServerLeaderboard(self.storage, server_id, flush_delay=self.flush_delay)
+            await board.load()
+            self.leaderboards[server_id] = board
+            return board
+        finally:
+            self._leaderboards_loading.pop(server_id, None)
+
+    def _attach(self, game: V4CBGame, board: ServerLeaderboard) -> None:
+        """Feed a game's scores into its server's leaderboard, now and on every change"""
+        game.server_leaderboard = board
+        board.update_channel(game.channel_id, game.scores)
+
+    async def _load(self, channel_id: int, server_id: int) -> Tuple[V4CBGame, bool, ServerLeaderboard]:
+        """Read a game and its server's leaderboard; get() decides whether to keep it"""
+        try:
+            game = self._new_game(channel_id, server_id, await self._card_db())
+            found = await game.load_state()
+            return game, found, await self.server_leaderboard(server_id)
+        finally:
+            self._loading.pop(channel_id, None)
+
+    async def preload(self, channels: List[Tuple[str, str]], concurrency: int = 16) -> int:
+        """
+        Load many (server_id, channel_id) games at once, reading their state
+        documents in one batch. Channels without a state document (e.g. still on
+        the old layout) fall back to normal loads, `concurrency` at a time.
+        Returns the number of games this call put in memory.
+        """
+        pending = [(server_id, channel_id) for server_id, channel_id in channels
+                   if int(channel_id) not in self.games and int(channel_id) not in self._loading]
+        documents = await self.storage.read_many_json(
+            [(server_id, channel_id, STATE_FILE) for server_id, channel_id in pending]
+        )
+        servers = list({int(server_id) for server_id, _ in pending})
+        boards = dict(zip(servers, await asyncio.gather(*(self.server_leaderboard(server_id) for server_id in servers))))
+        card_db = await self._card_db() if pending else None
+        fallback = []
+        loaded = 0
+        now = time.monotonic()
+        for server_id, channel_id in pending:
+            # Skip games that a command loaded (or started loading) while the batch was in flight
+            if int(channel_id) in self.games or int(channel_id) in self._loading:
+                continue
+            state = documents[(server_id, channel_id, STATE_FILE)]
+            if state is None:
+                fallback.append((server_id, channel_id))
+                continue
+            game = self._new_game(int(channel_id), int(server_id), card_db)
+            game.apply_state(state)
+            self._attach(game, boards[int(server_id)])
+            self.games[int(channel_id)] = game
+            self._last_used[int(channel_id)] = now
+            loaded += 1
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def load(server_id: str, channel_id: str) -> bool:
+            async with semaphore:
+                try:
+                    # A channel whose stored state couldn't be read isn't kept
+                    return await self.get(int(channel_id), int(server_id), create=False) is not None
+                except Exception as e:
+                    logging.error(f"Error loading V4CB game for channel {channel_id}: {str(e)}")
+                    return False
+
+        results = await asyncio.gather(*(load(server_id, channel_id) for server_id, channel_id in fallback))
+        return loaded + sum(results)
+
+    def remove(self, channel_id: int) -> None:
+        """Forget a game without saving it, e.g. after its stored state was deleted"""
+        self.games.pop(channel_id, None)
+        self._last_used.pop(channel_id, None)
+
+    async def evict_idle(self) -> int:
+        """Flush and drop games that haven't been used within the idle timeout. Returns the number evicted."""
+        now = time.monotonic()
+        evicted = 0
+        for channel_id, game in list(self.games.items()):
+            if now - self._last_used.get(channel_id, now) < self.idle_timeout:
+                continue
+            # Final flush; a game that can't be saved stays in memory and is retried later
+            if not await game.save_state():
+                continue
+            # The game may have been touched while the final save was in flight
+            if self._last_used.get(channel_id, now) > now:
+                continue
+            self.games.pop(channel_id, None)
+            self._last_used.pop(channel_id, None)
+            evicted += 1
+        if evicted:
+            logging.info(f"Evicted {evicted} idle V4CB game(s), {len(self.games)} still in memory")
+        return evicted
+
+    async def flush_all(self) -> None:
+        """Write every game's unsaved changes, e.g. on shutdown"""
+        await asyncio.gather(*(game.save_state() for game in self.games.values() if game.has_unsaved_changes))
+        await asyncio.gather(*(board.save() for board in self.leaderboards.values() if board.has_unsaved_changes))
+
+    async def run_eviction_loop(self) -> None:
+        """Periodically evict idle games; runs until cancelled"""
+        interval = max(1.0, min(self.idle_timeout / 2, 60.0))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logging.error(f"Error evicting idle games: {str(e)}")
@@ -0,0 +1,97 @@
+import asyncio
+import heapq
+import os
+import sys
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+STATS_FILE = "stats.json"
+# Schema 1 counted a card once per submission rather than once per round
+STATS_SCHEMA = 2
+
+class CardStats:
+    """
+    Card usage counters for a channel, accumulated from its resolved rounds in
+    round order. `through` is the number of rounds counted so far, which makes
+    applying the same rounds twice (e.g. when a write is retried) harmless.
+    """
+    def __init__(self, through: int = 0, played: Optional[Dict[str, int]] = None,
+                 wins: Optional[Dict[str, int]] = None):
+        self.through = through
+        # Rounds each card was submitted in, and rounds it was part of a winning submission
+        self.played: Counter = Counter(played or {})
+        self.wins: Counter = Counter(wins or {})
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, Any]]) -> "CardStats":
+        data = data or {}
+        if data.get("schema", STATS_SCHEMA) < STATS_SCHEMA:
+            # Counted differently; start over so every round is counted again
+            return cls()
+        return cls(data.get("through", 0), data.get("played"), data.get("wins"))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"schema": STATS_SCHEMA, "through": self.through, "played": dict(self.played), "wins": dict(self.wins)}
+
+    def add_round(self, record: Dict[str, Any]) -> None:
+        # Each card counts once per round, however many players submitted it
+        winners = set(record["winners"])
+        played, won = set(), set()
+        for user_id, submission in record["submissions"].items():
+            played.update(submission["cards"])
+            if user_id in winners:
+                won.update(submission["cards"])
+        self.played.update(played)
+        self.wins.update(won)
+        self.through = record["round"] + 1
+
+    def add_rounds(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Count the rounds after `through`, stopping at the first gap"""
+        for record in sorted(records, key=lambda record: record["round"]):
+            if record["round"] < self.through:
+                continue
+            if record["round"] > self.through:
+                break
+            self.add_round(record)
+
+    def most_played(self, n: int) -> List[Tuple[str, int]]:
+        return self.played.most_common(n)
+
+    def win_rate(self, card: str) -> Tuple[int, int]:
+        """(wins, rounds played) for one card"""
+        return self.wins[card], self.played[card]
+
+    def best_win_rates(self, n: int, min_played: int = 3) -> List[Tuple[str, int, int]]:
+        """Top cards by win rate as (card, wins, played), among cards played at least `min_played` times"""
+        eligible = ((card, self.wins[card], played) for card, played in self.played.items() if played >= min_played)
+        return heapq.nlargest(n, eligible, key=lambda entry: (entry[1] / entry[2], entry[2]))
+
+    def most_played_banned(self, banned_cards: Iterable[str], n: int) -> List[Tuple[str, int]]:
+        """
+        Banned cards by how often they were played. Banned cards can't be
+        submitted, so these are plays from before the ban.
+        """
+        played = ((card, self.played[card]) for card in banned_cards if card in self.played)
+        return heapq.nlargest(n, played, key=lambda entry: entry[1])
+
+async def rebuild_all() -> int:
+    """Recompute every channel's card statistics from its round history. Returns the number of channels."""
+    from storage_manager import StorageManager
+    from v4cb import V4CBGame
+
+    storage = StorageManager()
+    channels = await V4CBGame.discover(storage)
+    for server_id, channel_id in channels:
+        game = V4CBGame(int(channel_id), int(server_id), storage=storage)
+        await game.load_state()
+        stats = await game.rebuild_stats()
+        print(f"Channel {channel_id}: {stats.through} round(s), {len(stats.played)} card(s)")
+    storage.close()
+    return len(channels)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 1:
+        print(f"Usage: python {os.path.basename(__file__)}")
+        sys.exit(1)
+    count = asyncio.run(rebuild_all())
+    print(f"Rebuilt card statistics for {count} channel(s)")
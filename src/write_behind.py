@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+class WriteBehindBuffer:
+    """
+    Tracks which documents have unsaved changes and coalesces bursts of changes
+    into one flush, `delay` seconds after the first change. `flush` can also be
+    called directly, e.g. on shutdown or before evicting a game from memory.
+
+    `write` receives the set of dirty document names and returns the ones it
+    failed to write; those stay dirty and are retried on the next flush.
+    """
+    def __init__(self, write: Callable[[Set[str]], Awaitable[Set[str]]], delay: float = 2.0):
+        self._write = write
+        self.delay = delay
+        self._dirty: Set[str] = set()
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def mark_dirty(self, *documents: str) -> None:
+        """Record changed documents and schedule a flush if one isn't pending"""
+        self._dirty.update(documents)
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def discard(self) -> None:
+        """Drop unsaved changes and cancel the pending flush, waiting out one already in flight"""
+        async with self._flush_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+            self._dirty.clear()
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.delay)
+        # From here on this is an ordinary flush: it's never cancelled, and a direct flush waits for it
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> bool:
+        """Write every dirty document now. Returns True if nothing is left unsaved."""
+        # Only a timer that is still sleeping is cancelled; a write in flight holds the lock below
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._flush_lock:
+            if not self._dirty:
+                return True
+            documents, self._dirty = self._dirty, set()
+            failed = documents
+            try:
+                failed = await self._write(documents)
+            except Exception as e:
+                logging.error(f"Error flushing {', '.join(sorted(documents))}: {str(e)}")
+            finally:
+                # Failed documents (or all of them, if the flush was cancelled) stay dirty
+                self._dirty |= failed
+
+        if failed:
+            # Retry later, together with anything changed meanwhile
+            self.mark_dirty()
+            return False
+        return True
+
+class SetChanges:
+    """
+    Pending changes to a set-valued document: either a full replacement or
+    additions and removals. Replaying them onto the stored set (rather than
+    overwriting it) keeps concurrent writers' changes.
+    """
+    def __init__(self, replacement: Optional[Set[str]] = None,
+                 added: Optional[Set[str]] = None, removed: Optional[Set[str]] = None,
+                 replaced_at: int = 0):
+        self.replacement = replacement
+        self.added: Set[str] = added or set()
+        self.removed: Set[str] = removed or set()
+        # State version at which the replacement was made
+        self.replaced_at = replaced_at
+
+    def replace(self, items: Set[str], version: int = 0) -> None:
+        self.replacement = set(items)
+        self.replaced_at = version
+        self.added.clear()
+        self.removed.clear()
+
+    def without_replacement(self) -> "SetChanges":
+        """Just the additions and removals, e.g. when a newer replacement is already stored"""
+        return SetChanges(None, set(self.added), set(self.removed))
+
+    def add(self, items) -> None:
+        for item in items:
+            self.removed.discard(item)
+            self.added.add(item)
+
+    def remove(self, items) -> None:
+        for item in items:
+            self.added.discard(item)
+            self.removed.add(item)
+
+    def apply(self, base: Set[str]) -> Set[str]:
+        start = self.replacement if self.replacement is not None else base
+        return (start - self.removed) | self.added
+
+    def then(self, newer: "SetChanges") -> "SetChanges":
+        """Combine with changes made after these"""
+        if newer.replacement is not None:
+            return newer
+        return SetChanges(self.replacement,
+                          (self.added - newer.removed) | newer.added,
+                          (self.removed - newer.added) | newer.removed,
+                          self.replaced_at)
+
+class CounterChanges:
+    """Pending changes to a counter document: either a full replacement or per-key increments"""
+    def __init__(self, replacement: Optional[Dict[str, int]] = None, deltas: Optional[Dict[str, int]] = None,
+                 replaced_at: int = 0):
+        self.replacement = replacement
+        self.deltas: Dict[str, int] = deltas or {}
+        self.replaced_at = replaced_at
+
+    def replace(self, counts: Dict[str, int], version: int = 0) -> None:
+        self.replacement = dict(counts)
+        self.replaced_at = version
+        self.deltas.clear()
+
+    def without_replacement(self) -> "CounterChanges":
+        return CounterChanges(None, dict(self.deltas))
+
+    def increment(self, key: str, amount: int = 1) -> None:
+        self.deltas[key] = self.deltas.get(key, 0) + amount
+
+    def apply(self, base: Dict[str, int]) -> Dict[str, int]:
+        counts = dict(self.replacement if self.replacement is not None else base)
+        for key, amount in self.deltas.items():
+            counts[key] = counts.get(key, 0) + amount
+        return counts
+
+    def then(self, newer: "CounterChanges") -> "CounterChanges":
+        """Combine with changes made after these"""
+        if newer.replacement is not None:
+            return newer
+        deltas = dict(self.deltas)
+        for key, amount in newer.deltas.items():
+            deltas[key] = deltas.get(key, 0) + amount
+        return CounterChanges(self.replacement, deltas, self.replaced_at)
+
+class MapChanges:
+    """Pending changes to a mapping document: either a full replacement or per-key sets and deletes"""
+    _DELETED = object()
+
+    def __init__(self, replacement: Optional[Dict[str, Any]] = None, updates: Optional[Dict[str, Any]] = None,
+                 replaced_at: int = 0):
+        self.replacement = replacement
+        self.updates: Dict[str, Any] = updates or {}
+        self.replaced_at = replaced_at
+
+    def set(self, key: str, value: Any) -> None:
+        self.updates[key] = value
+
+    def delete(self, key: str) -> None:
+        self.updates[key] = self._DELETED
+
+    def replace(self, mapping: Dict[str, Any], version: int = 0) -> None:
+        self.replacement = dict(mapping)
+        self.replaced_at = version
+        self.updates.clear()
+
+    def without_replacement(self) -> "MapChanges":
+        return MapChanges(None, dict(self.updates))
+
+    def apply(self, base: Dict[str, Any]) -> Dict[str, Any]:
+        mapping = dict(self.replacement if self.replacement is not None else base)
+        for key, value in self.updates.items():
+            if value is self._DELETED:
+                mapping.pop(key, None)
+            else:
+                mapping[key] = value
+        return mapping
+
+    def then(self, newer: "MapChanges") -> "MapChanges":
+        """Combine with changes made after these"""
+        if newer.replacement is not None:
+            return newer
+        return MapChanges(self.replacement, {**self.updates, **newer.updates}, self.replaced_at)
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from storage_backends import LocalBackend, MemoryBackend, SQLiteBackend  # noqa: E402
+
+@pytest.fixture(params=["memory", "local", "sqlite"])
+def backend(request, tmp_path):
+    """Each local storage backend, empty, closed after the test"""
+    if request.param == "memory":
+        backend = MemoryBackend()
+    elif request.param == "local":
+        backend = LocalBackend(str(tmp_path / "local"))
+    else:
+        backend = SQLiteBackend(str(tmp_path / "storage.db"))
+    yield backend
+    backend.close()
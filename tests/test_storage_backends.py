@@ -0,0 +1,90 @@
+"""The read/write/delete/list contract every storage backend must follow"""
+import pytest
+
+from storage_backends import NOT_MODIFIED, PreconditionFailed
+
+KEY = "v4cb/1/2/scores.json"
+
+def test_read_missing_returns_none(backend):
+    assert backend.read(KEY) is None
+    assert backend.read_object(KEY) is None
+
+def test_write_then_overwrite(backend):
+    backend.write(KEY, b'{"scores": {}}')
+    assert backend.read(KEY) == b'{"scores": {}}'
+    backend.write(KEY, b'{"scores": {"a": 1}}')
+    assert backend.read(KEY) == b'{"scores": {"a": 1}}'
+
+def test_binary_round_trip(backend):
+    binary = bytes(range(256))
+    backend.write("v4cb/binary", binary, "application/octet-stream")
+    assert backend.read("v4cb/binary") == binary
+
+def test_list_is_sorted_and_prefix_only(backend):
+    backend.write(KEY, b"{}")
+    backend.write("v4cb/1/2/banned_list.json", b"{}")
+    backend.write("v4cb/1/3/scores.json", b"{}")
+    backend.write("v4cbx/1/2/scores.json", b"{}")
+    assert backend.list("v4cb/1/2/") == ["v4cb/1/2/banned_list.json", KEY]
+    assert backend.list("v4cb/") == ["v4cb/1/2/banned_list.json", KEY, "v4cb/1/3/scores.json"]
+    assert backend.list("v4cb/1/2/sc") == [KEY]
+    assert backend.list("missing/") == []
+
+def test_delete_is_idempotent(backend):
+    backend.write(KEY, b"{}")
+    backend.delete(KEY)
+    assert backend.read(KEY) is None
+    assert KEY not in backend.list("v4cb/")
+    backend.delete(KEY)
+
+def test_generations(backend):
+    first = backend.write_object(KEY, b"1", if_generation_match=0)
+    assert backend.read_object(KEY).generation == first
+    assert backend.read_object(KEY, if_generation_not_match=first) is NOT_MODIFIED
+    second = backend.write_object(KEY, b"2", if_generation_match=first)
+    assert second != first
+    assert backend.read_object(KEY, if_generation_not_match=first).data == b"2"
+
+def test_stale_generation_is_rejected(backend):
+    first = backend.write_object(KEY, b"1", if_generation_match=0)
+    backend.write_object(KEY, b"2", if_generation_match=first)
+    with pytest.raises(PreconditionFailed):
+        backend.write_object(KEY, b"3", if_generation_match=first)
+    with pytest.raises(PreconditionFailed):
+        backend.write_object(KEY, b"3", if_generation_match=0)
+    assert backend.read(KEY) == b"2"
+
+def test_conditional_read_of_missing_key(backend):
+    assert backend.read_object(KEY, if_generation_not_match=1) is None
+
+def test_batch_operations(backend):
+    keys = [f"v4cb/batch/{i}" for i in range(5)]
+    written = backend.write_many([(key, key.encode(), "text/plain") for key in keys])
+    assert all(isinstance(written[key], int) for key in keys)
+
+    read = backend.read_many(keys + ["v4cb/batch/missing"])
+    assert all(read[key].data == key.encode() for key in keys)
+    assert read["v4cb/batch/missing"] is None
+
+    deleted = backend.delete_many(keys + ["v4cb/batch/missing"])
+    assert all(error is None for error in deleted.values())
+    assert backend.list("v4cb/batch/") == []
+
+def test_list_partial_directory_names(backend):
+    backend.write("v4cb/1/2/scores.json", b"{}")
+    backend.write("v4cbx/1/2/scores.json", b"{}")
+    backend.write("drafts/1/picks.json", b"{}")
+    assert backend.list("v4cb") == ["v4cb/1/2/scores.json", "v4cbx/1/2/scores.json"]
+    assert backend.list("v4cb/1") == ["v4cb/1/2/scores.json"]
+    assert backend.list("v4cb/9/") == []
+    assert len(backend.list("")) == 3
+
+def test_list_page(backend):
+    keys = [f"drafts/1/{i:03}.json" for i in range(7)]
+    for key in keys:
+        backend.write(key, b"{}")
+    backend.write("draftsx/1/000.json", b"{}")
+    assert backend.list_page("drafts/", limit=3) == keys[:3]
+    assert backend.list_page("drafts/", start_after=keys[2], limit=3) == keys[3:6]
+    assert backend.list_page("drafts/", start_after=keys[5], limit=3) == keys[6:]
+    assert backend.list_page("drafts/", start_after=keys[6], limit=3) == []
@@ -0,0 +1,97 @@
+"""Conditional read-modify-write in StorageManager.update_json"""
+import asyncio
+
+import state_codec
+from storage_backends import MemoryBackend
+from storage_manager import StorageManager
+
+PATH = "v4cb/1/2/scores.json"
+
+class RacingBackend(MemoryBackend):
+    """Lands a competing write just before each of the next `races` conditional writes"""
+    def __init__(self, races: int):
+        super().__init__()
+        self.races = races
+        self.attempts = 0
+
+    def write_object(self, key, data, content_type="application/json", if_generation_match=None):
+        if if_generation_match is not None:
+            self.attempts += 1
+            if self.races > 0:
+                self.races -= 1
+                stored = self.read_object(key)
+                rival = state_codec.decode(stored.data) if stored is not None else {"scores": {}}
+                rival["scores"]["rival"] = rival["scores"].get("rival", 0) + 1
+                super().write_object(key, state_codec.encode(rival)[0])
+        return super().write_object(key, data, content_type, if_generation_match)
+
+def add_point(player):
+    def merge(current):
+        scores = dict((current or {}).get("scores", {}))
+        scores[player] = scores.get(player, 0) + 1
+        return {"scores": scores}
+    return merge
+
+def test_update_creates_missing_document():
+    storage = StorageManager(MemoryBackend())
+    try:
+        assert asyncio.run(storage.update_path_json(PATH, add_point("a"))) == {"scores": {"a": 1}}
+        assert asyncio.run(storage.read_path_json(PATH)) == {"scores": {"a": 1}}
+    finally:
+        storage.close()
+
+def test_update_merges_into_existing_document():
+    storage = StorageManager(MemoryBackend())
+    try:
+        asyncio.run(storage.write_path_json(PATH, {"scores": {"a": 2}}))
+        assert asyncio.run(storage.update_path_json(PATH, add_point("a"))) == {"scores": {"a": 3}}
+        assert asyncio.run(storage.update_path_json(PATH, add_point("b"))) == {"scores": {"a": 3, "b": 1}}
+    finally:
+        storage.close()
+
+def test_conflict_is_retried_without_losing_either_write():
+    backend = RacingBackend(races=1)
+    storage = StorageManager(backend)
+    try:
+        asyncio.run(storage.write_path_json(PATH, {"scores": {}}))
+        assert asyncio.run(storage.update_path_json(PATH, add_point("a"))) == {"scores": {"rival": 1, "a": 1}}
+        assert backend.attempts == 2
+        assert asyncio.run(storage.read_path_json(PATH)) == {"scores": {"rival": 1, "a": 1}}
+    finally:
+        storage.close()
+
+def test_stale_cache_costs_one_conflict():
+    backend = MemoryBackend()
+    storage = StorageManager(backend)
+    try:
+        asyncio.run(storage.write_path_json(PATH, {"scores": {"a": 1}}))
+        # Another process replaces the document behind the cache's back
+        backend.write(PATH, b'{"scores": {"b": 5}}')
+        assert asyncio.run(storage.update_path_json(PATH, add_point("a"))) == {"scores": {"b": 5, "a": 1}}
+    finally:
+        storage.close()
+
+def test_update_gives_up_after_retries():
+    backend = RacingBackend(races=10)
+    storage = StorageManager(backend)
+    try:
+        assert asyncio.run(storage.update_path_json(PATH, add_point("a"), retries=3)) is None
+        assert backend.attempts == 3
+        # Nothing of ours landed; only the competing writes did
+        assert "a" not in asyncio.run(storage.read_path_json(PATH))["scores"]
+    finally:
+        storage.close()
+
+def test_iter_paths_pages_through_every_path():
+    backend = MemoryBackend()
+    for i in range(10):
+        backend.write(f"drafts/1/{i}.json", b"{}")
+    storage = StorageManager(backend)
+
+    async def pages():
+        return [page async for page in storage.iter_paths("drafts/", page_size=4)]
+    try:
+        assert [len(page) for page in asyncio.run(pages())] == [4, 4, 2]
+        assert sum(asyncio.run(pages()), []) == backend.list("drafts/")
+    finally:
+        storage.close()
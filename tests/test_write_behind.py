@@ -0,0 +1,95 @@
+"""Coalesced and retried flushes in WriteBehindBuffer"""
+import asyncio
+
+from write_behind import WriteBehindBuffer
+
+class Writer:
+    """Records each flush; fails the documents listed in `failing` until they're removed"""
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.flushes = []
+        self.failing = set()
+
+    async def __call__(self, documents):
+        self.flushes.append(set(documents))
+        await asyncio.sleep(self.delay)
+        return documents & self.failing
+
+def test_changes_are_coalesced_into_one_flush():
+    async def run():
+        writer = Writer()
+        buffer = WriteBehindBuffer(writer, delay=0.01)
+        buffer.mark_dirty("state")
+        buffer.mark_dirty("banned", "state")
+        assert buffer.is_dirty
+        await asyncio.sleep(0.05)
+        assert writer.flushes == [{"state", "banned"}]
+        assert not buffer.is_dirty
+    asyncio.run(run())
+
+def test_direct_flush_cancels_the_timer():
+    async def run():
+        writer = Writer()
+        buffer = WriteBehindBuffer(writer, delay=0.01)
+        buffer.mark_dirty("state")
+        assert await buffer.flush()
+        await asyncio.sleep(0.05)
+        assert writer.flushes == [{"state"}]
+    asyncio.run(run())
+
+def test_failed_documents_are_retried():
+    async def run():
+        writer = Writer()
+        writer.failing = {"banned"}
+        buffer = WriteBehindBuffer(writer, delay=0.01)
+        buffer.mark_dirty("state", "banned")
+        assert not await buffer.flush()
+        assert buffer.is_dirty
+        writer.failing.clear()
+        await asyncio.sleep(0.05)
+        assert writer.flushes == [{"state", "banned"}, {"banned"}]
+        assert not buffer.is_dirty
+    asyncio.run(run())
+
+def test_write_errors_keep_everything_dirty():
+    async def run():
+        calls = []
+        async def write(documents):
+            calls.append(set(documents))
+            if len(calls) == 1:
+                raise RuntimeError("storage unavailable")
+            return set()
+        buffer = WriteBehindBuffer(write, delay=0.01)
+        buffer.mark_dirty("state")
+        assert not await buffer.flush()
+        await asyncio.sleep(0.05)
+        assert calls == [{"state"}, {"state"}]
+        assert not buffer.is_dirty
+    asyncio.run(run())
+
+def test_direct_flush_waits_for_timer_flush_in_flight():
+    async def run():
+        writer = Writer(delay=0.05)
+        buffer = WriteBehindBuffer(writer, delay=0.01)
+        buffer.mark_dirty("state")
+        await asyncio.sleep(0.02)  # The timer's write is now in flight
+        buffer.mark_dirty("banned")
+        assert await buffer.flush()
+        # The in-flight write wasn't cancelled, and the later change got its own flush
+        assert writer.flushes == [{"state"}, {"banned"}]
+        assert not buffer.is_dirty
+    asyncio.run(run())
+
+def test_cancelled_flush_leaves_documents_dirty():
+    async def run():
+        writer = Writer(delay=1)
+        buffer = WriteBehindBuffer(writer, delay=10)
+        buffer.mark_dirty("state")
+        flush = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        await asyncio.gather(flush, return_exceptions=True)
+        assert buffer.is_dirty
+        await buffer.discard()
+        assert not buffer.is_dirty
+    asyncio.run(run())